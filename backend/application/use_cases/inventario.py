@@ -1,59 +1,219 @@
-from io import BytesIO
+import tempfile
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from infrastructure.services.ai_service import AIService
 from infrastructure.services.pdf_service import PDFService
 from infrastructure.services.blockchain_service import BlockchainService
+from infrastructure.services.async_blockchain_service import AsyncBlockchainService, SignatureStatusPoller
 from infrastructure.services.email_service import EmailService
-from shared_domain.models import Producto
+from infrastructure.services.report_cache import ReportCache
+from infrastructure.services.report_artifact import ReportArtifact
+from infrastructure.services.currency_service import ExchangeRateService
+from infrastructure.read_models.inventory_snapshot import InventorySnapshot
+from infrastructure.services.merkle_tree_service import MerkleTreeService
+from infrastructure.services.inventory_analytics import InventoryAnalyticsService
+from infrastructure.models import InventoryCertification
+from shared_domain.exceptions import EntityNotFoundError
 
 class ProcesarInventarioUseCase:
     @staticmethod
-    def ejecutar(email=None, tx_hash=None, send_email=False):
-        # 1. Obtener datos de infraestructura
-        productos_query = Producto.objects.all()
-        
-        # 2. IA Service
-        ai_analysis = AIService.generate_inventory_analysis(productos_query)
-        
-        # 3. PDF Service
-        buffer = BytesIO()
-        PDFService.generate_pdf(buffer, ai_analysis, tx_hash=tx_hash)
-        pdf_content = buffer.getvalue()
-        buffer.seek(0)
+    def ejecutar(email=None, tx_hash=None, send_email=False, currency=None):
+        currency = ExchangeRateService.normalize(currency)
+
+        # 0. Caché de reportes: si el inventario no cambió se sirve el PDF ya generado
+        generation = ReportCache.generation()
+        cached = ReportCache.get(generation, tx_hash, currency)
+
+        if cached:
+            ai_analysis, artifact = cached
+        else:
+            # 1. Obtener datos de infraestructura (una sola consulta)
+            snapshot = InventorySnapshot.load()
+
+            # 2. IA Service
+            ai_analysis = AIService.generate_inventory_analysis(snapshot)
+
+            # 3. PDF Service: se escribe una sola vez en un fichero temporal que después
+            # se copia a la caché, se adjunta y se sirve por bloques
+            artifact = ReportArtifact.spooled()
+            try:
+                PDFService.generate_pdf(artifact.writer, ai_analysis, tx_hash=tx_hash, productos=snapshot, currency=currency)
+                ReportCache.put(generation, tx_hash, snapshot.digest(), ai_analysis, artifact, currency)
+            except Exception:
+                artifact.close()
+                raise
         
-        # 4. Email (Opcional)
+        # 4. Email (Opcional): se encola y lo envían los workers de la bandeja de salida
+        emails = []
         if send_email and email:
-            EmailService.send_report_email(email, pdf_content, ai_analysis[:200])
+            try:
+                emails = EmailService.send_report_email(email, artifact, ai_analysis[:200])
+            except Exception:
+                # Destinatario inválido o proveedor sin configurar: el artefacto no llega al llamador
+                artifact.close()
+                raise
             
         return {
             "ai_analysis": ai_analysis,
-            "pdf_buffer": buffer,
-            "pdf_content": pdf_content
+            "artifact": artifact,
+            "emails": emails,
+        }
+
+    @staticmethod
+    def ejecutar_streaming(tx_hash=None, currency=None):
+        # Variante de memoria acotada: los productos se leen por bloques con un cursor
+        currency = ExchangeRateService.normalize(currency)
+        generation = ReportCache.generation()
+        cached = ReportCache.get(generation, tx_hash, currency)
+        if cached:
+            ai_analysis, artifact = cached
+            return {
+                "ai_analysis": ai_analysis,
+                "chunks": ProcesarInventarioUseCase._iter_artifact(artifact)
+            }
+
+        limit = AIService.input_limit()
+        if limit is None:
+            # Todo el inventario: se trocea por empresa a medida que llega del cursor, sin cargarlo entero
+            productos = InventorySnapshot.iter_records(
+                chunk_size=settings.PDF_STREAM_CHUNK_SIZE, order_by=InventorySnapshot.EMPRESA_ORDER
+            )
+            ai_analysis = AIService.generate_inventory_analysis(productos, grouped=True)
+        else:
+            ai_analysis = AIService.generate_inventory_analysis(InventorySnapshot.load(limit=limit))
+
+        return {
+            "ai_analysis": ai_analysis,
+            "chunks": ProcesarInventarioUseCase._render_streaming(ai_analysis, tx_hash, currency)
         }
 
+    @staticmethod
+    def _render_streaming(ai_analysis, tx_hash, currency=None):
+        rows = InventorySnapshot.iter_records(chunk_size=settings.PDF_STREAM_CHUNK_SIZE)
+
+        # El PDF se vuelca a un fichero temporal que sólo pasa a disco si supera el umbral
+        with tempfile.SpooledTemporaryFile(max_size=settings.PDF_STREAM_SPOOL_MAX_BYTES) as output:
+            PDFService.generate_pdf_streaming(output, ai_analysis, rows, tx_hash=tx_hash, currency=currency)
+            output.seek(0)
+            yield from ProcesarInventarioUseCase._iter_file(output)
+
+    @staticmethod
+    def _iter_artifact(artifact):
+        with artifact:
+            yield from artifact.chunks()
+
+    @staticmethod
+    def _iter_file(fileobj, block_size=64 * 1024):
+        while True:
+            block = fileobj.read(block_size)
+            if not block:
+                return
+            yield block
+
 class CertificarInventarioUseCase:
     @staticmethod
     def ejecutar():
+        ai_analysis, merkle_state, content_to_hash = CertificarInventarioUseCase._preparar()
+        
+        print("Calling BlockchainService.certify_data...")
+        cert_result = BlockchainService.certify_data(content_to_hash)
+        print("BlockchainService call completed.")
+
+        return CertificarInventarioUseCase._registrar(ai_analysis, merkle_state, cert_result)
+
+    @staticmethod
+    def _preparar():
         print("Executing CertificarInventarioUseCase...")
-        productos_query = Producto.objects.all()
-        print(f"Found {productos_query.count()} products.")
+        snapshot = InventorySnapshot.load()
+        print(f"Found {len(snapshot)} products.")
         
         try:
             print("Generating AI Analysis...")
-            ai_analysis = AIService.generate_inventory_analysis(productos_query)
+            ai_analysis = AIService.generate_inventory_analysis(snapshot)
             print("AI Analysis generated successfully.")
         except Exception as e:
             print(f"AI Service Error: {str(e)}")
             raise
         
-        content_to_hash = f"{ai_analysis}{productos_query.count()}{[p.codigo for p in productos_query]}"
-        
-        print("Calling BlockchainService.certify_data...")
-        cert_result = BlockchainService.certify_data(content_to_hash)
-        print("BlockchainService call completed.")
+        # La raíz de Merkle se mantiene incrementalmente: no hay que recorrer el inventario
+        merkle_state = MerkleTreeService.current_root()
+        content_to_hash = f"{ai_analysis}{merkle_state['root']}"
+        return ai_analysis, merkle_state, content_to_hash
+
+    @staticmethod
+    def _registrar(ai_analysis, merkle_state, cert_result):
+        # Sin lote el memo es el propio data_hash; con lote se guarda la prueba que lo enlaza con el memo
+        batch = cert_result.get("batch") or {}
+        certificacion = InventoryCertification.objects.create(
+            tx_hash=cert_result["txHash"],
+            data_hash=cert_result["pdf_hash"],
+            merkle_root=merkle_state["root"],
+            merkle_version=merkle_state["version"],
+            merkle_depth=merkle_state["depth"],
+            batch_root=batch.get("root", ''),
+            batch_index=batch.get("index"),
+            batch_proof=batch.get("proof", []),
+            status=cert_result["status"],
+        )
         
-        return {
+        resultado = {
             "ai_analysis": ai_analysis,
             "txHash": cert_result["txHash"],
             "pdf_hash": cert_result["pdf_hash"],
+            "merkle_root": merkle_state["root"],
+            "certification_id": certificacion.id,
             "status": cert_result["status"]
         }
+        if "batch" in cert_result:
+            resultado["batch"] = cert_result["batch"]
+        return resultado
+
+class CertificarInventarioAsyncUseCase:
+    @staticmethod
+    async def ejecutar():
+        # La IA y el ORM son síncronos: se ejecutan en hilos sin bloquear el event loop
+        ai_analysis, merkle_state, content_to_hash = await sync_to_async(CertificarInventarioUseCase._preparar)()
+
+        cert_result = await AsyncBlockchainService.certify_data(content_to_hash)
+        resultado = await sync_to_async(CertificarInventarioUseCase._registrar)(ai_analysis, merkle_state, cert_result)
+
+        if cert_result["status"] == "PENDING":
+            # La fila ya está guardada como PENDING: el poller del proceso la recoge de la base de datos
+            SignatureStatusPoller.start()
+        return resultado
+
+class ObtenerPruebaInclusionUseCase:
+    @staticmethod
+    def ejecutar(codigo, tx_hash=None, root=None):
+        certificaciones = InventoryCertification.objects.all()
+        if tx_hash:
+            certificaciones = certificaciones.filter(tx_hash=tx_hash)
+        if root:
+            certificaciones = certificaciones.filter(merkle_root=root)
+        certificacion = certificaciones.first()
+        if certificacion is None:
+            raise EntityNotFoundError("No existe una certificación de inventario para los criterios indicados.")
+
+        prueba = MerkleTreeService.proof(codigo, certificacion.merkle_version, certificacion.merkle_depth)
+        prueba["verified"] = prueba["root"] == certificacion.merkle_root
+        prueba["root"] = certificacion.merkle_root
+        prueba["tx_hash"] = certificacion.tx_hash
+        prueba["certified_at"] = certificacion.created_at
+        return prueba
+
+class ObtenerAnaliticaInventarioUseCase:
+    @staticmethod
+    def ejecutar():
+        # El resultado vale mientras no cambie la generación del inventario (se invalida con cada escritura)
+        generation = ReportCache.generation()
+        cache_key = f"inventory_analytics:{generation}"
+        resultado = cache.get(cache_key)
+        if resultado is None:
+            columns = InventoryAnalyticsService.load_columns()
+            resultado = InventoryAnalyticsService.compute(
+                columns, percentiles=settings.ANALYTICS_PERCENTILES, bins=settings.ANALYTICS_HISTOGRAM_BINS
+            )
+            resultado["generation"] = generation
+            cache.set(cache_key, resultado, settings.ANALYTICS_CACHE_TTL)
+        return resultado
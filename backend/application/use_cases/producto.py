@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.db import DatabaseError, transaction
 from shared_domain.models import Empresa, Producto
 from shared_domain.exceptions import BusinessRuleError, EntityNotFoundError
+from infrastructure.services.product_export import FORMATS as EXPORT_FORMATS, ProductExporter
+from infrastructure.services.product_import import ProductImportParser
+from infrastructure.services.product_search import ProductSearchService
+from infrastructure.signals import productos_importados
 
 class GestionarProductoUseCase:
     @staticmethod
@@ -25,3 +31,144 @@ class GestionarProductoUseCase:
             return producto
         except BusinessRuleError:
             raise
+
+
+class ImportarProductosUseCase:
+    """
+    Importación masiva en streaming: las filas se validan y se escriben por
+    lotes (bulk_create con upsert por código) y cada fila inválida queda en el
+    reporte sin interrumpir la carga.
+    """
+    UPDATE_FIELDS = ['nombre', 'caracteristicas', 'precios', 'empresa']
+
+    @staticmethod
+    def ejecutar(lines, file_format, batch_size=None):
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        reporte = {"total": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+        # NIT -> existe; cada empresa se consulta una sola vez en toda la importación
+        empresas = {}
+        lote = {}
+
+        for line, data, error in ProductImportParser.iter_rows(lines, file_format):
+            reporte["total"] += 1
+            producto = None
+            if error is None:
+                try:
+                    producto = ImportarProductosUseCase._construir(data)
+                except BusinessRuleError as e:
+                    error = str(e)
+            if error is not None:
+                ImportarProductosUseCase._registrar_error(reporte, line, (data or {}).get('codigo'), error)
+                continue
+
+            # Un código repetido dentro del lote se queda con la última fila
+            lote[producto.codigo] = (line, producto)
+            if len(lote) >= batch_size:
+                ImportarProductosUseCase._guardar_lote(lote, empresas, reporte)
+                lote = {}
+
+        if lote:
+            ImportarProductosUseCase._guardar_lote(lote, empresas, reporte)
+        return reporte
+
+    @staticmethod
+    def _construir(data):
+        codigo = str(data.get('codigo') or '').strip()
+        nombre = str(data.get('nombre') or '').strip()
+        nit = str(data.get('empresa') or '').strip()
+        if not codigo:
+            raise BusinessRuleError("El código es obligatorio")
+        if len(codigo) > Producto._meta.get_field('codigo').max_length:
+            raise BusinessRuleError("El código supera la longitud máxima permitida")
+        if not nombre:
+            raise BusinessRuleError("El nombre es obligatorio")
+        if len(nombre) > Producto._meta.get_field('nombre').max_length:
+            raise BusinessRuleError("El nombre supera la longitud máxima permitida")
+        if not nit:
+            raise BusinessRuleError("La empresa es obligatoria")
+
+        precios = data.get('precios')
+        Producto.validar_precios(precios)
+        return Producto(
+            codigo=codigo,
+            nombre=nombre,
+            caracteristicas=data.get('caracteristicas') or '',
+            precios=precios,
+            empresa_id=nit,
+        )
+
+    @staticmethod
+    def _registrar_error(reporte, line, codigo, error):
+        reporte["failed"] += 1
+        if len(reporte["errors"]) < settings.IMPORT_MAX_ERRORS:
+            reporte["errors"].append({"line": line, "codigo": codigo, "error": error})
+
+    @staticmethod
+    def _guardar_lote(lote, empresas, reporte):
+        nuevos_nits = {producto.empresa_id for _, producto in lote.values()} - empresas.keys()
+        if nuevos_nits:
+            encontrados = set(Empresa.objects.filter(nit__in=nuevos_nits).values_list('nit', flat=True))
+            empresas.update({nit: nit in encontrados for nit in nuevos_nits})
+
+        validos = []
+        for line, producto in lote.values():
+            if empresas[producto.empresa_id]:
+                validos.append((line, producto))
+            else:
+                ImportarProductosUseCase._registrar_error(
+                    reporte, line, producto.codigo, f"Empresa con NIT {producto.empresa_id} no encontrada."
+                )
+        if not validos:
+            return
+
+        productos = [producto for _, producto in validos]
+        try:
+            with transaction.atomic():
+                # Empresa actual de los códigos que ya existían: el upsert puede moverlos de empresa
+                anteriores = dict(
+                    Producto.objects.filter(codigo__in=[p.codigo for p in productos]).values_list('codigo', 'empresa_id')
+                )
+                existentes = len(anteriores)
+                Producto.objects.bulk_create(
+                    productos,
+                    update_conflicts=True,
+                    unique_fields=['codigo'],
+                    update_fields=ImportarProductosUseCase.UPDATE_FIELDS,
+                )
+                productos_importados.send(
+                    sender=Producto, productos=productos, empresas_anteriores=set(anteriores.values())
+                )
+        except DatabaseError as e:
+            for line, producto in validos:
+                ImportarProductosUseCase._registrar_error(reporte, line, producto.codigo, f"Error al guardar el lote: {str(e)}")
+            return
+
+        reporte["created"] += len(productos) - existentes
+        reporte["updated"] += existentes
+
+
+class ExportarProductosUseCase:
+    @staticmethod
+    def ejecutar(file_format='ndjson', compress=False):
+        file_format = (file_format or 'ndjson').lower()
+        if file_format not in EXPORT_FORMATS:
+            raise BusinessRuleError(f"Formato de exportación no soportado. Use uno de: {', '.join(EXPORT_FORMATS)}.")
+        return ProductExporter(file_format, compress=compress, chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+class BuscarProductosUseCase:
+    @staticmethod
+    def ejecutar(query, limit=None):
+        query = (query or '').strip()
+        if not query:
+            raise BusinessRuleError("El parámetro 'q' es obligatorio.")
+        try:
+            limit = int(limit) if limit else settings.SEARCH_DEFAULT_LIMIT
+        except ValueError:
+            raise BusinessRuleError("El parámetro 'limit' debe ser un número entero.")
+        limit = max(1, min(limit, settings.SEARCH_MAX_LIMIT))
+
+        ranking = ProductSearchService.search(query, limit)
+        # Una sola consulta para la página de resultados, en el orden del ranking
+        productos = Producto.objects.in_bulk([codigo for codigo, _ in ranking])
+        return [(productos[codigo], rank) for codigo, rank in ranking if codigo in productos]
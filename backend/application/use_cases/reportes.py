@@ -0,0 +1,44 @@
+from django.core.exceptions import ValidationError
+from infrastructure.models import ReportJob
+from infrastructure.services.currency_service import ExchangeRateService
+from infrastructure.services.report_artifact import ReportArtifact
+from infrastructure.services.report_queue import ReportJobQueue
+from shared_domain.exceptions import BusinessRuleError, EntityNotFoundError
+from .inventario import ProcesarInventarioUseCase
+
+class ProcesarReporteJobUseCase:
+    @staticmethod
+    def ejecutar(job):
+        resultado = ProcesarInventarioUseCase.ejecutar(
+            email=job.email, tx_hash=job.tx_hash, send_email=job.send_email, currency=job.currency or None
+        )
+        # La columna report_job.pdf_content necesita los bytes: única copia completa del PDF
+        with resultado["artifact"] as artifact:
+            return artifact.read()
+
+class EncolarReporteUseCase:
+    @staticmethod
+    def ejecutar(email=None, tx_hash=None, send_email=False, currency=None):
+        if send_email and not email:
+            raise BusinessRuleError("El email es requerido.")
+        # Se valida al encolar para no descubrir una moneda inválida en el worker
+        currency = ExchangeRateService.normalize(currency)
+
+        job = ReportJobQueue.enqueue(email=email, tx_hash=tx_hash, send_email=send_email, currency=currency)
+        ReportJobQueue.start_workers(ProcesarReporteJobUseCase.ejecutar)
+        return job
+
+class ConsultarReporteUseCase:
+    @staticmethod
+    def obtener(job_id):
+        try:
+            return ReportJob.objects.get(pk=job_id)
+        except (ReportJob.DoesNotExist, ValidationError):
+            raise EntityNotFoundError(f"Reporte {job_id} no encontrado.")
+
+    @staticmethod
+    def obtener_pdf(job_id):
+        job = ConsultarReporteUseCase.obtener(job_id)
+        if job.status != ReportJob.Status.DONE:
+            raise BusinessRuleError(f"El reporte {job_id} aún no está disponible (estado: {job.status}).")
+        return ReportArtifact.from_bytes(job.pdf_content)
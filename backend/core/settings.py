@@ -62,6 +62,9 @@ DOMAIN_DIR = BASE_DIR.parent / 'domain/src'
 sys.path.append(str(DOMAIN_DIR))
 
 MIDDLEWARE = [
+    # Primero: el tiempo total incluye el resto de middlewares
+    'management.middleware.MetricsMiddleware',
+    'management.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -99,6 +102,17 @@ DATABASES = {
     'default': env.db('DATABASE_URL', default=f"postgresql://{env('DB_USER')}:{env('DB_PASSWORD')}@{env('DB_HOST')}:{env('DB_PORT')}/{env('DB_NAME')}")
 }
 
+# Caché compartida (locmem por defecto; usar redis:// o filecache:// con varios workers)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    # Análisis de IA: backend propio para poder compartirlo entre workers (redis://) y acotarlo con LRU
+    'ai_analysis': env.cache('AI_CACHE_URL', default='locmemcache://ai-analysis'),
+}
+CACHES['ai_analysis'].setdefault('OPTIONS', {}).setdefault('MAX_ENTRIES', env.int('AI_CACHE_MAX_ENTRIES', default=256))
+# Respuestas JSON ya renderizadas de productos/empresas (locmemcache://, filecache:///ruta, redis://...)
+CACHES['responses'] = env.cache('RESPONSE_CACHE_URL', default='locmemcache://responses')
+CACHES['responses'].setdefault('OPTIONS', {}).setdefault('MAX_ENTRIES', env.int('RESPONSE_CACHE_MAX_ENTRIES', default=1000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -152,10 +166,56 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # orjson para la salida compacta; mismos bytes que el JSONRenderer de DRF
+        'management.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'EXCEPTION_HANDLER': 'management.exception_handler.global_exception_handler',
 }
 
+# IMPORTACIÓN MASIVA DE PRODUCTOS (CSV / NDJSON)
+IMPORT_BATCH_SIZE = env.int('IMPORT_BATCH_SIZE', default=1000)
+# Máximo de errores detallados en el reporte (el contador 'failed' siempre es exacto)
+IMPORT_MAX_ERRORS = env.int('IMPORT_MAX_ERRORS', default=1000)
+
+# EXPORTACIÓN EN STREAMING (filas leídas por bloque desde un cursor de servidor)
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+
+# ANALÍTICA DE INVENTARIO (NumPy, cacheada por generación del inventario)
+ANALYTICS_PERCENTILES = [int(p) for p in env.list('ANALYTICS_PERCENTILES', default=['50', '90', '99'])]
+ANALYTICS_HISTOGRAM_BINS = env.int('ANALYTICS_HISTOGRAM_BINS', default=10)
+ANALYTICS_CACHE_TTL = env.int('ANALYTICS_CACHE_TTL', default=24 * 3600)
+
+# CONVERSIÓN DE MONEDA (tasas respecto a la moneda base, cacheadas en memoria)
+EXCHANGE_BASE_CURRENCY = env('EXCHANGE_BASE_CURRENCY', default='USD')
+EXCHANGE_DECIMALS = env.int('EXCHANGE_DECIMALS', default=2)
+# Cada cuántos segundos comprueba cada proceso si la tabla de tasas cambió (una consulta agregada)
+EXCHANGE_RATES_CHECK_SECONDS = env.float('EXCHANGE_RATES_CHECK_SECONDS', default=5)
+
+# CACHÉ DE RESPUESTAS DE LA API (listados y detalles de productos y empresas)
+# Las entradas se direccionan por versión del inventario: una escritura sólo invalida su ámbito
+# ETag/304 y caché de respuestas: 'auto' sólo con una caché por defecto compartida (CACHE_URL
+# distinto de locmemcache://), 'on' lo fuerza (un único proceso), 'off' lo desactiva
+CONDITIONAL_GET = env('CONDITIONAL_GET', default='auto')
+RESPONSE_CACHE_ENABLED = env.bool('RESPONSE_CACHE_ENABLED', default=True)
+RESPONSE_CACHE_TTL = env.int('RESPONSE_CACHE_TTL', default=300)
+
+# BÚSQUEDA DE PRODUCTOS
+# 'auto': tsvector + trigramas en PostgreSQL, índice invertido en memoria en otros motores
+SEARCH_BACKEND = env('SEARCH_BACKEND', default='auto')
+SEARCH_DEFAULT_LIMIT = env.int('SEARCH_DEFAULT_LIMIT', default=20)
+SEARCH_MAX_LIMIT = env.int('SEARCH_MAX_LIMIT', default=100)
+# Resultados ordenados por relevancia en la búsqueda del admin; el resto de coincidencias icontains va detrás
+ADMIN_SEARCH_LIMIT = env.int('ADMIN_SEARCH_LIMIT', default=500)
+# Similitud mínima de trigramas para aceptar un término con errores de escritura
+SEARCH_FUZZY_THRESHOLD = env.float('SEARCH_FUZZY_THRESHOLD', default=0.3)
+
+# PAGINACIÓN DE LISTADOS (cursor sobre la clave primaria, sin OFFSET ni COUNT(*) por defecto)
+API_PAGE_SIZE = env.int('API_PAGE_SIZE', default=50)
+API_MAX_PAGE_SIZE = env.int('API_MAX_PAGE_SIZE', default=500)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -208,12 +268,109 @@ CSRF_TRUSTED_ORIGINS = [
 # PARA ENVÍO DE CORREOS REALES: Regístrate en resend.com y obtén tu API Key
 RESEND_API_KEY = env('RESEND_API_KEY', default=None)
 
+# BANDEJA DE SALIDA DE CORREOS (tabla email_outbox, enviada por un pool de workers)
+# Proveedor: Resend en producción; 'infrastructure.services.email_service.LocalEmailProvider' para desarrollo/tests
+EMAIL_PROVIDER = env('EMAIL_PROVIDER', default='infrastructure.services.email_service.ResendEmailProvider')
+EMAIL_FROM = env('EMAIL_FROM', default='StockPro <onboarding@resend.dev>')
+EMAIL_WORKERS = env.int('EMAIL_WORKERS', default=2)
+EMAIL_WORKERS_AUTOSTART = env.bool('EMAIL_WORKERS_AUTOSTART', default=True)
+EMAIL_POLL_INTERVAL = env.float('EMAIL_POLL_INTERVAL', default=1.0)
+EMAIL_HTTP_TIMEOUT = env.float('EMAIL_HTTP_TIMEOUT', default=10.0)
+# Reintentos con backoff exponencial (segundos); después el correo queda en DEAD
+EMAIL_MAX_ATTEMPTS = env.int('EMAIL_MAX_ATTEMPTS', default=6)
+EMAIL_RETRY_BASE_DELAY = env.float('EMAIL_RETRY_BASE_DELAY', default=30.0)
+EMAIL_RETRY_MAX_DELAY = env.float('EMAIL_RETRY_MAX_DELAY', default=3600.0)
+# Segundos tras los cuales un envío SENDING se considera abandonado y se re-encola
+EMAIL_SEND_TIMEOUT = env.int('EMAIL_SEND_TIMEOUT', default=300)
+# Latencia simulada del proveedor local
+EMAIL_LOCAL_LATENCY = env.float('EMAIL_LOCAL_LATENCY', default=0.0)
+
 # CONFIGURACIÓN BLOCKCHAIN (SOLANA DEVNET)
 SOLANA_RPC_URL = env('SOLANA_RPC_URL', default="https://api.devnet.solana.com")
 # La llave privada debe ser un array de bytes o una cadena Base58. 
 # Si usas Phantom, exporta la llave privada.
 SOLANA_PRIVATE_KEY = env('SOLANA_PRIVATE_KEY', default=None)
+# Cliente RPC compartido: timeout y caché del blockhash (válido ~60-90 s en la red)
+SOLANA_RPC_TIMEOUT = env.float('SOLANA_RPC_TIMEOUT', default=10.0)
+SOLANA_BLOCKHASH_TTL = env.float('SOLANA_BLOCKHASH_TTL', default=30.0)
+SOLANA_BLOCKHASH_REFRESH_INTERVAL = env.float('SOLANA_BLOCKHASH_REFRESH_INTERVAL', default=15.0)
+# Seguimiento asíncrono de firmas (vista certify_inventory_async)
+SOLANA_STATUS_POLL_INTERVAL = env.float('SOLANA_STATUS_POLL_INTERVAL', default=2.0)
+SOLANA_STATUS_MAX_POLLS = env.int('SOLANA_STATUS_MAX_POLLS', default=60)
+# Hilo de seguimiento de firmas en cada proceso web (desactivar si se usa `poll_signature_statuses`)
+SOLANA_STATUS_POLLER_AUTOSTART = env.bool('SOLANA_STATUS_POLLER_AUTOSTART', default=True)
+# Ventana de agrupación de certificaciones (0 = una transacción por certificación)
+SOLANA_BATCH_WINDOW_MS = env.int('SOLANA_BATCH_WINDOW_MS', default=0)
+SOLANA_BATCH_MAX_SIZE = env.int('SOLANA_BATCH_MAX_SIZE', default=64)
+SOLANA_BATCH_TIMEOUT = env.float('SOLANA_BATCH_TIMEOUT', default=30.0)
 
 
 # GOOGLE GEMINI API KEY
 GOOGLE_API_KEY = env('GOOGLE_API_KEY', default=None)
+GEMINI_MODEL = env('GEMINI_MODEL', default='gemini-2.5-flash-lite')
+
+# CACHÉ DE ANÁLISIS DE IA
+# Clave = hash del modelo + prompt; las llamadas concurrentes con el mismo prompt se agrupan en una sola
+AI_CACHE_ENABLED = env.bool('AI_CACHE_ENABLED', default=True)
+AI_CACHE_TTL = env.int('AI_CACHE_TTL', default=3600)
+AI_SINGLE_FLIGHT_TIMEOUT = env.int('AI_SINGLE_FLIGHT_TIMEOUT', default=60)
+
+# ANÁLISIS DE IA SOBRE TODO EL INVENTARIO
+# 'map_reduce': el inventario, ordenado por empresa, se divide en bloques con cortes estables (hash del código),
+# se resumen en paralelo y se consolidan. Un cambio en un producto sólo invalida la caché de IA de su bloque.
+# 'sample': comportamiento anterior, sólo los primeros 30 productos.
+AI_ANALYSIS_MODE = env('AI_ANALYSIS_MODE', default='map_reduce')
+AI_CHUNK_TOKENS = env.int('AI_CHUNK_TOKENS', default=4000)
+AI_MAP_WORKERS = env.int('AI_MAP_WORKERS', default=4)
+
+
+# COLA DE REPORTES EN SEGUNDO PLANO
+# Los trabajos se guardan en la tabla report_job y los procesa un pool de hilos local.
+REPORT_WORKERS = env.int('REPORT_WORKERS', default=2)
+REPORT_WORKERS_AUTOSTART = env.bool('REPORT_WORKERS_AUTOSTART', default=True)
+REPORT_JOB_POLL_INTERVAL = env.float('REPORT_JOB_POLL_INTERVAL', default=1.0)
+# Segundos tras los cuales un trabajo RUNNING se considera abandonado y se re-encola
+REPORT_JOB_TIMEOUT = env.int('REPORT_JOB_TIMEOUT', default=600)
+
+# CACHÉ DE REPORTES PDF
+# Los PDF se guardan en disco direccionados por contenido (estado del inventario + IA + tx_hash)
+REPORT_CACHE_ENABLED = env.bool('REPORT_CACHE_ENABLED', default=True)
+REPORT_CACHE_BACKEND = env('REPORT_CACHE_BACKEND', default='infrastructure.services.report_cache.FileSystemReportStorage')
+REPORT_CACHE_DIR = env('REPORT_CACHE_DIR', default=str(BASE_DIR / '.report_cache'))
+REPORT_CACHE_MAX_BYTES = env.int('REPORT_CACHE_MAX_BYTES', default=200 * 1024 * 1024)
+# Tamaño a partir del cual un PDF recién generado pasa de memoria a un fichero temporal
+REPORT_SPOOL_MAX_BYTES = env.int('REPORT_SPOOL_MAX_BYTES', default=8 * 1024 * 1024)
+
+# REPORTES PDF EN STREAMING (?stream=true)
+PDF_STREAM_CHUNK_SIZE = env.int('PDF_STREAM_CHUNK_SIZE', default=2000)
+PDF_STREAM_SPOOL_MAX_BYTES = env.int('PDF_STREAM_SPOOL_MAX_BYTES', default=8 * 1024 * 1024)
+
+# INSTRUMENTACIÓN POR PETICIÓN
+# Cabecera Server-Timing (db, ai, pdf, blockchain, email, total) y una línea JSON por petición en el logger
+# 'stockpro.requests'. Desactivada, el middleware no se instala y los spans de los servicios no miden nada.
+INSTRUMENTATION_ENABLED = env.bool('INSTRUMENTATION_ENABLED', default=False)
+# Repeticiones de una misma sentencia SQL en una petición a partir de las cuales se avisa de un posible N+1
+INSTRUMENTATION_NPLUSONE_THRESHOLD = env.int('INSTRUMENTATION_NPLUSONE_THRESHOLD', default=10)
+INSTRUMENTATION_SLOW_REQUEST_MS = env.int('INSTRUMENTATION_SLOW_REQUEST_MS', default=1000)
+
+# MÉTRICAS PROMETHEUS (/api/metrics/)
+# Con varios workers de gunicorn, exportar PROMETHEUS_MULTIPROC_DIR (un directorio vacío en cada arranque):
+# cada worker escribe sus contadores en ficheros propios y el endpoint suma los de todos.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+# Si se define, el endpoint exige 'Authorization: Bearer <METRICS_TOKEN>'; sin token sólo responde con DEBUG=True
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'stockpro.requests': {
+            'handlers': ['console'],
+            'level': env('INSTRUMENTATION_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
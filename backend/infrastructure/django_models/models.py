@@ -1,4 +1,191 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 
 # Models have been moved to shared_domain
 
+
+class ReportJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendiente'
+        RUNNING = 'RUNNING', 'En proceso'
+        DONE = 'DONE', 'Completado'
+        FAILED = 'FAILED', 'Fallido'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    email = models.EmailField(null=True, blank=True)
+    tx_hash = models.CharField(max_length=128, null=True, blank=True)
+    send_email = models.BooleanField(default=False)
+    # Moneda del reporte ('' = precios originales)
+    currency = models.CharField(max_length=10, blank=True, default='')
+    pdf_content = models.BinaryField(null=True, editable=False)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'report_job'
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'], name='report_job_status_idx')]
+
+    def __str__(self):
+        return f"ReportJob {self.id} ({self.status})"
+
+
+class MerkleState(models.Model):
+    # Fila única con la versión y la raíz vigentes del árbol de inventario
+    version = models.BigIntegerField(default=0)
+    depth = models.PositiveSmallIntegerField(default=0)
+    next_index = models.BigIntegerField(default=0)
+    root = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = 'merkle_state'
+
+
+class MerkleLeaf(models.Model):
+    # Cada código conserva su posición para siempre, aunque el producto se elimine
+    codigo = models.CharField(max_length=50, primary_key=True)
+    index = models.BigIntegerField(unique=True)
+    leaf_hash = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = 'merkle_leaf'
+
+
+class MerkleNode(models.Model):
+    # Nodos versionados (copy-on-write): permiten pruebas contra raíces históricas
+    level = models.PositiveSmallIntegerField()
+    index = models.BigIntegerField()
+    version = models.BigIntegerField()
+    hash = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = 'merkle_node'
+        constraints = [
+            models.UniqueConstraint(fields=['level', 'index', 'version'], name='merkle_node_unique_version')
+        ]
+
+
+class InventoryCertification(models.Model):
+    tx_hash = models.CharField(max_length=128, db_index=True)
+    data_hash = models.CharField(max_length=64)
+    merkle_root = models.CharField(max_length=64, db_index=True)
+    merkle_version = models.BigIntegerField()
+    merkle_depth = models.PositiveSmallIntegerField()
+    # Certificación agrupada: el memo on-chain es batch_root y data_hash es la hoja batch_index
+    batch_root = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    batch_index = models.PositiveIntegerField(null=True, blank=True)
+    batch_proof = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'inventory_certification'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Certificación {self.tx_hash}"
+
+
+class ProductoPrecio(models.Model):
+    # Copia indexada de Producto.precios (una fila por moneda) para filtrar y ordenar por rango
+    producto = models.ForeignKey(
+        'shared_domain.Producto', on_delete=models.CASCADE, related_name='precios_indexados'
+    )
+    moneda = models.CharField(max_length=10)
+    valor = models.DecimalField(max_digits=24, decimal_places=6)
+
+    class Meta:
+        db_table = 'producto_precio'
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'moneda'], name='producto_precio_unique_moneda')
+        ]
+        indexes = [models.Index(fields=['moneda', 'valor', 'producto'], name='producto_precio_rango_idx')]
+
+    def __str__(self):
+        return f"{self.producto_id} {self.moneda} {self.valor}"
+
+
+class ExchangeRate(models.Model):
+    # Unidades de la moneda base (EXCHANGE_BASE_CURRENCY) que vale una unidad de `moneda`
+    moneda = models.CharField(max_length=10, primary_key=True)
+    tasa = models.DecimalField(max_digits=24, decimal_places=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'exchange_rate'
+        ordering = ['moneda']
+
+    def save(self, *args, **kwargs):
+        self.moneda = self.moneda.upper()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.moneda} = {self.tasa}"
+
+
+class ProductoBusqueda(models.Model):
+    # Texto normalizado (minúsculas, sin tildes) del producto para la búsqueda.
+    # En PostgreSQL la tabla tiene además la columna generada `vector` (tsvector)
+    # y los índices GIN de texto completo y trigramas (migración 0007).
+    producto = models.OneToOneField(
+        'shared_domain.Producto', on_delete=models.CASCADE, primary_key=True, related_name='busqueda'
+    )
+    titulo = models.TextField()
+    contenido = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'producto_busqueda'
+
+    def __str__(self):
+        return self.titulo
+
+
+class EmailAttachment(models.Model):
+    # Adjunto direccionado por contenido: un mismo PDF se guarda una sola vez; el base64 se genera al enviar
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    filename = models.CharField(max_length=255)
+    content = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'email_attachment'
+
+    def __str__(self):
+        return f"{self.filename} ({self.sha256[:12]})"
+
+
+class OutboxEmail(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendiente'
+        SENDING = 'SENDING', 'Enviando'
+        SENT = 'SENT', 'Enviado'
+        DEAD = 'DEAD', 'Descartado'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html = models.TextField()
+    attachment = models.ForeignKey(
+        EmailAttachment, on_delete=models.PROTECT, null=True, blank=True, related_name='emails'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    provider_id = models.CharField(max_length=128, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_status_idx')]
+
+    def __str__(self):
+        return f"OutboxEmail {self.id} -> {self.to} ({self.status})"
@@ -9,6 +9,11 @@ class Migration(migrations.Migration):
         ("infrastructure", "0001_initial"),
     ]
 
+    # Las tablas 'empresa' y 'producto' pasan a shared_domain: deben liberarse antes de que se creen allí
+    run_before = [
+        ("shared_domain", "0001_initial"),
+    ]
+
     operations = [
         migrations.RemoveField(
             model_name="productomodel",
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:23
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0002_remove_productomodel_empresa_delete_empresamodel_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('RUNNING', 'En proceso'), ('DONE', 'Completado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('tx_hash', models.CharField(blank=True, max_length=128, null=True)),
+                ('send_email', models.BooleanField(default=False)),
+                ('pdf_content', models.BinaryField(null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'report_job',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='report_job_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0003_report_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCertification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(db_index=True, max_length=128)),
+                ('data_hash', models.CharField(max_length=64)),
+                ('merkle_root', models.CharField(db_index=True, max_length=64)),
+                ('merkle_version', models.BigIntegerField()),
+                ('merkle_depth', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'inventory_certification',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MerkleLeaf',
+            fields=[
+                ('codigo', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('index', models.BigIntegerField(unique=True)),
+                ('leaf_hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'db_table': 'merkle_leaf',
+            },
+        ),
+        migrations.CreateModel(
+            name='MerkleState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('next_index', models.BigIntegerField(default=0)),
+                ('root', models.CharField(max_length=64)),
+            ],
+            options={
+                'db_table': 'merkle_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='MerkleNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('index', models.BigIntegerField()),
+                ('version', models.BigIntegerField()),
+                ('hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'db_table': 'merkle_node',
+                'constraints': [models.UniqueConstraint(fields=('level', 'index', 'version'), name='merkle_node_unique_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:49
+
+import django.db.models.deletion
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+
+
+def poblar_precios(apps, schema_editor):
+    Producto = apps.get_model('shared_domain', 'Producto')
+    ProductoPrecio = apps.get_model('infrastructure', 'ProductoPrecio')
+    filas = []
+    for codigo, precios in Producto.objects.values_list('codigo', 'precios').iterator(chunk_size=2000):
+        if not hasattr(precios, 'items'):
+            continue
+        for moneda, valor in precios.items():
+            try:
+                valor = Decimal(str(valor))
+            except (InvalidOperation, ValueError):
+                continue
+            if valor.is_finite() and abs(valor) < Decimal(10) ** 18:
+                filas.append(ProductoPrecio(producto_id=codigo, moneda=str(moneda).upper(), valor=valor))
+        if len(filas) >= 2000:
+            ProductoPrecio.objects.bulk_create(filas)
+            filas = []
+    ProductoPrecio.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0004_merkle_tree'),
+        ('shared_domain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('moneda', models.CharField(max_length=10)),
+                ('valor', models.DecimalField(decimal_places=6, max_digits=24)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precios_indexados', to='shared_domain.producto')),
+            ],
+            options={
+                'db_table': 'producto_precio',
+                'indexes': [models.Index(fields=['moneda', 'valor', 'producto'], name='producto_precio_rango_idx')],
+                'constraints': [models.UniqueConstraint(fields=('producto', 'moneda'), name='producto_precio_unique_moneda')],
+            },
+        ),
+        migrations.RunPython(poblar_precios, migrations.RunPython.noop),
+    ]
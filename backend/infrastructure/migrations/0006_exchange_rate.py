@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0005_producto_precio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('moneda', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('tasa', models.DecimalField(decimal_places=10, max_digits=24)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'exchange_rate',
+                'ordering': ['moneda'],
+            },
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='currency',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:58
+
+import re
+import unicodedata
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Columna tsvector ponderada (título A, contenido B) e índices GIN; sólo en PostgreSQL
+SQL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE producto_busqueda ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish'::regconfig, titulo), 'A') ||
+        setweight(to_tsvector('spanish'::regconfig, contenido), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX producto_busqueda_vector_idx ON producto_busqueda USING GIN (vector)",
+    "CREATE INDEX producto_busqueda_titulo_trgm_idx ON producto_busqueda USING GIN (titulo gin_trgm_ops)",
+]
+SQL_POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS producto_busqueda_titulo_trgm_idx",
+    "DROP INDEX IF EXISTS producto_busqueda_vector_idx",
+    "ALTER TABLE producto_busqueda DROP COLUMN IF EXISTS vector",
+]
+
+
+def crear_indices_postgres(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in SQL_POSTGRES:
+            schema_editor.execute(sql)
+
+
+def eliminar_indices_postgres(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in SQL_POSTGRES_REVERSE:
+            schema_editor.execute(sql)
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.findall(r'[0-9a-z]+', texto.lower()))
+
+
+def poblar_busqueda(apps, schema_editor):
+    Producto = apps.get_model('shared_domain', 'Producto')
+    ProductoBusqueda = apps.get_model('infrastructure', 'ProductoBusqueda')
+    filas = []
+    for codigo, nombre, caracteristicas, nit, empresa in Producto.objects.values_list(
+        'codigo', 'nombre', 'caracteristicas', 'empresa_id', 'empresa__nombre'
+    ).iterator(chunk_size=2000):
+        filas.append(ProductoBusqueda(
+            producto_id=codigo,
+            titulo=_normalizar(f"{codigo} {nombre}"),
+            contenido=_normalizar(f"{caracteristicas} {nit or ''} {empresa or ''}"),
+        ))
+        if len(filas) >= 2000:
+            ProductoBusqueda.objects.bulk_create(filas)
+            filas = []
+    ProductoBusqueda.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0006_exchange_rate'),
+        ('shared_domain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoBusqueda',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='busqueda', serialize=False, to='shared_domain.producto')),
+                ('titulo', models.TextField()),
+                ('contenido', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'producto_busqueda',
+            },
+        ),
+        migrations.RunPython(crear_indices_postgres, eliminar_indices_postgres),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0008_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorycertification',
+            name='batch_index',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inventorycertification',
+            name='batch_proof',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='inventorycertification',
+            name='batch_root',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
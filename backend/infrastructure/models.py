@@ -0,0 +1 @@
+from .django_models.models import ReportJob, MerkleState, MerkleLeaf, MerkleNode, InventoryCertification, ProductoPrecio, ExchangeRate, ProductoBusqueda, EmailAttachment, OutboxEmail
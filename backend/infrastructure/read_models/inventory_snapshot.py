@@ -0,0 +1,73 @@
+import hashlib
+import json
+from shared_domain.models import Producto
+
+
+class ProductoRecord:
+    """Proyección compacta de un producto con el nombre de su empresa ya resuelto."""
+    __slots__ = ('codigo', 'nombre', 'precios', 'empresa_id', 'empresa_nombre')
+
+    def __init__(self, codigo, nombre, precios, empresa_id, empresa_nombre):
+        self.codigo = codigo
+        self.nombre = nombre
+        self.precios = precios
+        self.empresa_id = empresa_id
+        self.empresa_nombre = empresa_nombre
+
+    def as_tuple(self):
+        return (self.codigo, self.nombre, self.precios, self.empresa_id, self.empresa_nombre)
+
+
+class InventorySnapshot:
+    """
+    Lectura única del inventario compartida por IA, PDF y certificación.
+    Se carga con una sola consulta (JOIN con empresa) en lugar de una por producto.
+    """
+    __slots__ = ('productos',)
+
+    FIELDS = ('codigo', 'nombre', 'precios', 'empresa_id', 'empresa__nombre')
+    # Orden que deja juntos los productos de cada empresa (troceo del análisis de IA)
+    EMPRESA_ORDER = ('empresa__nombre', 'empresa_id', 'codigo')
+
+    def __init__(self, productos):
+        self.productos = productos
+
+    @staticmethod
+    def _values(queryset=None, fields=None, order_by=('codigo',)):
+        queryset = Producto.objects.all() if queryset is None else queryset
+        return queryset.order_by(*order_by).values_list(*(fields or InventorySnapshot.FIELDS))
+
+    @classmethod
+    def load(cls, queryset=None, limit=None):
+        rows = cls._values(queryset)
+        if limit is not None:
+            rows = rows[:limit]
+        return cls([ProductoRecord(*row) for row in rows])
+
+    @staticmethod
+    def iter_records(queryset=None, chunk_size=2000, order_by=('codigo',)):
+        # Recorrido con cursor de servidor para inventarios que no caben en memoria
+        for row in InventorySnapshot.iter_values(queryset=queryset, chunk_size=chunk_size, order_by=order_by):
+            yield ProductoRecord(*row)
+
+    @staticmethod
+    def iter_values(fields=None, queryset=None, chunk_size=2000, order_by=('codigo',)):
+        return InventorySnapshot._values(queryset, fields, order_by).iterator(chunk_size=chunk_size)
+
+    def __len__(self):
+        return len(self.productos)
+
+    def __iter__(self):
+        return iter(self.productos)
+
+    def __getitem__(self, index):
+        return self.productos[index]
+
+    def codigos(self):
+        return [p.codigo for p in self.productos]
+
+    def digest(self):
+        digest = hashlib.sha256()
+        for p in self.productos:
+            digest.update(json.dumps(p.as_tuple(), sort_keys=True, default=str).encode())
+        return digest.hexdigest()
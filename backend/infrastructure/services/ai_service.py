@@ -1,38 +1,273 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from itertools import chain, islice
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import google.generativeai as genai
 from django.conf import settings
+from django.core.cache import caches
+from infrastructure.services.instrumentation import instrumented
+from infrastructure.services.metrics import Metrics
 from shared_domain.exceptions import InfrastructureError
 
+AI_CACHE_ALIAS = 'ai_analysis'
+SAMPLE_SIZE = 30
+# Estimación aproximada para el presupuesto de tokens de cada bloque
+CHARS_PER_TOKEN = 4
+# Longitud de línea supuesta para fijar el tamaño medio de bloque. Es constante y no
+# depende de los datos, así que no desplaza los cortes cuando cambia el inventario
+LINE_CHARS_ESTIMATE = 80
+UNKNOWN_EMPRESA = 'Empresa Desconocida'
+
+ANALYST_ROLE = "Actúa como un analista de inventarios experto."
+
+
 class AIService:
+    _model = None
+    _model_lock = threading.Lock()
+    # Llamadas en curso dentro del proceso: clave del prompt -> Future compartido
+    _in_flight = {}
+    _in_flight_lock = threading.Lock()
+
     @staticmethod
-    def generate_inventory_analysis(productos):
-        print("AIService: Starting analysis...")
-        if not settings.GOOGLE_API_KEY:
-            print("AIService: Warning: GOOGLE_API_KEY is missing.")
-            return "Análisis no disponible: API Key faltante."
-        
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        
-        print(f"AIService: Processing {len(productos)} products...")
+    def model():
+        # El cliente de Gemini se configura una sola vez por proceso
+        with AIService._model_lock:
+            if AIService._model is None:
+                genai.configure(api_key=settings.GOOGLE_API_KEY)
+                AIService._model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            return AIService._model
+
+    @staticmethod
+    def _line(p):
+        return f"- {p.nombre} ({p.codigo}) de {p.empresa_nombre or UNKNOWN_EMPRESA}: {p.precios}"
+
+    @staticmethod
+    def build_prompt(productos):
         try:
-            inventory_text = "\n".join([
-                f"- {p.nombre} ({p.codigo}) de {p.empresa.nombre if p.empresa else 'Empresa Desconocida'}: {p.precios}" 
-                for p in productos[:30]
-            ])
+            inventory_text = "\n".join([AIService._line(p) for p in islice(productos, SAMPLE_SIZE)])
         except Exception as e:
             print(f"AIService: Error formatting inventory text: {str(e)}")
             raise InfrastructureError(f"Error formateando datos para IA: {str(e)}")
-        
-        prompt = (
-            f"Actúa como un analista de inventarios experto. Analiza la siguiente lista de productos y genera un reporte ejecutivo breve.\n\n"
+        return AIService._report_prompt(inventory_text)
+
+    @staticmethod
+    def _report_prompt(inventory_text):
+        return (
+            f"{ANALYST_ROLE} Analiza la siguiente lista de productos y genera un reporte ejecutivo breve.\n\n"
             f"Datos del inventario:\n{inventory_text}"
         )
-            
+
+    @staticmethod
+    def input_limit():
+        # Número de productos que necesita el análisis (None = todo el inventario)
+        return SAMPLE_SIZE if settings.AI_ANALYSIS_MODE == 'sample' else None
+
+    @staticmethod
+    def _pack(items, max_chars, min_items=1):
+        # Agrupa textos consecutivos sin superar max_chars por bloque (salvo elementos que ya lo superan)
+        groups, current, size = [], [], 0
+        for item in items:
+            if len(current) >= min_items and size + len(item) + 1 > max_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += len(item) + 1
+        if current:
+            groups.append(current)
+        return groups
+
+    @staticmethod
+    def _is_anchor(codigo, average_items):
+        # Corte definido por el contenido: depende sólo del código, no de la posición del producto
+        digest = hashlib.blake2b(codigo.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % average_items == 0
+
+    @staticmethod
+    def iter_chunks(productos, max_chars):
+        """
+        Trocea productos ya ordenados por empresa en bloques de texto de como
+        mucho max_chars. Un bloque termina antes de un producto "ancla" (según
+        el hash de su código) o al llenarse. Como los cortes dependen del código
+        y no de la posición, insertar o borrar un producto sólo cambia su propio
+        bloque y las entradas de caché de IA de los demás bloques siguen valiendo.
+        """
+        average_items = max(1, max_chars // (2 * LINE_CHARS_ESTIMATE))
+        current, size = [], 0
+        try:
+            for p in productos:
+                line = AIService._line(p)
+                if current and (AIService._is_anchor(p.codigo, average_items) or size + len(line) + 1 > max_chars):
+                    yield "\n".join(current)
+                    current, size = [], 0
+                current.append(line)
+                size += len(line) + 1
+        except Exception as e:
+            print(f"AIService: Error formatting inventory text: {str(e)}")
+            raise InfrastructureError(f"Error formateando datos para IA: {str(e)}")
+        if current:
+            yield "\n".join(current)
+
+    @staticmethod
+    def build_chunks(productos, max_chars):
+        # Los productos de una misma empresa van juntos; las empresas grandes se reparten en varios bloques
+        ordenados = sorted(productos, key=lambda p: (p.empresa_nombre or UNKNOWN_EMPRESA, p.empresa_id or '', p.codigo))
+        return list(AIService.iter_chunks(ordenados, max_chars))
+
+    @staticmethod
+    def cache_key(prompt):
+        digest = hashlib.sha256(f"{settings.GEMINI_MODEL}\n{prompt}".encode('utf-8')).hexdigest()
+        return f"ai_analysis:{digest}"
+
+    @staticmethod
+    @instrumented('ai')
+    def generate_inventory_analysis(productos, grouped=False):
+        """
+        `productos`: lista de ProductoRecord o, con grouped=True, un iterable ya
+        ordenado por empresa (p. ej. un cursor de InventorySnapshot) que se
+        trocea a medida que se lee, sin cargar el inventario en memoria.
+        """
+        print("AIService: Starting analysis...")
+        if not settings.GOOGLE_API_KEY:
+            print("AIService: Warning: GOOGLE_API_KEY is missing.")
+            return "Análisis no disponible: API Key faltante."
+
+        if settings.AI_ANALYSIS_MODE == 'sample':
+            print("AIService: Processing inventory sample...")
+            return AIService.complete(AIService.build_prompt(productos))
+
+        max_chars = settings.AI_CHUNK_TOKENS * CHARS_PER_TOKEN
+        if grouped:
+            chunks = AIService.iter_chunks(productos, max_chars)
+        else:
+            chunks = iter(AIService.build_chunks(productos, max_chars))
+        # Se leen bloques hasta superar el presupuesto: si el inventario cabe entero, un solo prompt
+        head, size = [], 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk) + 1
+            if size > max_chars:
+                break
+        else:
+            print("AIService: Processing inventory in a single prompt...")
+            return AIService.complete(AIService._report_prompt("\n".join(head)))
+        return AIService._map_reduce(chain(head, chunks), max_chars)
+
+    @staticmethod
+    def _map_reduce(chunks, max_chars):
+        with ThreadPoolExecutor(max_workers=settings.AI_MAP_WORKERS, thread_name_prefix='ai-map') as pool:
+            # Como mucho 2 bloques por hilo en vuelo: el iterador de bloques no se adelanta a Gemini
+            futures, in_flight = [], deque()
+            for chunk in chunks:
+                future = pool.submit(
+                    AIService.complete,
+                    f"{ANALYST_ROLE} Resume en pocas líneas los hallazgos clave (precios, concentración, "
+                    f"anomalías) de este segmento del inventario.\n\nDatos del segmento:\n{chunk}",
+                )
+                futures.append(future)
+                in_flight.append(future)
+                if len(in_flight) >= 2 * settings.AI_MAP_WORKERS:
+                    in_flight.popleft().result()
+            print(f"AIService: Processing inventory in {len(futures)} chunk(s)...")
+            summaries = [future.result() for future in futures]
+
+            # Si los resúmenes no caben en un solo prompt se consolidan por niveles
+            while True:
+                groups = AIService._pack(summaries, max_chars, min_items=2)
+                if len(groups) == 1:
+                    break
+                summaries = list(pool.map(
+                    lambda group: AIService.complete(
+                        f"{ANALYST_ROLE} Consolida los siguientes resúmenes parciales del inventario "
+                        f"en un único resumen breve.\n\n" + "\n\n".join(group)
+                    ),
+                    groups,
+                ))
+
+        return AIService.complete(
+            f"{ANALYST_ROLE} A partir de los siguientes resúmenes parciales, que cubren todo el inventario, "
+            f"genera un reporte ejecutivo breve.\n\nResúmenes:\n" + "\n\n".join(groups[0])
+        )
+
+    @staticmethod
+    def complete(prompt):
+        if not settings.AI_CACHE_ENABLED:
+            return AIService.generate(prompt)
+        return AIService._single_flight(prompt)
+
+    @staticmethod
+    def generate(prompt):
         try:
             print("AIService: Requesting Gemini content generation...")
-            response = model.generate_content(prompt)
+            with Metrics.call('gemini', 'generate_content'):
+                response = AIService.model().generate_content(prompt)
             print("AIService: Gemini response received.")
             return response.text
         except Exception as e:
             print(f"AIService: Gemini Error: {str(e)}")
             raise InfrastructureError(f"Error en el servicio de IA: {str(e)}")
+
+    @staticmethod
+    def _single_flight(prompt):
+        key = AIService.cache_key(prompt)
+        cache = caches[AI_CACHE_ALIAS]
+        cached = cache.get(key)
+        Metrics.cache(AI_CACHE_ALIAS, cached is not None)
+        if cached is not None:
+            print("AIService: Cache hit.")
+            return cached
+
+        with AIService._in_flight_lock:
+            future = AIService._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                AIService._in_flight[key] = future
+
+        if not leader:
+            # Otro hilo ya está consultando a Gemini con el mismo prompt: se espera su resultado
+            try:
+                return future.result(timeout=settings.AI_SINGLE_FLIGHT_TIMEOUT)
+            except FutureTimeoutError:
+                raise InfrastructureError("Tiempo de espera agotado aguardando el análisis de IA.")
+
+        try:
+            result = AIService._generate_with_lease(cache, key, prompt)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with AIService._in_flight_lock:
+                AIService._in_flight.pop(key, None)
+
+    @staticmethod
+    def _generate_with_lease(cache, key, prompt):
+        # Entre procesos la coordinación se hace con un lease atómico (cache.add) en la caché compartida
+        lease_key = f"{key}:lease"
+        timeout = settings.AI_SINGLE_FLIGHT_TIMEOUT
+        deadline = time.monotonic() + timeout
+        owns_lease = cache.add(lease_key, 1, timeout=timeout)
+        while not owns_lease:
+            time.sleep(0.2)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            if time.monotonic() >= deadline:
+                # El titular del lease no terminó a tiempo: se genera sin él
+                break
+            owns_lease = cache.add(lease_key, 1, timeout=timeout)
+
+        try:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            result = AIService.generate(prompt)
+            cache.set(key, result, settings.AI_CACHE_TTL)
+            return result
+        finally:
+            if owns_lease:
+                cache.delete(lease_key)
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from solana.rpc.async_api import AsyncClient
+from solders.instruction import Instruction
+from solders.message import Message
+from solders.signature import Signature
+from solders.transaction import Transaction
+from solders.transaction_status import TransactionConfirmationStatus
+from infrastructure.models import InventoryCertification
+from infrastructure.services.instrumentation import instrumented
+from infrastructure.services.metrics import Metrics
+from infrastructure.services.report_queue import BackgroundWorkerPool
+from infrastructure.services.solana_gateway import MEMO_PROGRAM_ID, SolanaGateway
+from shared_domain.exceptions import InfrastructureError
+
+# get_signature_statuses admite hasta 256 firmas por llamada
+MAX_SIGNATURES_PER_CALL = 256
+
+
+class AsyncBlockchainService:
+    """
+    Variante asíncrona de BlockchainService: envía la transacción sin esperar
+    confirmación y delega el seguimiento en SignatureStatusPoller. El keypair y
+    el blockhash en caché son los de SolanaGateway; con SOLANA_BATCH_WINDOW_MS
+    el hash se certifica a través del mismo CertificationBatcher que la vía síncrona.
+    """
+    # loop -> (AsyncClient, tarea que lo cierra al apagarse el loop)
+    _clients = {}
+
+    @staticmethod
+    def client():
+        # El AsyncClient queda ligado a su event loop: uno por loop
+        loop = asyncio.get_running_loop()
+        entry = AsyncBlockchainService._clients.get(loop)
+        if entry is None:
+            for stale in [l for l in AsyncBlockchainService._clients if l.is_closed()]:
+                del AsyncBlockchainService._clients[stale]
+            client = AsyncClient(settings.SOLANA_RPC_URL, timeout=settings.SOLANA_RPC_TIMEOUT)
+            entry = (client, loop.create_task(AsyncBlockchainService._close_on_shutdown(client)))
+            AsyncBlockchainService._clients[loop] = entry
+        return entry[0]
+
+    @staticmethod
+    async def _close_on_shutdown(client):
+        # asyncio.run (y async_to_sync bajo WSGI, que crea un loop por llamada) cancela
+        # las tareas pendientes antes de cerrar el loop: el cliente se cierra con él
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.close()
+
+    @staticmethod
+    @instrumented('blockchain')
+    async def certify_data(data_string, client=None, gateway=None):
+        data_hash = hashlib.sha256(data_string.encode()).hexdigest()
+
+        if not settings.SOLANA_PRIVATE_KEY:
+            return {
+                "txHash": f"dummy_{data_hash[:10]}",
+                "pdf_hash": data_hash,
+                "status": "DUMMY_SUCCESS"
+            }
+
+        if settings.SOLANA_BATCH_WINDOW_MS > 0:
+            result = await AsyncBlockchainService._certify_batched(data_hash)
+            # El lote se envía sin esperar confirmación: el poller la sigue como al resto
+            return {**result, "status": "PENDING"}
+
+        client = client or AsyncBlockchainService.client()
+        gateway = gateway or SolanaGateway.instance()
+        memo_instruction = Instruction(MEMO_PROGRAM_ID, data_hash.encode('utf-8'), [])
+        # Blockhash de la caché del gateway: sólo hay round-trip si caducó (se consulta fuera del loop)
+        recent_blockhash = sync_to_async(gateway.recent_blockhash, thread_sensitive=False)
+
+        for attempt in range(2):
+            blockhash = await recent_blockhash()
+            message = Message.new_with_blockhash([memo_instruction], gateway.keypair.pubkey(), blockhash)
+            txn = Transaction([gateway.keypair], message, blockhash)
+            try:
+                with Metrics.call('solana', 'send_transaction'):
+                    response = await client.send_transaction(txn)
+                break
+            except Exception as e:
+                if attempt == 0 and 'blockhash' in str(e).lower():
+                    # Blockhash caducado: se descarta el de la caché y se reintenta una vez
+                    gateway.invalidate_blockhash()
+                    continue
+                raise InfrastructureError(f"Error al enviar la transacción a Solana: {str(e)}")
+
+        return {
+            "status": "PENDING",
+            "txHash": str(response.value),
+            "pdf_hash": data_hash
+        }
+
+    @staticmethod
+    async def _certify_batched(data_hash):
+        from infrastructure.services.certification_batcher import CertificationBatcher
+        timeout = settings.SOLANA_BATCH_TIMEOUT
+        future = CertificationBatcher.instance().submit(data_hash)
+        try:
+            # Al vencer el plazo wait_for cancela también el Future del lote: el hash se retira si aún no salió
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise InfrastructureError(f"La certificación en Solana no respondió en {timeout} segundos.")
+
+
+class SignatureStatusPoller:
+    """
+    Seguimiento en segundo plano de las certificaciones enviadas sin esperar
+    confirmación. Las firmas pendientes se leen de inventory_certification
+    (PENDING o CONFIRMED), no de memoria: tras un reinicio, o si el loop de la
+    petición ya no existe (async_to_sync bajo WSGI), cualquier proceso que
+    arranque el poller las retoma. Una única llamada get_signature_statuses por
+    ciclo y bloque de firmas, con el cliente síncrono de SolanaGateway.
+    """
+    _pool = None
+    _lock = threading.Lock()
+
+    def __init__(self, client, interval, max_age):
+        self.client = client
+        self.interval = interval
+        # Una firma sin confirmar pasado este tiempo (segundos) se marca EXPIRED
+        self.max_age = max_age
+        self._last_poll = None
+
+    @classmethod
+    def build(cls):
+        return cls(
+            SolanaGateway.instance().client,
+            settings.SOLANA_STATUS_POLL_INTERVAL,
+            settings.SOLANA_STATUS_POLL_INTERVAL * settings.SOLANA_STATUS_MAX_POLLS,
+        )
+
+    @classmethod
+    def build_pool(cls):
+        poller = cls.build()
+        return BackgroundWorkerPool(
+            name='signature-poller',
+            claim=poller.claim,
+            process=poller.poll,
+            size=1,
+            poll_interval=poller.interval,
+        )
+
+    @classmethod
+    def start(cls):
+        # Idempotente: arranca el hilo de seguimiento del proceso una sola vez
+        if not settings.SOLANA_STATUS_POLLER_AUTOSTART:
+            return None
+        with cls._lock:
+            if cls._pool is None or not cls._pool.running:
+                cls._pool = cls.build_pool()
+                cls._pool.start()
+        return cls._pool
+
+    def pending(self):
+        # (tx_hash, estado guardado, fecha de envío) de las firmas aún en seguimiento.
+        # Una firma CONFIRMED que no llega a FINALIZED en max_age deja de consultarse
+        cutoff = timezone.now() - timedelta(seconds=self.max_age)
+        return list(
+            InventoryCertification.objects
+            .filter(Q(status="PENDING") | Q(status="CONFIRMED", created_at__gte=cutoff))
+            .order_by('created_at')
+            .values_list('tx_hash', 'status', 'created_at')
+        )
+
+    def claim(self):
+        # Un ciclo cada `interval` segundos; entre ciclos el pool espera
+        if self._last_poll is not None and time.monotonic() - self._last_poll < self.interval:
+            return None
+        self._last_poll = time.monotonic()
+        return self.pending() or None
+
+    @staticmethod
+    def _status_for(status):
+        if status is None:
+            return None
+        if status.err is not None:
+            return "FAILED"
+        if status.confirmation_status == TransactionConfirmationStatus.Finalized:
+            return "FINALIZED"
+        if status.confirmation_status == TransactionConfirmationStatus.Confirmed:
+            return "CONFIRMED"
+        return None
+
+    def poll(self, rows=None):
+        rows = self.pending() if rows is None else rows
+        cutoff = timezone.now() - timedelta(seconds=self.max_age)
+        updates = {}
+        for start in range(0, len(rows), MAX_SIGNATURES_PER_CALL):
+            batch = rows[start:start + MAX_SIGNATURES_PER_CALL]
+            with Metrics.call('solana', 'get_signature_statuses'):
+                response = self.client.get_signature_statuses([Signature.from_string(row[0]) for row in batch])
+            for (tx_hash, current, created_at), status in zip(batch, response.value):
+                new_status = self._status_for(status)
+                if new_status is None and current == "PENDING" and created_at < cutoff:
+                    new_status = "EXPIRED"
+                if new_status is not None and new_status != current:
+                    updates[tx_hash] = new_status
+
+        for tx_hash, status in updates.items():
+            InventoryCertification.objects.filter(tx_hash=tx_hash).update(status=status)
+        return updates
@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from infrastructure.services import merkle
+from shared_domain.exceptions import InfrastructureError
+
+
+class CertificationBatcher:
+    """
+    Agrupa los hashes que llegan dentro de una ventana de tiempo y los certifica
+    con una única transacción Memo. Si el lote tiene varios hashes, el memo es la
+    raíz de Merkle del lote y cada llamante recibe su posición y su prueba.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, sender, window_seconds, max_batch_size):
+        self.sender = sender
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                from infrastructure.services.blockchain_service import BlockchainService
+                cls._instance = cls(
+                    sender=BlockchainService.send_memo,
+                    window_seconds=settings.SOLANA_BATCH_WINDOW_MS / 1000,
+                    max_batch_size=settings.SOLANA_BATCH_MAX_SIZE,
+                )
+            return cls._instance
+
+    def submit(self, data_hash):
+        future = Future()
+        with self._cond:
+            self._pending.append((data_hash, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='certification-batcher', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def certify(self, data_hash, timeout=None):
+        timeout = settings.SOLANA_BATCH_TIMEOUT if timeout is None else timeout
+        future = self.submit(data_hash)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Si el lote aún no ha salido, el hash se retira de él
+            future.cancel()
+            raise InfrastructureError(f"La certificación en Solana no respondió en {timeout} segundos.")
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # Se espera el resto de la ventana o hasta llenar el lote
+            deadline = time.monotonic() + self.window_seconds
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self.flush(batch)
+            except Exception as e:
+                # Un fallo inesperado afecta sólo a este lote: el hilo sigue atendiendo los siguientes
+                print(f"CertificationBatcher: Unexpected error flushing batch: {str(e)}")
+                error = InfrastructureError(f"Error certificando el lote: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def flush(self, batch):
+        # Descarta los llamantes que ya desistieron (timeout) y marca el resto como en curso
+        batch = [(data_hash, future) for data_hash, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        hashes = [data_hash for data_hash, _ in batch]
+        if len(hashes) == 1:
+            levels = None
+            memo = hashes[0]
+        else:
+            levels = merkle.build_levels([merkle.hash_leaf(h) for h in hashes])
+            memo = levels[-1][0]
+
+        try:
+            tx_hash = self.sender(memo)
+        except Exception as e:
+            error = e if isinstance(e, InfrastructureError) else InfrastructureError(str(e))
+            for _, future in batch:
+                future.set_exception(error)
+            return
+
+        for index, (data_hash, future) in enumerate(batch):
+            result = {"status": "SUCCESS", "txHash": tx_hash, "pdf_hash": data_hash}
+            if levels is not None:
+                result["batch"] = {
+                    "root": memo,
+                    "index": index,
+                    "size": len(batch),
+                    "proof": merkle.proof_from_levels(levels, index),
+                }
+            future.set_result(result)
@@ -0,0 +1,140 @@
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from infrastructure.models import ExchangeRate, ProductoPrecio
+from shared_domain.exceptions import BusinessRuleError
+
+
+class ExchangeRateService:
+    """
+    Tabla de tasas de cambio cacheada en memoria del proceso. La versión sale
+    de la propia tabla (número de filas y último `updated_at`) y se consulta
+    como mucho cada EXCHANGE_RATES_CHECK_SECONDS, así que todos los workers
+    ven los cambios sin depender de una caché compartida y convertir no
+    cuesta consultas entre comprobaciones.
+    """
+    _rates = None
+    _version = None
+    _checked_at = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def base_currency():
+        return settings.EXCHANGE_BASE_CURRENCY.upper()
+
+    @staticmethod
+    def _db_version():
+        resumen = ExchangeRate.objects.aggregate(total=Count('moneda'), ultima=Max('updated_at'))
+        ultima = resumen['ultima'].isoformat() if resumen['ultima'] else '-'
+        return f"{resumen['total']}:{ultima}"
+
+    @staticmethod
+    def _refresh():
+        # Llamar con el lock tomado
+        ahora = time.monotonic()
+        vigente = ExchangeRateService._checked_at is not None and ahora - ExchangeRateService._checked_at < settings.EXCHANGE_RATES_CHECK_SECONDS
+        if vigente and ExchangeRateService._rates is not None:
+            return
+        version = ExchangeRateService._db_version()
+        if ExchangeRateService._rates is None or ExchangeRateService._version != version:
+            rates = {moneda: float(tasa) for moneda, tasa in ExchangeRate.objects.values_list('moneda', 'tasa')}
+            rates[ExchangeRateService.base_currency()] = 1.0
+            ExchangeRateService._rates = rates
+            ExchangeRateService._version = version
+        ExchangeRateService._checked_at = ahora
+
+    @staticmethod
+    def rates():
+        with ExchangeRateService._lock:
+            ExchangeRateService._refresh()
+            return ExchangeRateService._rates
+
+    @staticmethod
+    def version():
+        with ExchangeRateService._lock:
+            ExchangeRateService._refresh()
+            return ExchangeRateService._version
+
+    @staticmethod
+    def invalidate():
+        # Sólo afecta a este proceso; el resto lo detecta en su siguiente comprobación
+        with ExchangeRateService._lock:
+            ExchangeRateService._rates = None
+            ExchangeRateService._checked_at = None
+
+    @staticmethod
+    def normalize(currency):
+        # None/'' = sin conversión; una moneda sin tasa registrada es un error de negocio
+        if not currency:
+            return None
+        currency = currency.upper()
+        if currency not in ExchangeRateService.rates():
+            raise BusinessRuleError(f"No hay tasa de cambio registrada para {currency}.")
+        return currency
+
+    @staticmethod
+    def convert_flat(codigos, monedas, valores, target):
+        """
+        Conversión vectorizada de filas (codigo, moneda, valor). Por producto se
+        usa el precio nativo en `target` si existe; si no, el de la moneda base;
+        si no, cualquier otra moneda con tasa conocida.
+        Devuelve {codigo: (valor_convertido, moneda_origen)}.
+        """
+        if not target:
+            raise BusinessRuleError("La moneda de destino es obligatoria.")
+        target = ExchangeRateService.normalize(target)
+        rates = ExchangeRateService.rates()
+        if len(valores) == 0:
+            return {}
+
+        codigos = np.asarray(codigos, dtype=object)
+        valores = np.asarray(valores, dtype=np.float64)
+        monedas_unicas, moneda_idx = np.unique(np.asarray(monedas, dtype=str), return_inverse=True)
+        tasas = np.array([rates.get(m, np.nan) for m in monedas_unicas])[moneda_idx]
+
+        es_target = monedas_unicas[moneda_idx] == target
+        prioridad = np.where(es_target, 0, np.where(monedas_unicas[moneda_idx] == ExchangeRateService.base_currency(), 1, 2))
+        convertidos = np.where(es_target, valores, valores * tasas / rates[target])
+
+        candidatos = np.flatnonzero(~np.isnan(tasas) & ~np.isnan(valores))
+        if len(candidatos) == 0:
+            return {}
+        _, producto_idx = np.unique(codigos[candidatos], return_inverse=True)
+        # Orden por (producto, prioridad): el primero de cada producto es la mejor fuente
+        llave = np.lexsort((prioridad[candidatos], producto_idx))
+        orden, productos_ordenados = candidatos[llave], producto_idx[llave]
+        elegidos = orden[np.r_[True, productos_ordenados[1:] != productos_ordenados[:-1]]]
+
+        valores_redondeados = np.round(convertidos[elegidos], settings.EXCHANGE_DECIMALS).tolist()
+        origenes = monedas_unicas[moneda_idx[elegidos]].tolist()
+        return dict(zip(codigos[elegidos].tolist(), zip(valores_redondeados, origenes)))
+
+    @staticmethod
+    def convert_precios(productos, target):
+        # productos: iterable de (codigo, precios) con el JSON de precios ya cargado
+        codigos, monedas, valores = [], [], []
+        for codigo, precios in productos:
+            if not hasattr(precios, 'items'):
+                continue
+            for moneda, valor in precios.items():
+                try:
+                    valor = float(valor)
+                except (TypeError, ValueError):
+                    continue
+                codigos.append(codigo)
+                monedas.append(str(moneda).upper())
+                valores.append(valor)
+        return ExchangeRateService.convert_flat(codigos, monedas, valores, target)
+
+    @staticmethod
+    def convert_queryset(queryset, target):
+        # Catálogo completo o filtrado: una consulta sobre la tabla indexada de precios
+        rows = ProductoPrecio.objects.filter(producto__in=queryset.values('codigo')).values_list('producto_id', 'moneda', 'valor')
+        codigos, monedas, valores = [], [], []
+        for codigo, moneda, valor in rows.iterator(chunk_size=10000):
+            codigos.append(codigo)
+            monedas.append(moneda)
+            valores.append(valor)
+        return ExchangeRateService.convert_flat(codigos, monedas, valores, target)
@@ -0,0 +1,225 @@
+import random
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from infrastructure.models import EmailAttachment, OutboxEmail
+from infrastructure.services.report_artifact import ReportArtifact
+from infrastructure.services.report_queue import BackgroundWorkerPool
+from shared_domain.exceptions import BusinessRuleError
+
+
+class EmailOutbox:
+    """
+    Bandeja de salida persistida en `email_outbox`: la petición HTTP sólo
+    inserta las filas y un pool de workers las envía con reintentos
+    (backoff exponencial con jitter). Tras EMAIL_MAX_ATTEMPTS, o ante un
+    rechazo definitivo del proveedor, el mensaje queda en DEAD.
+    """
+    _pool = None
+    _provider = None
+    _lock = threading.Lock()
+    # sha256 -> [filename, content, mensajes en curso]: sólo los adjuntos del envío masivo en curso
+    _attachments = {}
+
+    @staticmethod
+    def provider():
+        with EmailOutbox._lock:
+            if EmailOutbox._provider is None:
+                EmailOutbox._provider = import_string(settings.EMAIL_PROVIDER)()
+            return EmailOutbox._provider
+
+    @staticmethod
+    def reset_provider():
+        with EmailOutbox._lock:
+            EmailOutbox._provider = None
+
+    @staticmethod
+    def recipients(value):
+        # Acepta una lista o una cadena separada por comas; sin duplicados y en orden
+        if isinstance(value, str):
+            value = value.split(',')
+        recipients = list(dict.fromkeys(str(r).strip() for r in (value or []) if str(r).strip()))
+        if not recipients:
+            raise BusinessRuleError("El email es requerido.")
+        for recipient in recipients:
+            try:
+                validate_email(recipient)
+            except ValidationError:
+                raise BusinessRuleError(f"El email '{recipient}' no es válido.")
+        return recipients
+
+    @staticmethod
+    def attachment(filename, content):
+        # content: un ReportArtifact o bytes; el hash se calcula por bloques
+        artifact = content if isinstance(content, ReportArtifact) else ReportArtifact.from_bytes(content)
+        sha256 = artifact.sha256()
+        existing = EmailAttachment.objects.filter(pk=sha256).only('sha256').first()
+        if existing is not None:
+            return existing
+        attachment, _ = EmailAttachment.objects.get_or_create(
+            sha256=sha256, defaults={"filename": filename, "content": artifact.read()}
+        )
+        return attachment
+
+    @staticmethod
+    def enqueue(recipients, subject, html, attachment=None):
+        recipients = EmailOutbox.recipients(recipients)
+        # Una configuración inválida se informa al encolar, no en el worker
+        EmailOutbox.provider().check_configured()
+        with transaction.atomic():
+            adjunto = EmailOutbox.attachment(*attachment) if attachment else None
+            mensajes = OutboxEmail.objects.bulk_create([
+                OutboxEmail(to=recipient, subject=subject, html=html, attachment=adjunto) for recipient in recipients
+            ])
+        if EmailOutbox._pool is not None:
+            EmailOutbox._pool.wake()
+        return mensajes
+
+    @staticmethod
+    def payload(message):
+        # Con adjunto, quien construye el payload debe llamar después a release_attachment(message)
+        payload = {
+            "from": settings.EMAIL_FROM,
+            "to": [message.to],
+            "subject": message.subject,
+            "html": message.html,
+        }
+        if message.attachment_id:
+            filename, content = EmailOutbox._acquire_attachment(message.attachment_id)
+            # El proveedor lo codifica en base64 por bloques al enviarlo
+            payload["attachments"] = [{"content": ReportArtifact.from_bytes(content), "filename": filename}]
+        return payload
+
+    @staticmethod
+    def _acquire_attachment(sha256):
+        # Los adjuntos son inmutables (direccionados por contenido): los mensajes de un mismo envío
+        # masivo comparten el PDF leído una vez, mientras dure ese envío
+        with EmailOutbox._lock:
+            entry = EmailOutbox._attachments.get(sha256)
+            if entry is not None:
+                entry[2] += 1
+                return entry[0], entry[1]
+        filename, content = EmailAttachment.objects.filter(pk=sha256).values_list('filename', 'content').get()
+        with EmailOutbox._lock:
+            # Otro adjunto: el envío anterior terminó en este proceso y los que nadie usa se sueltan
+            EmailOutbox._drop_idle_attachments(keep=sha256)
+            entry = EmailOutbox._attachments.setdefault(sha256, [filename, bytes(content), 0])
+            entry[2] += 1
+            return entry[0], entry[1]
+
+    @staticmethod
+    def release_attachment(message):
+        if not message.attachment_id:
+            return
+        with EmailOutbox._lock:
+            entry = EmailOutbox._attachments.get(message.attachment_id)
+            if entry is not None:
+                entry[2] -= 1
+
+    @staticmethod
+    def _drop_idle_attachments(keep=None):
+        # Llamar con el lock tomado
+        for sha256 in [sha for sha, entry in EmailOutbox._attachments.items() if entry[2] <= 0 and sha != keep]:
+            del EmailOutbox._attachments[sha256]
+
+    @staticmethod
+    def claim_next():
+        with transaction.atomic():
+            candidates = OutboxEmail.objects.filter(
+                status=OutboxEmail.Status.PENDING, next_attempt_at__lte=timezone.now()
+            ).order_by('next_attempt_at')
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            message = candidates.first()
+            if message is None:
+                # Cola vacía: ningún envío masivo en curso necesita ya su adjunto
+                with EmailOutbox._lock:
+                    EmailOutbox._drop_idle_attachments()
+                return None
+            claimed = OutboxEmail.objects.filter(pk=message.pk, status=OutboxEmail.Status.PENDING).update(
+                status=OutboxEmail.Status.SENDING,
+                started_at=timezone.now(),
+                attempts=message.attempts + 1,
+            )
+        if not claimed:
+            return None
+        return OutboxEmail.objects.get(pk=message.pk)
+
+    @staticmethod
+    def backoff(attempts):
+        delay = min(settings.EMAIL_RETRY_MAX_DELAY, settings.EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+        # Jitter: los reintentos de un mismo corte no vuelven a llegar todos a la vez
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    @staticmethod
+    def process(message):
+        try:
+            payload = EmailOutbox.payload(message)
+            try:
+                provider_id = EmailOutbox.provider().send(payload, idempotency_key=str(message.id))
+            finally:
+                EmailOutbox.release_attachment(message)
+        except Exception as e:
+            print(f"EmailOutbox: Email {message.id} to {message.to} failed (attempt {message.attempts}): {str(e)}")
+            message.last_error = str(e)
+            if getattr(e, 'permanent', False) or message.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                message.status = OutboxEmail.Status.DEAD
+            else:
+                message.status = OutboxEmail.Status.PENDING
+                message.next_attempt_at = timezone.now() + EmailOutbox.backoff(message.attempts)
+        else:
+            message.status = OutboxEmail.Status.SENT
+            message.provider_id = provider_id or ''
+            message.sent_at = timezone.now()
+            message.last_error = ''
+        message.save(update_fields=['status', 'last_error', 'next_attempt_at', 'provider_id', 'sent_at'])
+        return message
+
+    @staticmethod
+    def requeue_stale():
+        limit = timezone.now() - timedelta(seconds=settings.EMAIL_SEND_TIMEOUT)
+        return OutboxEmail.objects.filter(
+            status=OutboxEmail.Status.SENDING, started_at__lt=limit
+        ).update(status=OutboxEmail.Status.PENDING, started_at=None)
+
+    @staticmethod
+    def retry_dead():
+        return OutboxEmail.objects.filter(status=OutboxEmail.Status.DEAD).update(
+            status=OutboxEmail.Status.PENDING, attempts=0, next_attempt_at=timezone.now(), last_error=''
+        )
+
+    @staticmethod
+    def build_pool(size=None):
+        return BackgroundWorkerPool(
+            name='email-worker',
+            claim=EmailOutbox.claim_next,
+            process=EmailOutbox.process,
+            size=size or settings.EMAIL_WORKERS,
+            poll_interval=settings.EMAIL_POLL_INTERVAL,
+        )
+
+    @staticmethod
+    def start_workers():
+        # Idempotente: arranca el pool del proceso una sola vez
+        if not settings.EMAIL_WORKERS_AUTOSTART or settings.EMAIL_WORKERS < 1:
+            return None
+        with EmailOutbox._lock:
+            if EmailOutbox._pool is None or not EmailOutbox._pool.running:
+                EmailOutbox.requeue_stale()
+                EmailOutbox._pool = EmailOutbox.build_pool()
+                EmailOutbox._pool.start()
+        return EmailOutbox._pool
+
+    @staticmethod
+    def run_pending():
+        # Envía en el hilo actual todo lo que ya toca enviar (comando de gestión y tests)
+        pool = EmailOutbox.build_pool(size=1)
+        processed = 0
+        while pool.run_once():
+            processed += 1
+        return processed
@@ -1,33 +1,124 @@
-import base64
+import json
+import threading
+import time
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from shared_domain.exceptions import InfrastructureError
+from infrastructure.services.email_outbox import EmailOutbox
+from infrastructure.services.instrumentation import instrumented
+from infrastructure.services.metrics import Metrics
+from infrastructure.services.report_artifact import ReportArtifact
 
-class EmailService:
-    @staticmethod
-    def send_report_email(email, pdf_content, ai_analysis_preview):
-        api_key = getattr(settings, 'RESEND_API_KEY', None)
-        
-        if not api_key or 're_' not in api_key:
-             raise ValueError("RESEND_API_KEY inválida.")
 
+class EmailDeliveryError(Exception):
+    # permanent=True: el proveedor rechazó el mensaje y reintentar no cambiará el resultado
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class StreamingJSONBody:
+    """
+    Cuerpo JSON de un envío cuyos adjuntos (ReportArtifact) se codifican en
+    base64 bloque a bloque mientras se transmite, sin construir nunca la
+    cadena completa. Expone __len__ para que requests envíe Content-Length
+    en lugar de Transfer-Encoding: chunked.
+    """
+
+    def __init__(self, payload):
+        self.parts = []
+        artifacts = {}
+        template = dict(payload)
+        if payload.get("attachments"):
+            template["attachments"] = []
+            for adjunto in payload["attachments"]:
+                marker = uuid.uuid4().hex
+                artifacts[marker] = adjunto["content"]
+                template["attachments"].append({**adjunto, "content": marker})
+        # El base64 no necesita escape en JSON: se sustituye cada marcador por su stream
+        texto = json.dumps(template).encode()
+        for marker, artifact in artifacts.items():
+            prefix, texto = texto.split(marker.encode(), 1)
+            self.parts += [prefix, artifact]
+        self.parts.append(texto)
+
+    def __len__(self):
+        return sum(part.base64_size if isinstance(part, ReportArtifact) else len(part) for part in self.parts)
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, ReportArtifact):
+                yield from part.iter_base64()
+            else:
+                yield part
+
+
+class ResendEmailProvider:
+    """Cliente de Resend con una sesión HTTP compartida (keep-alive) por proceso."""
+    URL = "https://api.resend.com/emails"
+
+    def __init__(self):
+        self.api_key = getattr(settings, 'RESEND_API_KEY', None)
+        self.timeout = settings.EMAIL_HTTP_TIMEOUT
+        self.session = requests.Session()
+        # Una conexión por worker de envío: la concurrencia la acota el pool de EmailOutbox
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=max(settings.EMAIL_WORKERS, 1)))
+        self.session.headers.update({"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"})
+
+    def check_configured(self):
+        if not self.api_key or 're_' not in self.api_key:
+            raise InfrastructureError("RESEND_API_KEY inválida.")
+
+    @instrumented('email')
+    @Metrics.timed('resend', 'send_email')
+    def send(self, payload, idempotency_key=None):
+        # La clave estable (id del mensaje en el outbox) evita duplicados si se reintenta un envío que Resend ya aceptó
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
         try:
-            url = "https://api.resend.com/emails"
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            attachment_b64 = base64.b64encode(pdf_content).decode('utf-8')
-
-            payload = {
-                "from": "StockPro <onboarding@resend.dev>",
-                "to": [email],
-                "subject": "Reporte Inteligente de Inventario - StockPro",
-                "html": f"<strong>Hola!</strong><br/><br/>Adjuntamos el reporte ejecutivo generado por nuestra IA.<br/><br/><i>Resumen:</i><br/>{ai_analysis_preview}...",
-                "attachments": [{"content": attachment_b64, "filename": "inventario_smart.pdf"}]
-            }
-
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Error Resend: {response.json()}")
-                
-            return response.json()
-        except Exception as e:
-            raise Exception(f"Error al enviar email: {str(e)}")
+            response = self.session.post(self.URL, data=StreamingJSONBody(payload), headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise EmailDeliveryError(f"Error de red con Resend: {str(e)}")
+
+        if response.status_code in (200, 201):
+            return response.json().get('id', '')
+        # 4xx es un rechazo definitivo salvo timeout, conflicto de idempotencia (petición en curso con la misma clave) o límite de tasa
+        permanent = 400 <= response.status_code < 500 and response.status_code not in (408, 409, 429)
+        raise EmailDeliveryError(f"Error Resend {response.status_code}: {response.text[:500]}", permanent=permanent)
+
+
+class LocalEmailProvider:
+    """Proveedor local para desarrollo y tests: guarda los payloads en memoria."""
+    sent = []
+    _lock = threading.Lock()
+
+    def check_configured(self):
+        return None
+
+    def send(self, payload, idempotency_key=None):
+        if settings.EMAIL_LOCAL_LATENCY:
+            time.sleep(settings.EMAIL_LOCAL_LATENCY)
+        with LocalEmailProvider._lock:
+            LocalEmailProvider.sent.append(payload)
+            return f"local-{len(LocalEmailProvider.sent)}"
+
+
+class EmailService:
+    REPORT_SUBJECT = "Reporte Inteligente de Inventario - StockPro"
+    REPORT_FILENAME = "inventario_smart.pdf"
+
+    @staticmethod
+    @instrumented('email')
+    def send_report_email(recipients, report, ai_analysis_preview):
+        # Encola un correo por destinatario; el PDF (ReportArtifact o bytes) se guarda una sola vez para todos
+        html = (
+            "<strong>Hola!</strong><br/><br/>Adjuntamos el reporte ejecutivo generado por nuestra IA."
+            f"<br/><br/><i>Resumen:</i><br/>{ai_analysis_preview}..."
+        )
+        mensajes = EmailOutbox.enqueue(
+            recipients, EmailService.REPORT_SUBJECT, html,
+            attachment=(EmailService.REPORT_FILENAME, report),
+        )
+        EmailOutbox.start_workers()
+        return mensajes
@@ -0,0 +1,147 @@
+import contextlib
+import functools
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Métricas de la petición en curso; None fuera de una petición instrumentada
+_current = ContextVar('request_metrics', default=None)
+# "IN (%s, %s, %s)" y "IN (%s)" son la misma sentencia a efectos de N+1
+PLACEHOLDERS_RE = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+class RequestMetrics:
+    """Consultas SQL y spans (IA, PDF, blockchain, email) de una petición."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            count, total = self.spans.get(name, (0, 0.0))
+            self.spans[name] = (count + 1, total + seconds)
+
+    def add_query(self, sql, seconds):
+        with self._lock:
+            self.queries += 1
+            self.query_time += seconds
+            self.statements[PLACEHOLDERS_RE.sub('%s', sql)] += 1
+
+    def repeated(self, threshold):
+        # Misma sentencia (con otros parámetros) ejecutada una y otra vez: el patrón N+1
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self):
+        metrics = [f'db;dur={self.query_time * 1000:.1f};desc="{self.queries} queries"']
+        for name, (count, total) in self.spans.items():
+            metrics.append(f'{name};dur={total * 1000:.1f}' + (f';desc="{count} calls"' if count > 1 else ''))
+        metrics.append(f'total;dur={self.elapsed * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            "duration_ms": round(self.elapsed * 1000, 2),
+            "db_queries": self.queries,
+            "db_ms": round(self.query_time * 1000, 2),
+            "spans": {name: {"count": count, "ms": round(total * 1000, 2)} for name, (count, total) in self.spans.items()},
+        }
+
+
+class Instrumentation:
+    """
+    Medición por petición con coste casi nulo fuera de ella: los spans y el
+    wrapper de consultas sólo consultan una ContextVar y, si no hay métricas
+    activas, llaman directamente a la función original. La ContextVar viaja
+    con sync_to_async, así que las consultas de vistas async también cuentan.
+    """
+    _installed = False
+    _lock = threading.Lock()
+
+    @staticmethod
+    def start():
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics)
+
+    @staticmethod
+    def stop(token):
+        _current.reset(token)
+
+    @staticmethod
+    def current():
+        return _current.get()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def span(name):
+        metrics = _current.get()
+        if metrics is None:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.add_span(name, time.perf_counter() - inicio)
+
+    @staticmethod
+    def install():
+        # Idempotente: el wrapper queda en cada conexión, existente o futura
+        with Instrumentation._lock:
+            if Instrumentation._installed:
+                return
+            connection_created.connect(Instrumentation._on_connection, weak=False)
+            for connection in connections.all(initialized_only=True):
+                Instrumentation._on_connection(connection=connection)
+            Instrumentation._installed = True
+
+    @staticmethod
+    def _on_connection(sender=None, connection=None, **kwargs):
+        if Instrumentation._record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(Instrumentation._record_query)
+
+    @staticmethod
+    def _record_query(execute, sql, params, many, context):
+        metrics = _current.get()
+        if metrics is None:
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.add_query(sql, time.perf_counter() - inicio)
+
+
+def instrumented(name):
+    """Decorador: registra la llamada como span `name` de la petición en curso."""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with Instrumentation.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with Instrumentation.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
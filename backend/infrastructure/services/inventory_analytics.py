@@ -0,0 +1,105 @@
+import numpy as np
+from infrastructure.models import ProductoPrecio
+
+
+def _grouped_stats(keys, values, percentiles):
+    """
+    Estadísticas por grupo sin bucles en Python: se ordena por (grupo, valor)
+    una sola vez y cada métrica sale de reduceat o de índices sobre los tramos.
+    Devuelve las claves de grupo presentes y un dict de arrays alineados con ellas.
+    """
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    sums = np.add.reduceat(values, starts)
+    stats = {
+        "count": counts,
+        "sum": sums,
+        "mean": sums / counts,
+        # Cada tramo está ordenado: el mínimo es el primero y el máximo el último
+        "min": values[starts],
+        "max": values[starts + counts - 1],
+    }
+    for p in percentiles:
+        # Interpolación lineal (mismo criterio que np.percentile) calculada para todos los grupos a la vez
+        position = (counts - 1) * (p / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        low_values, high_values = values[starts + lower], values[starts + upper]
+        stats[f"p{p:g}"] = low_values + (high_values - low_values) * (position - lower)
+    return keys[starts], stats
+
+
+def _histograms(groups, values, minimums, maximums, bins):
+    # Histograma de cada grupo con `bins` intervalos iguales entre su mínimo y su máximo
+    widths = (maximums - minimums) / bins
+    safe_widths = np.where(widths > 0, widths, 1.0)
+    bucket = np.floor((values - minimums[groups]) / safe_widths[groups]).astype(np.int64)
+    bucket = np.clip(bucket, 0, bins - 1)
+    counts = np.bincount(groups * bins + bucket, minlength=len(minimums) * bins).reshape(len(minimums), bins)
+    edges = minimums[:, None] + widths[:, None] * np.arange(bins + 1)
+    return edges, counts
+
+
+class InventoryAnalyticsService:
+    """
+    Analítica agregada del inventario con NumPy: los precios se leen de la
+    tabla indexada producto_precio en una sola consulta, como columnas, y todas
+    las métricas se calculan de forma vectorizada.
+    """
+
+    @staticmethod
+    def load_columns(queryset=None):
+        queryset = ProductoPrecio.objects.all() if queryset is None else queryset
+        rows = queryset.values_list('moneda', 'valor', 'producto__empresa_id', 'producto__empresa__nombre')
+        monedas, valores, empresas, nombres = [], [], [], []
+        for moneda, valor, empresa_id, empresa_nombre in rows.iterator(chunk_size=10000):
+            monedas.append(moneda)
+            valores.append(valor)
+            empresas.append(empresa_id or '')
+            nombres.append(empresa_nombre or '')
+        return {
+            "moneda": np.array(monedas, dtype=str),
+            "valor": np.array(valores, dtype=np.float64),
+            "empresa": np.array(empresas, dtype=str),
+            "empresa_nombre": nombres,
+        }
+
+    @staticmethod
+    def compute(columns, percentiles=(50, 90, 99), bins=10):
+        if len(columns["valor"]) == 0:
+            return {"by_currency": [], "by_company": []}
+
+        valores = columns["valor"]
+        monedas, moneda_idx = np.unique(columns["moneda"], return_inverse=True)
+        empresas, empresa_first, empresa_idx = np.unique(columns["empresa"], return_index=True, return_inverse=True)
+
+        grupos, stats = _grouped_stats(moneda_idx, valores, percentiles)
+        edges, hist = _histograms(moneda_idx, valores, stats["min"], stats["max"], bins)
+        by_currency = []
+        for position, grupo in enumerate(grupos):
+            item = {"currency": str(monedas[grupo])}
+            item.update({name: InventoryAnalyticsService._py(values[position]) for name, values in stats.items()})
+            item["histogram"] = {"edges": edges[position].tolist(), "counts": hist[position].tolist()}
+            by_currency.append(item)
+
+        # Clave compuesta empresa x moneda para agrupar en una sola pasada
+        grupos, stats = _grouped_stats(empresa_idx * len(monedas) + moneda_idx, valores, percentiles)
+        by_company = []
+        for position, grupo in enumerate(grupos):
+            empresa, moneda = divmod(int(grupo), len(monedas))
+            item = {
+                "company": str(empresas[empresa]) or None,
+                "company_name": columns["empresa_nombre"][empresa_first[empresa]] or None,
+                "currency": str(monedas[moneda]),
+            }
+            item.update({name: InventoryAnalyticsService._py(values[position]) for name, values in stats.items()})
+            by_company.append(item)
+
+        return {"by_currency": by_currency, "by_company": by_company}
+
+    @staticmethod
+    def _py(value):
+        return value.item() if hasattr(value, 'item') else value
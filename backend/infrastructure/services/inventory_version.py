@@ -0,0 +1,91 @@
+import time
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+GLOBAL = 'all'
+
+
+class InventoryVersion:
+    """
+    Contador monótono del estado del inventario en la caché compartida: global,
+    por empresa y por producto. Alimenta los ETag/Last-Modified y la caché de
+    respuestas de la API: comprobar si algo cambió cuesta una lectura de caché
+    y ninguna consulta.
+
+    Si la caché pierde el contador, se reinicia con el reloj en microsegundos,
+    que siempre es mayor que cualquier valor anterior salvo que haya habido más
+    de una escritura por microsegundo desde el arranque.
+
+    Con la caché por defecto en memoria del proceso (LocMemCache) cada worker
+    tendría su propio contador y respondería 304 con datos de otro: en modo
+    CONDITIONAL_GET='auto' los ETag y la caché de respuestas se desactivan.
+    """
+    KEY = 'inventory_version:{scope}'
+    MODIFIED_KEY = 'inventory_version:{scope}:modified'
+
+    @staticmethod
+    def shared_cache():
+        return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+    @staticmethod
+    def enabled():
+        modo = settings.CONDITIONAL_GET
+        if modo == 'auto':
+            return InventoryVersion.shared_cache()
+        return modo == 'on'
+
+    @staticmethod
+    def empresa(nit):
+        return f"empresa:{nit}"
+
+    @staticmethod
+    def producto(codigo):
+        return f"producto:{codigo}"
+
+    @staticmethod
+    def _initial():
+        return time.time_ns() // 1000
+
+    @staticmethod
+    def current(scope=GLOBAL):
+        """Devuelve (versión, timestamp de la última modificación)."""
+        key = InventoryVersion.KEY.format(scope=scope)
+        modified_key = InventoryVersion.MODIFIED_KEY.format(scope=scope)
+        values = cache.get_many([key, modified_key])
+        if key not in values:
+            cache.add(key, InventoryVersion._initial(), None)
+            cache.add(modified_key, time.time(), None)
+            values = cache.get_many([key, modified_key])
+        return values.get(key), values.get(modified_key) or time.time()
+
+    @staticmethod
+    def bump(*scopes):
+        scopes = tuple(dict.fromkeys((GLOBAL,) + scopes))
+        InventoryVersion._increment(scopes)
+        # Una lectura entre este incremento y el commit puede haber visto (y cacheado)
+        # los datos anteriores con la versión nueva: se vuelve a incrementar al confirmar
+        transaction.on_commit(lambda: InventoryVersion._increment(scopes))
+
+    @staticmethod
+    def _increment(scopes):
+        now = time.time()
+        for scope in scopes:
+            key = InventoryVersion.KEY.format(scope=scope)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Contador inexistente (primera escritura o caché reiniciada)
+                if not cache.add(key, InventoryVersion._initial(), None):
+                    cache.incr(key)
+        cache.set_many({InventoryVersion.MODIFIED_KEY.format(scope=scope): now for scope in scopes}, None)
+
+    @staticmethod
+    def bump_productos(productos, empresas=()):
+        # Cada producto escrito más sus empresas (la actual y, si cambió, la anterior)
+        nits = {p.empresa_id for p in productos} | set(empresas)
+        InventoryVersion.bump(
+            *(InventoryVersion.producto(p.codigo) for p in productos),
+            *(InventoryVersion.empresa(nit) for nit in nits if nit),
+        )
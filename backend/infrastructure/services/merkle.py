@@ -0,0 +1,83 @@
+import hashlib
+import json
+
+# Prefijos distintos para hojas y nodos internos (evita ataques de segunda preimagen)
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+_EMPTY = [hashlib.sha256(b'').hexdigest()]
+
+
+def hash_leaf(data):
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(LEAF_PREFIX + data).hexdigest()
+
+
+def hash_node(left, right):
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def empty_hash(level):
+    # Raíz de un subárbol vacío de altura `level`
+    while len(_EMPTY) <= level:
+        _EMPTY.append(hash_node(_EMPTY[-1], _EMPTY[-1]))
+    return _EMPTY[level]
+
+
+def producto_leaf_hash(codigo, nombre, caracteristicas, precios, empresa_id):
+    payload = json.dumps(
+        {
+            "codigo": codigo,
+            "nombre": nombre,
+            "caracteristicas": caracteristicas,
+            "precios": precios,
+            "empresa": empresa_id,
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    return hash_leaf(payload)
+
+
+def depth_for(size):
+    depth = 0
+    while (1 << depth) < size:
+        depth += 1
+    return depth
+
+
+def build_levels(leaves, depth=None):
+    """Construye todos los niveles de un árbol completo; levels[0] son las hojas."""
+    depth = depth_for(len(leaves)) if depth is None else depth
+    levels = [list(leaves)]
+    for level in range(depth):
+        current = levels[-1]
+        if len(current) % 2:
+            current = current + [empty_hash(level)]
+        levels.append([hash_node(current[i], current[i + 1]) for i in range(0, len(current), 2)])
+    if not levels[-1]:
+        levels[-1] = [empty_hash(depth)]
+    return levels
+
+
+def proof_from_levels(levels, index):
+    siblings = []
+    for level, nodes in enumerate(levels[:-1]):
+        sibling = index ^ 1
+        siblings.append(nodes[sibling] if sibling < len(nodes) else empty_hash(level))
+        index //= 2
+    return siblings
+
+
+def root_from_proof(leaf_hash, index, siblings):
+    current = leaf_hash
+    for sibling in siblings:
+        current = hash_node(current, sibling) if index % 2 == 0 else hash_node(sibling, current)
+        index //= 2
+    return current
+
+
+def verify_proof(leaf_hash, index, siblings, root):
+    return root_from_proof(leaf_hash, index, siblings) == root
@@ -0,0 +1,269 @@
+import bisect
+from django.db import transaction
+from infrastructure.models import InventoryCertification, MerkleState, MerkleLeaf, MerkleNode
+from infrastructure.services import merkle
+from shared_domain.exceptions import EntityNotFoundError
+from shared_domain.models import Producto
+
+
+class MerkleTreeService:
+    """
+    Árbol de Merkle persistente sobre los productos. Cada escritura de un
+    producto actualiza sólo el camino hoja-raíz (O(log n)) y los nodos se
+    versionan para poder emitir pruebas contra raíces ya certificadas.
+    """
+
+    @staticmethod
+    def _state(lock=False):
+        queryset = MerkleState.objects.select_for_update() if lock else MerkleState.objects
+        state = queryset.filter(pk=1).first()
+        if state is None:
+            state, _ = MerkleState.objects.get_or_create(pk=1, defaults={"root": merkle.empty_hash(0)})
+        return state
+
+    @staticmethod
+    def current_root():
+        state = MerkleTreeService._state()
+        return {"root": state.root, "version": state.version, "depth": state.depth}
+
+    @staticmethod
+    def _node_hash(level, index, version):
+        node_hash = (
+            MerkleNode.objects.filter(level=level, index=index, version__lte=version)
+            .order_by('-version')
+            .values_list('hash', flat=True)
+            .first()
+        )
+        return node_hash or merkle.empty_hash(level)
+
+    @staticmethod
+    def _node_hashes(level, indexes, version):
+        # Hash vigente en `version` de varios nodos de un mismo nivel, en una consulta por bloque
+        hashes = {}
+        indexes = sorted(indexes)
+        for start in range(0, len(indexes), 500):
+            rows = (
+                MerkleNode.objects.filter(level=level, index__in=indexes[start:start + 500], version__lte=version)
+                .order_by('index', '-version')
+                .values_list('index', 'hash')
+            )
+            for index, node_hash in rows:
+                hashes.setdefault(index, node_hash)
+        return hashes
+
+    @staticmethod
+    def _set_leaves(state, leaves):
+        # Recalcula una sola vez los caminos hoja-raíz de todas las hojas modificadas (índice -> hash)
+        version = state.version + 1
+        depth = max(state.depth, merkle.depth_for(max(leaves) + 1))
+
+        nodes = [MerkleNode(level=0, index=index, version=version, hash=leaf_hash) for index, leaf_hash in leaves.items()]
+        current = dict(leaves)
+        for level in range(depth):
+            siblings = MerkleTreeService._node_hashes(
+                level, {index ^ 1 for index in current} - current.keys(), state.version
+            )
+            parents = {}
+            for position in {index // 2 for index in current}:
+                left = current.get(2 * position) or siblings.get(2 * position) or merkle.empty_hash(level)
+                right = current.get(2 * position + 1) or siblings.get(2 * position + 1) or merkle.empty_hash(level)
+                parents[position] = merkle.hash_node(left, right)
+            nodes.extend(MerkleNode(level=level + 1, index=index, version=version, hash=h) for index, h in parents.items())
+            current = parents
+        MerkleNode.objects.bulk_create(nodes, batch_size=1000)
+
+        state.version = version
+        state.depth = depth
+        state.root = current[0]
+        state.save(update_fields=['version', 'depth', 'root', 'next_index'])
+
+    @staticmethod
+    def upsert(producto):
+        leaf_hash = merkle.producto_leaf_hash(
+            producto.codigo, producto.nombre, producto.caracteristicas, producto.precios, producto.empresa_id
+        )
+        with transaction.atomic():
+            state = MerkleTreeService._state(lock=True)
+            leaf = MerkleLeaf.objects.filter(codigo=producto.codigo).first()
+            if leaf is None:
+                leaf = MerkleLeaf.objects.create(codigo=producto.codigo, index=state.next_index, leaf_hash=leaf_hash)
+                state.next_index += 1
+            elif leaf.leaf_hash == leaf_hash:
+                return state.root
+            else:
+                leaf.leaf_hash = leaf_hash
+                leaf.save(update_fields=['leaf_hash'])
+            MerkleTreeService._set_leaves(state, {leaf.index: leaf_hash})
+            return state.root
+
+    @staticmethod
+    def upsert_many(productos):
+        # Variante por lotes para importaciones masivas: una versión nueva por lote, no por producto
+        with transaction.atomic():
+            state = MerkleTreeService._state(lock=True)
+            existing = MerkleLeaf.objects.in_bulk([p.codigo for p in productos])
+            new_leaves, updated_leaves, changed, created = [], [], {}, set()
+            for producto in productos:
+                leaf_hash = merkle.producto_leaf_hash(
+                    producto.codigo, producto.nombre, producto.caracteristicas, producto.precios, producto.empresa_id
+                )
+                leaf = existing.get(producto.codigo)
+                if leaf is None:
+                    leaf = MerkleLeaf(codigo=producto.codigo, index=state.next_index, leaf_hash=leaf_hash)
+                    state.next_index += 1
+                    existing[producto.codigo] = leaf
+                    created.add(producto.codigo)
+                    new_leaves.append(leaf)
+                elif leaf.leaf_hash == leaf_hash:
+                    continue
+                else:
+                    leaf.leaf_hash = leaf_hash
+                    if producto.codigo not in created:
+                        updated_leaves.append(leaf)
+                changed[leaf.index] = leaf_hash
+
+            if not changed:
+                return state.root
+            MerkleLeaf.objects.bulk_create(new_leaves, batch_size=1000)
+            MerkleLeaf.objects.bulk_update(updated_leaves, ['leaf_hash'], batch_size=1000)
+            MerkleTreeService._set_leaves(state, changed)
+            return state.root
+
+    @staticmethod
+    def remove(codigo):
+        empty = merkle.empty_hash(0)
+        with transaction.atomic():
+            state = MerkleTreeService._state(lock=True)
+            leaf = MerkleLeaf.objects.filter(codigo=codigo).first()
+            if leaf is None or leaf.leaf_hash == empty:
+                return state.root
+            leaf.leaf_hash = empty
+            leaf.save(update_fields=['leaf_hash'])
+            MerkleTreeService._set_leaves(state, {leaf.index: empty})
+            return state.root
+
+    @staticmethod
+    def proof(codigo, version, depth):
+        leaf = MerkleLeaf.objects.filter(codigo=codigo).first()
+        if leaf is None:
+            raise EntityNotFoundError(f"Producto {codigo} no forma parte del árbol de inventario.")
+
+        leaf_hash = MerkleTreeService._node_hash(0, leaf.index, version)
+        if leaf_hash == merkle.empty_hash(0) or leaf.index >= (1 << depth):
+            raise EntityNotFoundError(f"Producto {codigo} no forma parte del inventario certificado.")
+
+        siblings = []
+        position = leaf.index
+        for level in range(depth):
+            siblings.append(MerkleTreeService._node_hash(level, position ^ 1, version))
+            position //= 2
+
+        return {
+            "codigo": codigo,
+            "index": leaf.index,
+            "leaf_hash": leaf_hash,
+            "current_leaf_hash": leaf.leaf_hash,
+            "siblings": siblings,
+            "root": merkle.root_from_proof(leaf_hash, leaf.index, siblings),
+        }
+
+    @staticmethod
+    def rebuild():
+        """
+        Recalcula en O(n) el árbol completo a partir de la tabla de productos
+        (para poblarlo o repararlo). No borra historia: cada código conserva su
+        posición y los nodos que difieren se escriben en una versión nueva, así
+        que las pruebas contra raíces ya certificadas siguen siendo válidas.
+        """
+        rows = Producto.objects.order_by('codigo').values_list(
+            'codigo', 'nombre', 'caracteristicas', 'precios', 'empresa_id'
+        )
+        empty = merkle.empty_hash(0)
+        with transaction.atomic():
+            state = MerkleTreeService._state(lock=True)
+            leaves = MerkleLeaf.objects.in_bulk()
+            new_leaves, updated_leaves, vigentes = [], [], set()
+            for row in rows.iterator(chunk_size=2000):
+                leaf_hash = merkle.producto_leaf_hash(*row)
+                leaf = leaves.get(row[0])
+                vigentes.add(row[0])
+                if leaf is None:
+                    leaf = MerkleLeaf(codigo=row[0], index=state.next_index, leaf_hash=leaf_hash)
+                    state.next_index += 1
+                    leaves[row[0]] = leaf
+                    new_leaves.append(leaf)
+                elif leaf.leaf_hash != leaf_hash:
+                    leaf.leaf_hash = leaf_hash
+                    updated_leaves.append(leaf)
+            # Productos que ya no existen (borrados sin pasar por los signals): hoja vacía
+            for codigo, leaf in leaves.items():
+                if codigo not in vigentes and leaf.leaf_hash != empty:
+                    leaf.leaf_hash = empty
+                    updated_leaves.append(leaf)
+            MerkleLeaf.objects.bulk_create(new_leaves, batch_size=1000)
+            MerkleLeaf.objects.bulk_update(updated_leaves, ['leaf_hash'], batch_size=1000)
+
+            hashes = [empty] * state.next_index
+            for leaf in leaves.values():
+                hashes[leaf.index] = leaf.leaf_hash
+            depth = max(state.depth, merkle.depth_for(state.next_index))
+            levels = merkle.build_levels(hashes, depth)
+
+            # Sólo se escriben los nodos que no coinciden con la versión vigente
+            version = state.version + 1
+            nodes = []
+            for level, level_hashes in enumerate(levels):
+                for start in range(0, len(level_hashes), 500):
+                    indexes = range(start, min(start + 500, len(level_hashes)))
+                    current = MerkleTreeService._node_hashes(level, indexes, state.version)
+                    nodes.extend(
+                        MerkleNode(level=level, index=index, version=version, hash=level_hashes[index])
+                        for index in indexes
+                        if current.get(index, merkle.empty_hash(level)) != level_hashes[index]
+                    )
+            if nodes or depth != state.depth:
+                MerkleNode.objects.bulk_create(nodes, batch_size=1000)
+                state.version = version
+            state.depth = depth
+            state.root = levels[-1][0]
+            state.save(update_fields=['version', 'depth', 'root', 'next_index'])
+            return state
+
+    @staticmethod
+    def prune():
+        """
+        Borra los nodos que ya no necesita ninguna versión conservada: la
+        vigente y las referenciadas por una InventoryCertification. Un nodo
+        (level, index, v) sigue siendo necesario si alguna versión conservada
+        K cumple v <= K < versión siguiente del mismo nodo. Devuelve el número
+        de nodos eliminados.
+        """
+        with transaction.atomic():
+            state = MerkleTreeService._state(lock=True)
+            keep = sorted(
+                set(InventoryCertification.objects.values_list('merkle_version', flat=True)) | {state.version}
+            )
+            rows = MerkleNode.objects.order_by('level', 'index', 'version').values_list('pk', 'level', 'index', 'version')
+
+            obsolete, group, versions = [], None, []
+            for pk, level, index, version in rows.iterator(chunk_size=5000):
+                if (level, index) != group:
+                    obsolete.extend(MerkleTreeService._unreferenced(versions, keep))
+                    group, versions = (level, index), []
+                versions.append((version, pk))
+            obsolete.extend(MerkleTreeService._unreferenced(versions, keep))
+
+            for start in range(0, len(obsolete), 1000):
+                MerkleNode.objects.filter(pk__in=obsolete[start:start + 1000]).delete()
+            return len(obsolete)
+
+    @staticmethod
+    def _unreferenced(versions, keep):
+        # versions: [(versión, pk)] ascendente de un mismo nodo; keep: versiones conservadas, ascendente
+        obsolete = []
+        for position, (version, pk) in enumerate(versions):
+            following = versions[position + 1][0] if position + 1 < len(versions) else None
+            k = bisect.bisect_left(keep, version)
+            if k == len(keep) or (following is not None and keep[k] >= following):
+                obsolete.append(pk)
+        return obsolete
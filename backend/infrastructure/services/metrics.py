@@ -0,0 +1,161 @@
+import contextlib
+import functools
+import os
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count
+from infrastructure.models import OutboxEmail, ReportJob
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover - dependencia opcional
+    prometheus_client = None
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Gemini y la generación de PDF tardan segundos: los buckets llegan hasta el minuto
+EXTERNAL_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+if prometheus_client is not None:
+    HTTP_REQUESTS = Counter(
+        'stockpro_http_requests_total', 'Peticiones HTTP por ruta, método y estado', ['view', 'method', 'status']
+    )
+    HTTP_LATENCY = Histogram(
+        'stockpro_http_request_duration_seconds', 'Latencia de las peticiones HTTP', ['view', 'method'],
+        buckets=HTTP_BUCKETS,
+    )
+    EXTERNAL_CALLS = Counter(
+        'stockpro_external_calls_total', 'Llamadas a servicios externos por resultado', ['service', 'operation', 'outcome']
+    )
+    EXTERNAL_LATENCY = Histogram(
+        'stockpro_external_call_duration_seconds', 'Latencia de las llamadas a servicios externos',
+        ['service', 'operation'], buckets=EXTERNAL_BUCKETS,
+    )
+    CACHE_REQUESTS = Counter(
+        'stockpro_cache_requests_total', 'Lecturas de caché por resultado (hit/miss)', ['cache', 'result']
+    )
+
+
+class Metrics:
+    """
+    Métricas Prometheus de la API y de las integraciones (Gemini, Solana,
+    Resend, PDF). Contadores e histogramas de prometheus_client: en un solo
+    proceso cada valor tiene su propio lock; con PROMETHEUS_MULTIPROC_DIR cada
+    worker de gunicorn escribe en sus propios ficheros mmap (uno por pid) y la
+    exportación los suma al leerlos, sin coordinación entre procesos.
+    """
+
+    @staticmethod
+    def enabled():
+        return prometheus_client is not None and settings.METRICS_ENABLED
+
+    @staticmethod
+    def observe_request(view, method, status, seconds):
+        if not Metrics.enabled():
+            return
+        HTTP_REQUESTS.labels(view, method, str(status)).inc()
+        HTTP_LATENCY.labels(view, method).observe(seconds)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def call(service, operation):
+        """Mide una llamada a un servicio externo; una excepción cuenta como error."""
+        if not Metrics.enabled():
+            yield
+            return
+        outcome = 'error'
+        inicio = time.perf_counter()
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            EXTERNAL_LATENCY.labels(service, operation).observe(time.perf_counter() - inicio)
+            EXTERNAL_CALLS.labels(service, operation, outcome).inc()
+
+    @staticmethod
+    def timed(service, operation):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Metrics.call(service, operation):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def cache(name, hit):
+        if Metrics.enabled():
+            CACHE_REQUESTS.labels(name, 'hit' if hit else 'miss').inc()
+
+    @staticmethod
+    def multiprocess_mode():
+        return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+    @staticmethod
+    def render():
+        """Devuelve (cuerpo, content type) en formato de texto de Prometheus."""
+        if Metrics.multiprocess_mode():
+            source = CollectorRegistry()
+            multiprocess.MultiProcessCollector(source)
+        else:
+            source = prometheus_client.REGISTRY
+        registry = CollectorRegistry()
+        registry.register(StockProCollector(source))
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+class StockProCollector:
+    """
+    Reexporta las métricas acumuladas y añade las que se calculan al leer:
+    profundidad de las colas persistidas (report_job, email_outbox) y ratio de
+    aciertos de cada caché.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        families = list(self.source.collect())
+        yield from families
+        yield self.cache_hit_ratio(families)
+        try:
+            yield self.queue_depth()
+        except DatabaseError as e:
+            # Sin base de datos se siguen exportando el resto de métricas
+            print(f"Metrics: Queue depth unavailable: {str(e)}")
+
+    @staticmethod
+    def cache_hit_ratio(families):
+        totales = defaultdict(lambda: {'hit': 0.0, 'miss': 0.0})
+        for family in families:
+            if family.name != 'stockpro_cache_requests':
+                continue
+            for sample in family.samples:
+                if sample.name.endswith('_total'):
+                    totales[sample.labels['cache']][sample.labels['result']] += sample.value
+        gauge = GaugeMetricFamily(
+            'stockpro_cache_hit_ratio', 'Aciertos / lecturas de cada caché desde el arranque', labels=['cache']
+        )
+        for cache, valores in sorted(totales.items()):
+            lecturas = valores['hit'] + valores['miss']
+            gauge.add_metric([cache], valores['hit'] / lecturas if lecturas else 0.0)
+        return gauge
+
+    @staticmethod
+    def queue_depth():
+        gauge = GaugeMetricFamily(
+            'stockpro_queue_depth', 'Elementos de cada cola persistida por estado', labels=['queue', 'status']
+        )
+        colas = (
+            ('report_job', ReportJob, (ReportJob.Status.PENDING, ReportJob.Status.RUNNING, ReportJob.Status.FAILED)),
+            ('email_outbox', OutboxEmail, (OutboxEmail.Status.PENDING, OutboxEmail.Status.SENDING, OutboxEmail.Status.DEAD)),
+        )
+        for nombre, model, estados in colas:
+            filas = model.objects.filter(status__in=estados).order_by().values('status').annotate(total=Count('pk'))
+            conteos = {fila['status']: fila['total'] for fila in filas}
+            for estado in estados:
+                gauge.add_metric([nombre, estado], conteos.get(estado, 0))
+        return gauge
@@ -1,16 +1,62 @@
+from itertools import chain, islice
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Frame
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from datetime import datetime
-from management.models import Producto
+from infrastructure.read_models.inventory_snapshot import InventorySnapshot
+from infrastructure.services.currency_service import ExchangeRateService
+from infrastructure.services.instrumentation import instrumented
+from infrastructure.services.metrics import Metrics
+
+TABLE_HEADER = ['Código', 'Producto', 'Empresa', 'Precio USD', 'Precio COP']
+TABLE_COL_WIDTHS = [60, 180, 120, 80, 80]
+# Filas convertidas por lote cuando el reporte se pide en otra moneda
+CONVERSION_BATCH_SIZE = 2000
 
 class PDFService:
     @staticmethod
-    def generate_pdf(buffer, ai_analysis, tx_hash=None):
+    @instrumented('pdf')
+    @Metrics.timed('pdf', 'render')
+    def generate_pdf(buffer, ai_analysis, tx_hash=None, productos=None, currency=None):
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         styles = getSampleStyleSheet()
+        story = PDFService._header_story(styles, ai_analysis)
+
+        if productos is None:
+            productos = InventorySnapshot.load()
+
+        data = [PDFService._table_header(currency)]
+        data.extend(PDFService._rows(productos, currency))
+
+        story.append(PDFService._table(data))
+        story.extend(PDFService._certification_story(styles, tx_hash))
+
+        doc.build(story)
+
+    @staticmethod
+    @instrumented('pdf')
+    @Metrics.timed('pdf', 'render_streaming')
+    def generate_pdf_streaming(output, ai_analysis, rows, tx_hash=None, rows_per_table=50, currency=None):
+        """
+        Renderiza el reporte página a página a partir de un iterador de
+        ProductoRecord. Sólo se mantiene en memoria el bloque de filas de la
+        página en curso.
+        """
+        styles = getSampleStyleSheet()
+        c = canvas.Canvas(output, pagesize=letter, pageCompression=1)
+        flowables = chain(
+            PDFService._header_story(styles, ai_analysis),
+            PDFService._iter_tables(rows, rows_per_table, currency),
+            PDFService._certification_story(styles, tx_hash),
+        )
+        PDFService._render_pages(c, flowables)
+        c.save()
+
+    @staticmethod
+    def _header_story(styles, ai_analysis):
         story = []
 
         # Title
@@ -35,18 +81,52 @@ class PDFService:
 
         # Table Header
         story.append(Paragraph("Detalle de Productos", styles['Heading2']))
-        
-        data = [['Código', 'Producto', 'Empresa', 'Precio USD', 'Precio COP']]
-        for p in Producto.objects.all():
-            data.append([
-                p.codigo,
-                p.nombre[:25] + ('...' if len(p.nombre) > 25 else ''),
-                p.empresa.nombre[:20],
-                f"${p.precios.get('USD', 0)}",
-                f"${p.precios.get('COP', 0)}"
-            ])
-
-        table = Table(data, colWidths=[60, 180, 120, 80, 80])
+        return story
+
+    @staticmethod
+    def _row(codigo, nombre, empresa_nombre, precios):
+        return [
+            codigo,
+            nombre[:25] + ('...' if len(nombre) > 25 else ''),
+            (empresa_nombre or 'Empresa Desconocida')[:20],
+            f"${precios.get('USD', 0)}",
+            f"${precios.get('COP', 0)}"
+        ]
+
+    @staticmethod
+    def _table_header(currency=None):
+        if currency:
+            return ['Código', 'Producto', 'Empresa', f'Precio {currency.upper()}', 'Moneda origen']
+        return TABLE_HEADER
+
+    @staticmethod
+    def _rows(productos, currency=None):
+        if not currency:
+            for p in productos:
+                yield PDFService._row(p.codigo, p.nombre, p.empresa_nombre, p.precios)
+            return
+
+        # Conversión por lotes: sin consultas por fila, las tasas están en memoria
+        productos = iter(productos)
+        while True:
+            batch = list(islice(productos, CONVERSION_BATCH_SIZE))
+            if not batch:
+                return
+            conversiones = ExchangeRateService.convert_precios(((p.codigo, p.precios) for p in batch), currency)
+            for p in batch:
+                yield PDFService._converted_row(p.codigo, p.nombre, p.empresa_nombre, conversiones.get(p.codigo), currency)
+
+    @staticmethod
+    def _converted_row(codigo, nombre, empresa_nombre, conversion, currency):
+        row = PDFService._row(codigo, nombre, empresa_nombre, {})[:3]
+        if conversion is None:
+            return row + ['N/D', '-']
+        valor, origen = conversion
+        return row + [f"{valor:,.2f} {currency.upper()}", origen]
+
+    @staticmethod
+    def _table(data):
+        table = Table(data, colWidths=TABLE_COL_WIDTHS, repeatRows=1)
         table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#5b21b6')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -58,22 +138,74 @@ class PDFService:
             ('GRID', (0, 0), (-1, -1), 1, colors.white),
             ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f3ff')])
         ]))
-        story.append(table)
-        
+        return table
+
+    @staticmethod
+    def _iter_tables(rows, rows_per_table, currency=None):
+        # Una tabla pequeña por bloque de filas en lugar de una única tabla gigante
+        rows = PDFService._rows(rows, currency)
+        header = PDFService._table_header(currency)
+        while True:
+            chunk = list(islice(rows, rows_per_table))
+            if not chunk:
+                return
+            yield PDFService._table([header] + chunk)
+
+    @staticmethod
+    def _certification_story(styles, tx_hash):
+        story = []
         if tx_hash:
             story.append(Spacer(1, 30))
             story.append(Paragraph("Certificación de Integridad Blockchain (Solana)", styles['Heading2']))
-            
+
             blockchain_style = ParagraphStyle(
                 'BlockchainStyle',
                 parent=styles['Normal'],
                 fontSize=9,
                 textColor=colors.HexColor('#4b5563')
             )
-            
+
             story.append(Paragraph(f"<b>ID Transacción:</b> {tx_hash}", blockchain_style))
             story.append(Paragraph(f"<b>Fecha de Verificación:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", blockchain_style))
             story.append(Paragraph("<b>Red:</b> Solana Devnet", blockchain_style))
             story.append(Paragraph("<b>Concepto:</b> Este documento ha sido sellado criptográficamente en la red de Solana, garantizando que el estado del inventario no ha sido modificado desde la fecha de emisión.", blockchain_style))
+        return story
 
-        doc.build(story)
+    @staticmethod
+    def _render_pages(c, flowables):
+        # Mismos márgenes que SimpleDocTemplate (1 pulgada)
+        width, height = letter
+        pending = []
+        first_page = True
+        while True:
+            frame = Frame(inch, inch, width - 2 * inch, height - 2 * inch, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+            page_full = False
+            # Si ya se dibujó algo en la página en curso (sin depender del atributo privado Frame._atTop)
+            drawn = False
+            while not page_full:
+                if not pending:
+                    flowable = next(flowables, None)
+                    if flowable is None:
+                        break
+                    pending.append(flowable)
+                head = pending[0]
+                if frame.add(head, c):
+                    del pending[0]
+                    drawn = True
+                    continue
+                parts = frame.split(head, c)
+                if parts:
+                    pending[0:1] = parts
+                    if frame.add(pending[0], c):
+                        del pending[0]
+                        drawn = True
+                elif not drawn:
+                    # No cabe ni en una página vacía: se descarta para no entrar en bucle
+                    del pending[0]
+                    continue
+                page_full = True
+            if page_full or drawn or first_page:
+                c.showPage()
+            first_page = False
+            if not page_full:
+                return
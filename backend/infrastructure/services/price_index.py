@@ -0,0 +1,103 @@
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import F, FilteredRelation, Q
+from infrastructure.models import ProductoPrecio
+from shared_domain.exceptions import BusinessRuleError
+from shared_domain.models import Producto
+
+# Límite de DecimalField(max_digits=24, decimal_places=6)
+MAX_VALOR = Decimal(10) ** 18
+
+
+def filas_precio(codigo, precios):
+    # Una fila por moneda; los valores no numéricos (datos anteriores a la validación) no se indexan
+    if not hasattr(precios, 'items'):
+        return []
+    filas = []
+    for moneda, valor in precios.items():
+        try:
+            valor = Decimal(str(valor))
+        except (InvalidOperation, ValueError):
+            continue
+        if not valor.is_finite() or abs(valor) >= MAX_VALOR:
+            continue
+        filas.append(ProductoPrecio(producto_id=codigo, moneda=str(moneda).upper(), valor=valor))
+    return filas
+
+
+class PriceIndexService:
+    """
+    Mantiene `producto_precio`, la proyección indexada (moneda, valor) de
+    Producto.precios, para responder filtros de rango con el índice.
+    """
+
+    @staticmethod
+    def sync(producto):
+        PriceIndexService.sync_many([producto])
+
+    @staticmethod
+    def sync_many(productos):
+        with transaction.atomic():
+            ProductoPrecio.objects.filter(producto_id__in=[p.codigo for p in productos]).delete()
+            ProductoPrecio.objects.bulk_create(
+                [fila for p in productos for fila in filas_precio(p.codigo, p.precios)], batch_size=1000
+            )
+
+    @staticmethod
+    def _decimal(nombre, valor):
+        try:
+            valor = Decimal(valor)
+        except (InvalidOperation, ValueError):
+            raise BusinessRuleError(f"El parámetro '{nombre}' debe ser un número válido.")
+        if not valor.is_finite():
+            raise BusinessRuleError(f"El parámetro '{nombre}' debe ser un número válido.")
+        return valor
+
+    @staticmethod
+    def filtrar(queryset, currency=None, min_price=None, max_price=None, ordering=None):
+        """
+        Aplica ?currency=&min=&max=&ordering=price_<moneda> sobre la tabla indexada.
+        Devuelve el queryset y el orden para la paginación por cursor (None = orden por defecto).
+        """
+        if (min_price is not None or max_price is not None) and not currency:
+            raise BusinessRuleError("Los filtros 'min' y 'max' requieren el parámetro 'currency'.")
+
+        if currency:
+            condicion = Q(precio_filtro__isnull=False)
+            if min_price is not None:
+                condicion &= Q(precio_filtro__valor__gte=PriceIndexService._decimal('min', min_price))
+            if max_price is not None:
+                condicion &= Q(precio_filtro__valor__lte=PriceIndexService._decimal('max', max_price))
+            queryset = queryset.annotate(
+                precio_filtro=FilteredRelation('precios_indexados', condition=Q(precios_indexados__moneda=currency.upper()))
+            ).filter(condicion)
+
+        if not ordering:
+            return queryset, None
+
+        campo = ordering.lstrip('-')
+        if not campo.startswith('price_') or not campo[len('price_'):].isalnum():
+            raise BusinessRuleError("El orden debe ser 'price_<moneda>' o '-price_<moneda>'.")
+        moneda = campo[len('price_'):].upper()
+        # Los productos sin precio en la moneda de orden quedan fuera del listado
+        queryset = queryset.annotate(
+            precio_orden=FilteredRelation('precios_indexados', condition=Q(precios_indexados__moneda=moneda))
+        ).filter(precio_orden__isnull=False).annotate(**{campo: F('precio_orden__valor')})
+        descendente = ordering.startswith('-')
+        return queryset, (ordering, '-codigo' if descendente else 'codigo')
+
+    @staticmethod
+    def rebuild(chunk_size=2000):
+        total = 0
+        with transaction.atomic():
+            ProductoPrecio.objects.all().delete()
+            lote = []
+            for codigo, precios in Producto.objects.order_by('codigo').values_list('codigo', 'precios').iterator(chunk_size=chunk_size):
+                lote.extend(filas_precio(codigo, precios))
+                if len(lote) >= chunk_size:
+                    ProductoPrecio.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            ProductoPrecio.objects.bulk_create(lote)
+            total += len(lote)
+        return total
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import zlib
+from infrastructure.read_models.inventory_snapshot import InventorySnapshot
+
+FORMATS = ('ndjson', 'csv')
+# Mismas columnas que acepta la importación masiva, más el nombre de la empresa
+COLUMNS = ('codigo', 'nombre', 'caracteristicas', 'precios', 'empresa', 'empresa_nombre')
+FIELDS = ('codigo', 'nombre', 'caracteristicas', 'precios', 'empresa_id', 'empresa__nombre')
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+class ProductExporter:
+    """
+    Exportación del catálogo en streaming: las filas salen de un cursor de
+    servidor y se emiten en bloques de ~buffer_size bytes, así que la memoria
+    no depende del tamaño del inventario.
+    """
+
+    def __init__(self, file_format='ndjson', compress=False, chunk_size=2000, buffer_size=64 * 1024):
+        self.file_format = file_format
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.buffer_size = buffer_size
+
+    @property
+    def content_type(self):
+        return 'application/gzip' if self.compress else CONTENT_TYPES[self.file_format]
+
+    @property
+    def filename(self):
+        return f"productos.{self.file_format}{'.gz' if self.compress else ''}"
+
+    def _rows(self, queryset=None):
+        return InventorySnapshot.iter_values(FIELDS, queryset=queryset, chunk_size=self.chunk_size)
+
+    def _iter_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False, default=str) + "\n"
+
+    def _iter_csv(self, rows):
+        line = io.StringIO()
+        writer = csv.writer(line)
+        writer.writerow(COLUMNS)
+        for codigo, nombre, caracteristicas, precios, empresa, empresa_nombre in rows:
+            writer.writerow([
+                codigo, nombre, caracteristicas,
+                json.dumps(precios, ensure_ascii=False, default=str), empresa, empresa_nombre,
+            ])
+            # El writer escribe sobre un único buffer que se vacía tras cada fila
+            yield line.getvalue()
+            line.seek(0)
+            line.truncate()
+        yield line.getvalue()
+
+    def _buffered(self, pieces):
+        # Agrupa las filas en bloques para no emitir un write por fila
+        buffer, size = [], 0
+        for piece in pieces:
+            data = piece.encode('utf-8')
+            buffer.append(data)
+            size += len(data)
+            if size >= self.buffer_size:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+    @staticmethod
+    def _gzip(chunks):
+        # wbits=31: cabecera y pie gzip, comprimido al vuelo bloque a bloque
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def stream(self, queryset=None):
+        rows = self._rows(queryset)
+        pieces = self._iter_csv(rows) if self.file_format == 'csv' else self._iter_ndjson(rows)
+        chunks = self._buffered(pieces)
+        return self._gzip(chunks) if self.compress else chunks
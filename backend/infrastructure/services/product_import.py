@@ -0,0 +1,100 @@
+import codecs
+import csv
+import json
+from shared_domain.exceptions import BusinessRuleError
+
+FORMATS = ('csv', 'ndjson')
+PRICE_COLUMN_PREFIX = 'precio_'
+
+
+class ProductImportParser:
+    """
+    Lectura incremental de ficheros de importación. Recibe cualquier iterable
+    de líneas en bytes (UploadedFile, HttpRequest, fichero abierto en 'rb') y
+    produce (línea, datos, error) sin cargar el fichero completo en memoria.
+    """
+
+    @staticmethod
+    def detect_format(explicit=None, filename=None, content_type=None):
+        if explicit:
+            file_format = explicit.lower()
+        elif filename and '.' in filename:
+            file_format = filename.rsplit('.', 1)[1].lower()
+        elif content_type and 'csv' in content_type:
+            file_format = 'csv'
+        elif content_type and ('ndjson' in content_type or 'jsonl' in content_type):
+            file_format = 'ndjson'
+        else:
+            file_format = None
+
+        if file_format == 'jsonl':
+            file_format = 'ndjson'
+        if file_format not in FORMATS:
+            raise BusinessRuleError(f"Formato de importación no soportado. Use uno de: {', '.join(FORMATS)}.")
+        return file_format
+
+    @staticmethod
+    def iter_rows(lines, file_format):
+        text_lines = codecs.iterdecode(lines, 'utf-8-sig')
+        if file_format == 'csv':
+            return ProductImportParser._iter_csv(text_lines)
+        return ProductImportParser._iter_ndjson(text_lines)
+
+    @staticmethod
+    def _iter_ndjson(text_lines):
+        for line_number, line in enumerate(text_lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"JSON inválido: {str(e)}"
+                continue
+            if not isinstance(data, dict):
+                yield line_number, None, "Cada línea debe ser un objeto JSON."
+                continue
+            yield line_number, data, None
+
+    @staticmethod
+    def _iter_csv(text_lines):
+        reader = csv.DictReader(text_lines)
+        for row in reader:
+            try:
+                data = ProductImportParser._csv_row(row)
+            except ValueError as e:
+                yield reader.line_num, None, str(e)
+                continue
+            yield reader.line_num, data, None
+
+    @staticmethod
+    def _csv_row(row):
+        # Los precios llegan como JSON en 'precios' o como columnas precio_<MONEDA>
+        if row.get('precios'):
+            try:
+                precios = json.loads(row['precios'])
+            except ValueError:
+                raise ValueError("La columna 'precios' no contiene un JSON válido.")
+        else:
+            precios = {
+                column[len(PRICE_COLUMN_PREFIX):].upper(): ProductImportParser._numero(value)
+                for column, value in row.items()
+                if column and column.lower().startswith(PRICE_COLUMN_PREFIX) and value not in (None, '')
+            }
+        return {
+            'codigo': row.get('codigo'),
+            'nombre': row.get('nombre'),
+            'caracteristicas': row.get('caracteristicas'),
+            'empresa': row.get('empresa'),
+            'precios': precios,
+        }
+
+    @staticmethod
+    def _numero(value):
+        value = value.strip()
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                pass
+        # Se deja tal cual para que la validación de precios informe el error
+        return value
@@ -0,0 +1,335 @@
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from infrastructure.models import ProductoBusqueda
+from shared_domain.models import Empresa, Producto
+
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+# Peso de cada campo en el ranking (equivalente a los pesos A/B del tsvector)
+TITLE_WEIGHT = 1.0
+CONTENT_WEIGHT = 0.4
+# Penalización de las coincidencias por prefijo y por similitud frente a la exacta
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.6
+
+SEARCH_SQL = """
+    SELECT b.producto_id,
+           ts_rank_cd(b.vector, q.query) + word_similarity(%(texto)s, b.titulo) AS rank
+    FROM producto_busqueda b, to_tsquery('spanish', %(tsquery)s) AS q(query)
+    WHERE b.vector @@ q.query OR %(texto)s <%% b.titulo
+    ORDER BY rank DESC, b.producto_id
+    LIMIT %(limit)s
+"""
+
+
+def normalizar(texto):
+    # Minúsculas y sin tildes: "Camión Ñandú" -> "camion nandu"
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(TOKEN_RE.findall(texto.lower()))
+
+
+def tokens(texto):
+    return TOKEN_RE.findall(normalizar(texto))
+
+
+def trigramas(token):
+    # Mismo relleno que pg_trgm: dos espacios delante y uno detrás
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def documento(producto, empresa_nombre=''):
+    # La empresa (NIT y nombre) cuenta como contenido: buscar por empresa lista sus productos
+    return ProductoBusqueda(
+        producto_id=producto.codigo,
+        titulo=normalizar(f"{producto.codigo} {producto.nombre}"),
+        contenido=normalizar(f"{producto.caracteristicas} {producto.empresa_id or ''} {empresa_nombre or ''}"),
+    )
+
+
+class InvertedIndex:
+    """
+    Índice invertido en memoria para SQLite (desarrollo y tests): token ->
+    {codigo: peso}, con el vocabulario ordenado para buscar por prefijo y un
+    índice de trigramas para tolerar errores de escritura.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        # codigo -> {token: peso}, para poder retirar o sustituir un documento
+        self.terms = {}
+        self._vocabulary = None
+        self._trigrams = None
+
+    @property
+    def documents(self):
+        return len(self.terms)
+
+    def add(self, codigo, titulo, contenido):
+        if codigo in self.terms:
+            self.remove(codigo)
+        terms = defaultdict(float)
+        for texto, peso in ((titulo, TITLE_WEIGHT), (contenido, CONTENT_WEIGHT)):
+            for token in texto.split():
+                terms[token] += peso
+        for token, peso in terms.items():
+            if token not in self.postings:
+                self._add_token(token)
+            self.postings[token][codigo] = peso
+        self.terms[codigo] = terms
+
+    def remove(self, codigo):
+        for token in self.terms.pop(codigo, {}):
+            posting = self.postings[token]
+            posting.pop(codigo, None)
+            if not posting:
+                del self.postings[token]
+                self._drop_token(token)
+
+    def _add_token(self, token):
+        # El vocabulario y los trigramas ya construidos se mantienen al día sin recalcularlos
+        if self._vocabulary is not None:
+            insort(self._vocabulary, token)
+        if self._trigrams is not None:
+            for trigram in trigramas(token):
+                self._trigrams[trigram].add(token)
+
+    def _drop_token(self, token):
+        if self._vocabulary is not None:
+            del self._vocabulary[bisect_left(self._vocabulary, token)]
+        if self._trigrams is not None:
+            for trigram in trigramas(token):
+                self._trigrams[trigram].discard(token)
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def _prefixed(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def _similar(self, token, threshold):
+        if self._trigrams is None:
+            self._trigrams = defaultdict(set)
+            for candidate in self.postings:
+                for trigram in trigramas(candidate):
+                    self._trigrams[trigram].add(candidate)
+        query = trigramas(token)
+        shared = defaultdict(int)
+        for trigram in query:
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] += 1
+        for candidate, count in shared.items():
+            similarity = count / (len(query) + len(trigramas(candidate)) - count)
+            if similarity >= threshold:
+                yield candidate, similarity
+
+    def _expand(self, token, threshold):
+        # Coincidencia exacta, por prefijo y, si no hay ninguna, por similitud de trigramas
+        expansions = {candidate: PREFIX_FACTOR for candidate in self._prefixed(token)}
+        if token in self.postings:
+            expansions[token] = 1.0
+        if not expansions and len(token) >= 3:
+            expansions = {candidate: FUZZY_FACTOR * similarity for candidate, similarity in self._similar(token, threshold)}
+        return expansions
+
+    def search(self, query_tokens, limit, threshold=0.3):
+        scores = None
+        for token in dict.fromkeys(query_tokens):
+            token_scores = {}
+            for candidate, factor in self._expand(token, threshold).items():
+                posting = self.postings[candidate]
+                idf = math.log(1 + self.documents / len(posting))
+                for codigo, peso in posting.items():
+                    # Saturación de frecuencia al estilo BM25: repetir un término aporta cada vez menos
+                    score = factor * idf * peso / (peso + 1.0)
+                    if score > token_scores.get(codigo, 0.0):
+                        token_scores[codigo] = score
+            # Todos los términos deben aparecer (AND), igual que el tsquery
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {codigo: s + token_scores[codigo] for codigo, s in scores.items() if codigo in token_scores}
+            if not scores:
+                return []
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class ProductSearchService:
+    """
+    Búsqueda de productos con ranking. En PostgreSQL usa el tsvector y el
+    índice de trigramas de `producto_busqueda`; en otros motores, un índice
+    invertido en memoria.
+
+    Cada escritura incrementa al confirmarse la versión de la caché
+    compartida: el proceso que escribe aplica el cambio a su índice y el resto
+    lo reconstruye al ver otra versión. Publicar antes del commit dejaría que
+    una búsqueda concurrente cargase las filas anteriores bajo la versión nueva.
+    """
+    VERSION_KEY = 'product_search:version'
+    _index = None
+    _version = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def backend():
+        backend = settings.SEARCH_BACKEND
+        if backend == 'auto':
+            return 'postgres' if connection.vendor == 'postgresql' else 'python'
+        return backend
+
+    @staticmethod
+    def sync(producto):
+        ProductSearchService.sync_many([producto])
+
+    @staticmethod
+    def _empresas(productos):
+        # Nombre de cada empresa: el objeto ya cargado si lo hay, el resto en una consulta
+        nombres = {p.empresa_id: p.empresa.nombre for p in productos if Producto.empresa.is_cached(p) and p.empresa}
+        faltan = {p.empresa_id for p in productos if p.empresa_id} - nombres.keys()
+        if faltan:
+            nombres.update(Empresa.objects.filter(nit__in=faltan).values_list('nit', 'nombre'))
+        return nombres
+
+    @staticmethod
+    def sync_many(productos):
+        nombres = ProductSearchService._empresas(productos)
+        documentos = [documento(p, nombres.get(p.empresa_id)) for p in productos]
+        ProductoBusqueda.objects.bulk_create(
+            documentos,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['producto'],
+            update_fields=['titulo', 'contenido'],
+        )
+        cambios = [(d.producto_id, d.titulo, d.contenido) for d in documentos]
+        transaction.on_commit(lambda: ProductSearchService._publish(added=cambios))
+
+    @staticmethod
+    def sync_empresa(nit, chunk_size=2000):
+        # La empresa cambió de nombre: se reindexan sus productos por bloques
+        lote = []
+        for producto in Producto.objects.filter(empresa_id=nit).select_related('empresa').iterator(chunk_size=chunk_size):
+            lote.append(producto)
+            if len(lote) >= chunk_size:
+                ProductSearchService.sync_many(lote)
+                lote = []
+        if lote:
+            ProductSearchService.sync_many(lote)
+
+    @staticmethod
+    def remove(codigo):
+        # La fila de producto_busqueda se borra en cascada con el producto
+        transaction.on_commit(lambda: ProductSearchService._publish(removed=[codigo]))
+
+    @staticmethod
+    def rebuild():
+        with transaction.atomic():
+            ProductoBusqueda.objects.all().delete()
+            total = 0
+            lote = []
+            productos = Producto.objects.select_related('empresa').only(
+                'codigo', 'nombre', 'caracteristicas', 'empresa__nombre'
+            )
+            for producto in productos.iterator(chunk_size=2000):
+                lote.append(documento(producto, producto.empresa.nombre if producto.empresa_id else ''))
+                if len(lote) >= 2000:
+                    ProductoBusqueda.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            ProductoBusqueda.objects.bulk_create(lote)
+            total += len(lote)
+            transaction.on_commit(ProductSearchService.invalidate)
+        return total
+
+    @staticmethod
+    def _next_version():
+        key = ProductSearchService.VERSION_KEY
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Contador inexistente (caché reiniciada): se parte del reloj, mayor que cualquier valor anterior
+            cache.add(key, time.time_ns() // 1000, None)
+            return cache.incr(key)
+
+    @staticmethod
+    def _publish(added=(), removed=()):
+        version = ProductSearchService._next_version()
+        with ProductSearchService._lock:
+            index = ProductSearchService._index
+            if index is None:
+                return
+            if ProductSearchService._version is None or version != ProductSearchService._version + 1:
+                # Otro proceso escribió entre medias: este índice no tiene sus cambios
+                ProductSearchService._index = None
+                return
+            for codigo in removed:
+                index.remove(codigo)
+            for codigo, titulo, contenido in added:
+                index.add(codigo, titulo, contenido)
+            ProductSearchService._version = version
+
+    @staticmethod
+    def invalidate():
+        ProductSearchService._next_version()
+        with ProductSearchService._lock:
+            ProductSearchService._index = None
+
+    @staticmethod
+    def index():
+        version = cache.get(ProductSearchService.VERSION_KEY)
+        if version is None:
+            cache.add(ProductSearchService.VERSION_KEY, time.time_ns() // 1000, None)
+            version = cache.get(ProductSearchService.VERSION_KEY)
+        with ProductSearchService._lock:
+            if ProductSearchService._index is None or ProductSearchService._version != version:
+                index = InvertedIndex()
+                rows = ProductoBusqueda.objects.values_list('producto_id', 'titulo', 'contenido')
+                for codigo, titulo, contenido in rows.iterator(chunk_size=5000):
+                    index.add(codigo, titulo, contenido)
+                ProductSearchService._index = index
+                ProductSearchService._version = version
+            return ProductSearchService._index
+
+    @staticmethod
+    def search(query, limit):
+        """Devuelve [(codigo, rank)] ordenado por relevancia."""
+        query_tokens = tokens(query)
+        if not query_tokens:
+            return []
+        if ProductSearchService.backend() == 'postgres':
+            return ProductSearchService._search_postgres(query_tokens, limit)
+        return ProductSearchService.index().search(query_tokens, limit, settings.SEARCH_FUZZY_THRESHOLD)
+
+    @staticmethod
+    def tsquery(query_tokens):
+        # Todos los términos, cada uno como prefijo: "cami roj" -> "cami:* & roj:*"
+        return ' & '.join(f"{token}:*" for token in dict.fromkeys(query_tokens))
+
+    @staticmethod
+    def _search_postgres(query_tokens, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+                [str(settings.SEARCH_FUZZY_THRESHOLD)],
+            )
+            cursor.execute(SEARCH_SQL, {
+                "texto": ' '.join(query_tokens),
+                "tsquery": ProductSearchService.tsquery(query_tokens),
+                "limit": limit,
+            })
+            return [(codigo, float(rank)) for codigo, rank in cursor.fetchall()]
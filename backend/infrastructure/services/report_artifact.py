@@ -0,0 +1,89 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from django.conf import settings
+
+# Múltiplo de 3: cada bloque se codifica en base64 sin relleno intermedio
+BASE64_BLOCK_SIZE = 3 * 64 * 1024
+
+
+class ReportArtifact:
+    """
+    PDF de un reporte visto como fichero en lugar de como `bytes`. Se genera
+    en un SpooledTemporaryFile (en memoria hasta REPORT_SPOOL_MAX_BYTES, en
+    disco a partir de ahí) o abre directamente el blob de la caché de reportes,
+    y se consume por bloques: respuesta HTTP con FileResponse (sendfile cuando
+    es un fichero real), hash y base64 del adjunto de correo. El PDF completo
+    sólo se copia a memoria si alguien llama a `read()`.
+
+    El fichero es compartido: los consumidores lo leen uno detrás de otro y el
+    último (normalmente la respuesta HTTP) lo cierra.
+    """
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+
+    @classmethod
+    def spooled(cls):
+        return cls(tempfile.SpooledTemporaryFile(max_size=settings.REPORT_SPOOL_MAX_BYTES))
+
+    @classmethod
+    def from_path(cls, path):
+        # Se abre en el acto: si la caché expulsa el blob después, el descriptor sigue siendo válido
+        return cls(open(path, 'rb'))
+
+    @classmethod
+    def from_bytes(cls, content):
+        # BytesIO comparte el buffer de un objeto bytes hasta que se escribe en él
+        return cls(io.BytesIO(content))
+
+    @property
+    def writer(self):
+        return self._file
+
+    @property
+    def size(self):
+        position = self._file.tell()
+        size = self._file.seek(0, os.SEEK_END)
+        self._file.seek(position)
+        return size
+
+    @property
+    def base64_size(self):
+        return 4 * ((self.size + 2) // 3)
+
+    def open(self):
+        self._file.seek(0)
+        return self._file
+
+    def chunks(self, block_size=64 * 1024):
+        fileobj = self.open()
+        while True:
+            block = fileobj.read(block_size)
+            if not block:
+                return
+            yield block
+
+    def iter_base64(self, block_size=BASE64_BLOCK_SIZE):
+        for block in self.chunks(block_size):
+            yield base64.b64encode(block)
+
+    def sha256(self):
+        digest = hashlib.sha256()
+        for block in self.chunks():
+            digest.update(block)
+        return digest.hexdigest()
+
+    def read(self):
+        return self.open().read()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from infrastructure.services.metrics import Metrics
+from infrastructure.services.report_artifact import ReportArtifact
+
+
+class FileSystemReportStorage:
+    """Almacén de reportes en disco local con expulsión LRU por tamaño total."""
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _blob_path(self, key):
+        return self.root / 'blobs' / key[:2] / f"{key}.pdf"
+
+    def _meta_path(self, name):
+        return self.root / 'index' / f"{name}.json"
+
+    def _atomic_write(self, path, content):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(content, bytes):
+                    f.write(content)
+                else:
+                    shutil.copyfileobj(content, f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get(self, key):
+        path = self._blob_path(key)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # El mtime hace de marca de último acceso para la política LRU
+        os.utime(path)
+        return content
+
+    def open(self, key):
+        # Como get() pero sin leer el blob: el PDF se sirve y se adjunta desde el fichero
+        path = self._blob_path(key)
+        try:
+            blob = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return blob
+
+    def put(self, key, content):
+        # content: bytes o un fichero binario, que se copia por bloques
+        self._atomic_write(self._blob_path(key), content)
+        self.evict()
+
+    def evict(self):
+        blobs = []
+        total = 0
+        for path in (self.root / 'blobs').glob('*/*.pdf'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        blobs.sort()
+        for _, size, path in blobs:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def read_meta(self, name):
+        try:
+            return json.loads(self._meta_path(name).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def write_meta(self, name, data):
+        self._atomic_write(self._meta_path(name), json.dumps(data).encode())
+
+    def clear_meta(self, keep=()):
+        for path in (self.root / 'index').glob('*.json'):
+            if path.stem not in keep:
+                path.unlink(missing_ok=True)
+
+
+class ReportCache:
+    GENERATION = 'generation'
+
+    @staticmethod
+    def storage():
+        backend = import_string(settings.REPORT_CACHE_BACKEND)
+        return backend(settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_MAX_BYTES)
+
+    @staticmethod
+    def generation():
+        # Identificador del estado actual del inventario; cambia con cada escritura
+        storage = ReportCache.storage()
+        meta = storage.read_meta(ReportCache.GENERATION)
+        if meta is None:
+            meta = {"id": uuid.uuid4().hex}
+            storage.write_meta(ReportCache.GENERATION, meta)
+        return meta["id"]
+
+    @staticmethod
+    def invalidate():
+        ReportCache._rotate()
+        # Un reporte generado entre esta rotación y el commit lee los datos anteriores y los
+        # guarda bajo la generación nueva: se vuelve a rotar al confirmar
+        transaction.on_commit(ReportCache._rotate)
+
+    @staticmethod
+    def _rotate():
+        storage = ReportCache.storage()
+        storage.write_meta(ReportCache.GENERATION, {"id": uuid.uuid4().hex})
+        storage.clear_meta(keep=(ReportCache.GENERATION,))
+
+    @staticmethod
+    def content_key(state_digest, ai_analysis, tx_hash, currency=None):
+        payload = json.dumps([state_digest, ai_analysis, tx_hash or '', currency or ''])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _index_name(generation, tx_hash, currency=None):
+        variant = f"{tx_hash or ''}|{currency or ''}"
+        return f"{generation}-{hashlib.sha256(variant.encode()).hexdigest()[:32]}"
+
+    @staticmethod
+    def get(generation, tx_hash, currency=None):
+        if not settings.REPORT_CACHE_ENABLED:
+            return None
+        storage = ReportCache.storage()
+        entry = storage.read_meta(ReportCache._index_name(generation, tx_hash, currency))
+        if entry is None:
+            Metrics.cache('reports', False)
+            return None
+        if hasattr(storage, 'open'):
+            blob = storage.open(entry["key"])
+            artifact = ReportArtifact(blob) if blob is not None else None
+        else:
+            pdf_content = storage.get(entry["key"])
+            artifact = ReportArtifact.from_bytes(pdf_content) if pdf_content is not None else None
+        Metrics.cache('reports', artifact is not None)
+        if artifact is None:
+            return None
+        return entry["ai_analysis"], artifact
+
+    @staticmethod
+    def put(generation, tx_hash, state_digest, ai_analysis, artifact, currency=None):
+        if not settings.REPORT_CACHE_ENABLED:
+            return None
+        storage = ReportCache.storage()
+        key = ReportCache.content_key(state_digest, ai_analysis, tx_hash, currency)
+        storage.put(key, artifact.open())
+        storage.write_meta(
+            ReportCache._index_name(generation, tx_hash, currency),
+            {"key": key, "ai_analysis": ai_analysis},
+        )
+        return key
@@ -0,0 +1,154 @@
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from infrastructure.models import ReportJob
+
+
+class BackgroundWorkerPool:
+    """Pool de hilos locales que drena una cola persistida en base de datos."""
+
+    def __init__(self, name, claim, process, size, poll_interval):
+        self.name = name
+        self.claim = claim
+        self.process = process
+        self.size = size
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self, daemon=True):
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"{self.name}-{i}", daemon=daemon)
+            for i in range(self.size)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wakeup.set()
+
+    def run_once(self):
+        # Reclama y procesa un único elemento. Devuelve False si la cola está vacía.
+        item = self.claim()
+        if item is None:
+            return False
+        self.process(item)
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                print(f"{self.name}: Worker error: {str(e)}")
+                worked = False
+            finally:
+                close_old_connections()
+            if not worked:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+        connection.close()
+
+
+class ReportJobQueue:
+    _pool = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enqueue(email=None, tx_hash=None, send_email=False, currency=None):
+        job = ReportJob.objects.create(email=email, tx_hash=tx_hash, send_email=send_email, currency=currency or '')
+        if ReportJobQueue._pool is not None:
+            ReportJobQueue._pool.wake()
+        return job
+
+    @staticmethod
+    def claim_next():
+        with transaction.atomic():
+            candidates = ReportJob.objects.filter(status=ReportJob.Status.PENDING).order_by('created_at')
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            job = candidates.first()
+            if job is None:
+                return None
+            # El UPDATE condicionado es la garantía real de que sólo un worker toma el trabajo
+            claimed = ReportJob.objects.filter(pk=job.pk, status=ReportJob.Status.PENDING).update(
+                status=ReportJob.Status.RUNNING,
+                started_at=timezone.now(),
+                attempts=job.attempts + 1,
+            )
+        if not claimed:
+            return None
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def requeue_stale():
+        limit = timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+        return ReportJob.objects.filter(
+            status=ReportJob.Status.RUNNING, started_at__lt=limit
+        ).update(status=ReportJob.Status.PENDING, started_at=None)
+
+    @staticmethod
+    def process(job, handler):
+        try:
+            pdf_content = handler(job)
+        except Exception as e:
+            print(f"ReportJobQueue: Job {job.id} failed: {str(e)}")
+            job.status = ReportJob.Status.FAILED
+            job.error = str(e)
+        else:
+            job.status = ReportJob.Status.DONE
+            job.pdf_content = pdf_content
+            job.error = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'pdf_content', 'error', 'finished_at'])
+        return job
+
+    @staticmethod
+    def build_pool(handler, size=None):
+        return BackgroundWorkerPool(
+            name='report-worker',
+            claim=ReportJobQueue.claim_next,
+            process=lambda job: ReportJobQueue.process(job, handler),
+            size=size or settings.REPORT_WORKERS,
+            poll_interval=settings.REPORT_JOB_POLL_INTERVAL,
+        )
+
+    @staticmethod
+    def start_workers(handler):
+        # Idempotente: arranca el pool del proceso una sola vez
+        if not settings.REPORT_WORKERS_AUTOSTART or settings.REPORT_WORKERS < 1:
+            return None
+        with ReportJobQueue._lock:
+            if ReportJobQueue._pool is None or not ReportJobQueue._pool.running:
+                ReportJobQueue.requeue_stale()
+                ReportJobQueue._pool = ReportJobQueue.build_pool(handler)
+                ReportJobQueue._pool.start()
+        return ReportJobQueue._pool
+
+    @staticmethod
+    def run_pending(handler):
+        # Drena la cola en el hilo actual (comando de gestión y tests)
+        pool = ReportJobQueue.build_pool(handler, size=1)
+        processed = 0
+        while pool.run_once():
+            processed += 1
+        return processed
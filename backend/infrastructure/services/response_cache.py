@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.cache import caches
+from infrastructure.services.metrics import Metrics
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+
+class ResponseCache:
+    """
+    Cuerpos de respuesta ya renderizados (bytes JSON) de los listados y
+    detalles. La clave incluye la versión del inventario del ámbito afectado,
+    así que una escritura deja obsoletas sólo las entradas de ese ámbito y no
+    hace falta borrar nada: la LRU/TTL del backend las expulsa.
+    """
+
+    @staticmethod
+    def key(scope, version, digest):
+        return f"response:{scope}:{version}:{digest}"
+
+    @staticmethod
+    def get(key):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        cached = caches[RESPONSE_CACHE_ALIAS].get(key)
+        Metrics.cache(RESPONSE_CACHE_ALIAS, cached is not None)
+        return cached
+
+    @staticmethod
+    def put(key, content, content_type):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        caches[RESPONSE_CACHE_ALIAS].set(
+            key, {"content": content, "content_type": content_type}, settings.RESPONSE_CACHE_TTL
+        )
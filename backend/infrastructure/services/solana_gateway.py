@@ -0,0 +1,113 @@
+import threading
+import time
+from django.conf import settings
+from solana.rpc.api import Client
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+from infrastructure.services.metrics import Metrics
+from shared_domain.exceptions import InfrastructureError
+
+# Standard Solana Memo Program (This one is valid Base58)
+MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
+
+
+class SolanaGateway:
+    """
+    Cliente Solana de larga vida por proceso: conexión HTTP keep-alive
+    reutilizada, keypair cargado una vez y blockhash reciente en caché que se
+    refresca en segundo plano dentro de su ventana de validez.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, client, keypair, blockhash_ttl=30.0, refresh_interval=None):
+        self.client = client
+        self.keypair = keypair
+        self.blockhash_ttl = blockhash_ttl
+        self.refresh_interval = refresh_interval
+        self._blockhash = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    client=Client(settings.SOLANA_RPC_URL, timeout=settings.SOLANA_RPC_TIMEOUT),
+                    keypair=cls.load_keypair(settings.SOLANA_PRIVATE_KEY),
+                    blockhash_ttl=settings.SOLANA_BLOCKHASH_TTL,
+                    refresh_interval=settings.SOLANA_BLOCKHASH_REFRESH_INTERVAL,
+                )
+            return cls._instance
+
+    @staticmethod
+    def load_keypair(private_key):
+        # Try to load as hex (seed)
+        try:
+            private_key_bytes = bytes.fromhex(private_key)
+            if len(private_key_bytes) == 64:
+                return Keypair.from_bytes(private_key_bytes)
+            return Keypair.from_seed(private_key_bytes[:32])
+        except ValueError:
+            # If not hex, try base58 or other formats if needed, but hex is common in these tests
+            raise InfrastructureError("La llave privada de Solana no tiene un formato hexadecimal válido.")
+
+    def _fetch_blockhash(self):
+        try:
+            with Metrics.call('solana', 'get_latest_blockhash'):
+                blockhash = self.client.get_latest_blockhash().value.blockhash
+        except Exception as e:
+            raise InfrastructureError(f"No se pudo obtener el blockhash de Solana: {str(e)}")
+        with self._lock:
+            self._blockhash = blockhash
+            self._fetched_at = time.monotonic()
+        return blockhash
+
+    def recent_blockhash(self):
+        self._ensure_refresher()
+        with self._lock:
+            if self._blockhash is not None and time.monotonic() - self._fetched_at < self.blockhash_ttl:
+                return self._blockhash
+        return self._fetch_blockhash()
+
+    def invalidate_blockhash(self):
+        with self._lock:
+            self._blockhash = None
+
+    def _ensure_refresher(self):
+        if not self.refresh_interval or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name='solana-blockhash', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self._fetch_blockhash()
+            except InfrastructureError as e:
+                print(f"SolanaGateway: Blockhash refresh failed: {str(e)}")
+            time.sleep(self.refresh_interval)
+
+    def send_memo(self, memo):
+        memo_instruction = Instruction(MEMO_PROGRAM_ID, memo.encode('utf-8'), [])
+        print(f"Certifying memo: {memo} with pubkey: {self.keypair.pubkey()}")
+
+        for attempt in range(2):
+            blockhash = self.recent_blockhash()
+            message = Message.new_with_blockhash([memo_instruction], self.keypair.pubkey(), blockhash)
+            txn = Transaction([self.keypair], message, blockhash)
+            try:
+                with Metrics.call('solana', 'send_transaction'):
+                    response = self.client.send_transaction(txn)
+                return str(response.value)
+            except Exception as e:
+                if attempt == 0 and 'blockhash' in str(e).lower():
+                    # Blockhash caducado: se descarta el de la caché y se reintenta una vez
+                    self.invalidate_blockhash()
+                    continue
+                raise InfrastructureError(f"Error al enviar la transacción a Solana: {str(e)}")
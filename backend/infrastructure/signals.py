@@ -0,0 +1,94 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from shared_domain.models import Empresa, Producto
+from infrastructure.models import ExchangeRate
+from infrastructure.services.currency_service import ExchangeRateService
+from infrastructure.services.inventory_version import InventoryVersion
+from infrastructure.services.merkle_tree_service import MerkleTreeService
+from infrastructure.services.price_index import PriceIndexService
+from infrastructure.services.product_search import ProductSearchService
+from infrastructure.services.report_cache import ReportCache
+
+# bulk_create no emite post_save: las importaciones masivas avisan por lote con esta señal
+productos_importados = Signal()
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=Empresa)
+@receiver(post_delete, sender=Empresa)
+def invalidar_cache_reportes(sender, **kwargs):
+    ReportCache.invalidate()
+
+
+@receiver(pre_save, sender=Producto)
+def recordar_empresa_anterior(sender, instance, **kwargs):
+    # Si el producto cambia de empresa, la versión de la empresa anterior también debe cambiar
+    instance._empresa_anterior = None
+    if instance.pk:
+        instance._empresa_anterior = (
+            Producto.objects.filter(pk=instance.pk).values_list('empresa_id', flat=True).first()
+        )
+
+
+@receiver(pre_save, sender=Empresa)
+def recordar_nombre_empresa(sender, instance, **kwargs):
+    # El nombre de la empresa forma parte del documento de búsqueda de sus productos
+    instance._nombre_anterior = Empresa.objects.filter(pk=instance.pk).values_list('nombre', flat=True).first()
+
+
+@receiver(post_save, sender=Empresa)
+def reindexar_empresa(sender, instance, created, **kwargs):
+    anterior = getattr(instance, '_nombre_anterior', None)
+    if not created and anterior is not None and anterior != instance.nombre:
+        ProductSearchService.sync_empresa(instance.nit)
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def versionar_producto(sender, instance, **kwargs):
+    InventoryVersion.bump_productos([instance], [getattr(instance, '_empresa_anterior', None)])
+
+
+@receiver(post_save, sender=Empresa)
+@receiver(post_delete, sender=Empresa)
+def versionar_empresa(sender, instance, **kwargs):
+    InventoryVersion.bump(InventoryVersion.empresa(instance.nit))
+
+
+@receiver(post_save, sender=Producto)
+def actualizar_hoja_merkle(sender, instance, **kwargs):
+    MerkleTreeService.upsert(instance)
+
+
+@receiver(post_save, sender=Producto)
+def indexar_precios(sender, instance, **kwargs):
+    PriceIndexService.sync(instance)
+
+
+@receiver(post_save, sender=Producto)
+def indexar_busqueda(sender, instance, **kwargs):
+    ProductSearchService.sync(instance)
+
+
+@receiver(post_delete, sender=Producto)
+def eliminar_hoja_merkle(sender, instance, **kwargs):
+    MerkleTreeService.remove(instance.codigo)
+    ProductSearchService.remove(instance.codigo)
+
+
+@receiver(productos_importados, sender=Producto)
+def actualizar_lote_importado(sender, productos, empresas_anteriores=(), **kwargs):
+    MerkleTreeService.upsert_many(productos)
+    PriceIndexService.sync_many(productos)
+    ProductSearchService.sync_many(productos)
+    InventoryVersion.bump_productos(productos, empresas_anteriores)
+    ReportCache.invalidate()
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def recargar_tasas_cambio(sender, **kwargs):
+    # Los reportes en otra moneda dependen de las tasas
+    ExchangeRateService.invalidate()
+    ReportCache.invalidate()
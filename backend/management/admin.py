@@ -1,7 +1,11 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Case, IntegerField, Value, When
 from .models import User
+from django.conf import settings
 from shared_domain.models import Empresa, Producto
+from infrastructure.services.product_search import ProductSearchService
 
 # Register your models here.
 admin.site.register(User, UserAdmin)
@@ -16,3 +20,21 @@ class ProductoAdmin(admin.ModelAdmin):
     list_display = ('codigo', 'nombre', 'empresa')
     list_filter = ('empresa',)
     search_fields = ('codigo', 'nombre')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Los primeros ADMIN_SEARCH_LIMIT resultados del índice van delante, por relevancia; el icontains
+        # de search_fields añade detrás el resto, incluidas las subcadenas de código que el índice no ve
+        if not search_term.strip():
+            return queryset, False
+        limit = settings.ADMIN_SEARCH_LIMIT
+        codigos = [codigo for codigo, _ in ProductSearchService.search(search_term, limit)]
+        relevancia = Case(
+            *[When(codigo=codigo, then=Value(posicion)) for posicion, codigo in enumerate(codigos)],
+            default=Value(limit), output_field=IntegerField(),
+        )
+        coincidencias, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        resultados = (queryset.filter(codigo__in=codigos) | coincidencias).annotate(_relevancia=relevancia)
+        # El changelist ordena antes de buscar: sin orden elegido por columna se reordena por relevancia
+        if ORDER_VAR not in request.GET:
+            resultados = resultados.order_by('_relevancia', 'codigo')
+        return resultados, may_have_duplicates
@@ -0,0 +1,323 @@
+import contextlib
+import hashlib
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from infrastructure.services.ai_service import AIService
+from infrastructure.services.blockchain_service import BlockchainService
+from infrastructure.services.email_outbox import EmailOutbox
+from infrastructure.signals import productos_importados
+from management.models import User
+from shared_domain.models import Empresa, Producto
+
+# Vocabulario del catálogo sintético: nombres y descripciones con acentos, como los reales
+TIPOS = ('Camiseta', 'Tornillo', 'Cable', 'Lámpara', 'Silla', 'Cuaderno', 'Taladro', 'Café', 'Batería', 'Mochila')
+MATERIALES = ('algodón', 'acero', 'cobre', 'bambú', 'aluminio', 'cuero', 'vidrio', 'nogal', 'plástico reciclado')
+ADJETIVOS = ('ergonómico', 'resistente', 'compacto', 'premium', 'económico', 'inalámbrico', 'térmico', 'ligero')
+CIUDADES = ('Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Pereira', 'Bucaramanga')
+# Moneda -> (unidades por USD, decimales)
+MONEDAS = {"USD": (1.0, 2), "COP": (4000.0, 0), "EUR": (0.92, 2), "MXN": (17.0, 2)}
+
+
+class CatalogGenerator:
+    """
+    Catálogo sintético reproducible (misma semilla, mismos datos) de N empresas
+    por M productos. Se carga con bulk_create y la señal `productos_importados`,
+    igual que una importación masiva: los índices de precios, búsqueda y Merkle
+    quedan al día sin pasar producto a producto por los signals de save().
+    """
+
+    def __init__(self, empresas, productos_por_empresa, seed=42, batch_size=2000):
+        self.empresas = empresas
+        self.productos_por_empresa = productos_por_empresa
+        self.batch_size = batch_size
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def nit(e):
+        return f"9{e:08d}"
+
+    @staticmethod
+    def codigo(e, p):
+        return f"E{e:04d}-P{p:06d}"
+
+    def precios(self):
+        # Precio base log-normal en USD; cada producto se vende en 1-3 monedas además del USD
+        base = self.rng.lognormvariate(3, 1.2)
+        monedas = ['USD'] + self.rng.sample(sorted(set(MONEDAS) - {'USD'}), self.rng.randint(0, 3))
+        precios = {}
+        for moneda in monedas:
+            tasa, decimales = MONEDAS[moneda]
+            valor = round(base * tasa * self.rng.uniform(0.95, 1.05), decimales)
+            precios[moneda] = int(valor) if decimales == 0 else valor
+        return precios
+
+    def producto(self, e, p):
+        tipo, material, adjetivo = self.rng.choice(TIPOS), self.rng.choice(MATERIALES), self.rng.choice(ADJETIVOS)
+        return Producto(
+            codigo=self.codigo(e, p),
+            nombre=f"{tipo} {adjetivo} de {material} {p}",
+            caracteristicas=f"{tipo} de {material}, acabado {adjetivo}. Lote {self.rng.randint(1000, 9999)}.",
+            precios=self.precios(),
+            empresa_id=self.nit(e),
+        )
+
+    def iter_empresas(self):
+        rng = random.Random(f"{self.seed}:empresas")
+        for e in range(self.empresas):
+            yield Empresa(
+                nit=self.nit(e),
+                nombre=f"Empresa {e} S.A.S.",
+                direccion=f"Calle {rng.randint(1, 150)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}, {rng.choice(CIUDADES)}",
+                telefono=f"60{rng.randint(10000000, 99999999)}",
+            )
+
+    def iter_productos(self):
+        self.rng = random.Random(self.seed)
+        for e in range(self.empresas):
+            for p in range(self.productos_por_empresa):
+                yield self.producto(e, p)
+
+    def load(self):
+        Empresa.objects.bulk_create(list(self.iter_empresas()), batch_size=self.batch_size)
+        total = 0
+        lote = []
+        for producto in self.iter_productos():
+            lote.append(producto)
+            if len(lote) >= self.batch_size:
+                total += self._guardar(lote)
+                lote = []
+        if lote:
+            total += self._guardar(lote)
+        return {"empresas": self.empresas, "productos": total}
+
+    @staticmethod
+    def _guardar(lote):
+        Producto.objects.bulk_create(lote)
+        productos_importados.send(sender=Producto, productos=lote, empresas_anteriores=())
+        return len(lote)
+
+
+@contextlib.contextmanager
+def offline_services(ai_latency=0.0, blockchain_latency=0.0, email_latency=0.0):
+    """
+    Sustitutos sin red de Gemini, Solana y Resend. Cada uno espera la latencia
+    indicada (segundos) para simular el proveedor y devuelve una respuesta con
+    la misma forma que la real.
+    """
+    def analisis(productos, grouped=False):
+        time.sleep(ai_latency)
+        total = sum(1 for _ in productos) if grouped else len(productos)
+        return f"Análisis offline de {total} productos."
+
+    def certificar(data_string):
+        time.sleep(blockchain_latency)
+        data_hash = hashlib.sha256(data_string.encode()).hexdigest()
+        return {"txHash": f"offline_{data_hash[:10]}", "pdf_hash": data_hash, "status": "OFFLINE"}
+
+    with override_settings(
+        EMAIL_PROVIDER='infrastructure.services.email_service.LocalEmailProvider',
+        EMAIL_LOCAL_LATENCY=email_latency,
+        EMAIL_WORKERS_AUTOSTART=False,
+    ), patch.object(AIService, 'generate_inventory_analysis', analisis), \
+            patch.object(BlockchainService, 'certify_data', certificar):
+        EmailOutbox.reset_provider()
+        try:
+            yield
+        finally:
+            EmailOutbox.reset_provider()
+
+
+def percentile(values, q):
+    # Interpolación lineal entre muestras ordenadas (como numpy.percentile por defecto)
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class BenchmarkSuite:
+    """
+    Escenarios cronometrados contra la pila completa (URL, middleware, DRF) con
+    el cliente de pruebas de Django. Por escenario: una ejecución de
+    calentamiento, N medidas de latencia y consultas SQL, y una ejecución
+    extra con tracemalloc para el pico de memoria (tracemalloc frena el
+    código, por eso no se mezcla con los tiempos).
+
+    Debe ejecutarse contra una base de datos desechable: el comando
+    `run_benchmarks` crea y destruye una base de pruebas.
+    """
+    # Escenarios costosos: como mucho este número de medidas
+    HEAVY_ITERATIONS = 5
+
+    def __init__(self, empresas=20, productos=250, iterations=20, seed=42, latency=None, scenarios=None):
+        self.empresas = empresas
+        self.productos = productos
+        self.iterations = iterations
+        self.seed = seed
+        self.latency = {"ai_latency": 0.0, "blockchain_latency": 0.0, "email_latency": 0.0, **(latency or {})}
+        self.selected = scenarios
+        self.rng = random.Random(seed)
+        self.client = None
+        self.codigos = []
+
+    def scenarios(self):
+        # nombre -> (función(iteración), escenario costoso)
+        return {
+            "list_productos": (self.list_productos, False),
+            "list_productos_cached": (self.list_productos_cached, False),
+            "retrieve_producto": (self.retrieve_producto, False),
+            "list_empresas": (self.list_empresas, False),
+            "search_productos": (self.search_productos, False),
+            "create_producto": (self.create_producto, False),
+            "generate_pdf": (self.generate_pdf, True),
+            "generate_pdf_cached": (self.generate_pdf_cached, False),
+            "send_pdf_email": (self.send_pdf_email, True),
+            "certify_inventory": (self.certify_inventory, True),
+            "admin_changelist": (self.admin_changelist, False),
+        }
+
+    def run(self):
+        cache_settings = {
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+            for alias in settings.CACHES
+        }
+        # Cachés en memoria y directorio de reportes propio: las medidas no dependen de Redis ni de ejecuciones anteriores.
+        # Todo corre en un único proceso, así que los ETag y la caché de respuestas son válidos con locmem
+        with tempfile.TemporaryDirectory() as report_dir, \
+                override_settings(CACHES=cache_settings, REPORT_CACHE_DIR=report_dir, CONDITIONAL_GET='on'), \
+                offline_services(**self.latency):
+            inicio = time.perf_counter()
+            catalogo = CatalogGenerator(self.empresas, self.productos, seed=self.seed).load()
+            catalogo["load_seconds"] = round(time.perf_counter() - inicio, 3)
+            self.codigos = list(Producto.objects.values_list('codigo', flat=True))
+            self.client = self._client()
+
+            resultados = {}
+            for nombre, (funcion, costoso) in self.scenarios().items():
+                if self.selected and nombre not in self.selected:
+                    continue
+                iteraciones = min(self.iterations, self.HEAVY_ITERATIONS) if costoso else self.iterations
+                resultados[nombre] = self.measure(funcion, iteraciones)
+
+        return {
+            "meta": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "seed": self.seed,
+                "iterations": self.iterations,
+                **self.latency,
+            },
+            "catalog": catalogo,
+            "scenarios": resultados,
+        }
+
+    def _client(self):
+        user = User.objects.create_superuser(
+            correo='benchmark@stockpro.local', username='benchmark', password=None, is_administrator=True
+        )
+        client = APIClient()
+        # JWT para la API y sesión para el admin
+        client.force_authenticate(user=user)
+        client.force_login(user)
+        return client
+
+    def measure(self, funcion, iteraciones):
+        funcion(-1)
+        tiempos, consultas, estados = [], [], []
+        for i in range(iteraciones):
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                estado = funcion(i)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+            estados.append(estado)
+
+        tracemalloc.start()
+        try:
+            funcion(iteraciones)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "iterations": iteraciones,
+            "p50_ms": round(percentile(tiempos, 50), 3),
+            "p95_ms": round(percentile(tiempos, 95), 3),
+            "mean_ms": round(statistics.fmean(tiempos), 3),
+            "max_ms": round(max(tiempos), 3),
+            "queries_p50": percentile(consultas, 50),
+            "queries_max": max(consultas),
+            "peak_memory_kb": round(pico / 1024, 1),
+            "errors": sum(1 for estado in estados if estado >= 400),
+        }
+
+    def _get(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            # El cuerpo se genera al consumirlo: forma parte de la medida
+            response.getvalue()
+        return response.status_code
+
+    def list_productos(self, i):
+        caches['responses'].clear()
+        return self._get('/api/productos/')
+
+    def list_productos_cached(self, i):
+        return self._get('/api/productos/')
+
+    def retrieve_producto(self, i):
+        caches['responses'].clear()
+        return self._get(f'/api/productos/{self.rng.choice(self.codigos)}/')
+
+    def list_empresas(self, i):
+        caches['responses'].clear()
+        return self._get('/api/empresas/')
+
+    def search_productos(self, i):
+        return self._get(f'/api/productos/search/?q={self.rng.choice(TIPOS)} {self.rng.choice(MATERIALES)[:4]}')
+
+    def create_producto(self, i):
+        response = self.client.post('/api/productos/', {
+            "codigo": f"BENCH-{self.seed}-{i + 1}",
+            "nombre": f"Producto de benchmark {i}",
+            "caracteristicas": "Alta individual",
+            "precios": {"USD": 10 + i, "COP": (10 + i) * 4000},
+            "empresa": CatalogGenerator.nit(i % max(self.empresas, 1)),
+        }, format='json')
+        return response.status_code
+
+    def generate_pdf(self, i):
+        with override_settings(REPORT_CACHE_ENABLED=False):
+            return self._get('/api/productos/generate_inventory_pdf/')
+
+    def generate_pdf_cached(self, i):
+        return self._get('/api/productos/generate_inventory_pdf/')
+
+    def send_pdf_email(self, i):
+        response = self.client.post(
+            '/api/productos/send_inventory_pdf/', {"email": "benchmark@stockpro.local"}, format='json'
+        )
+        # Incluye el envío por la bandeja de salida con el proveedor local
+        EmailOutbox.run_pending()
+        return response.status_code
+
+    def certify_inventory(self, i):
+        return self.client.post('/api/productos/certify_inventory/').status_code
+
+    def admin_changelist(self, i):
+        return self._get(reverse('admin:shared_domain_producto_changelist'))
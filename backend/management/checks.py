@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core import checks
+from infrastructure.services.inventory_version import InventoryVersion
+from infrastructure.services.metrics import Metrics
+
+
+@checks.register(checks.Tags.caches)
+def check_conditional_get_cache(app_configs, **kwargs):
+    # El contador de versiones del inventario vive en la caché por defecto: debe ser compartida entre workers
+    if InventoryVersion.shared_cache():
+        return []
+    if settings.CONDITIONAL_GET == 'auto':
+        return [checks.Warning(
+            "La caché por defecto es local al proceso (locmemcache://): ETag/304 y la caché de respuestas quedan desactivados.",
+            hint="Configura un CACHE_URL compartido (p. ej. redis://) o CONDITIONAL_GET=on si sólo hay un proceso.",
+            id='management.W001',
+        )]
+    if settings.CONDITIONAL_GET == 'on':
+        return [checks.Warning(
+            "CONDITIONAL_GET=on con una caché por defecto local al proceso: con varios workers se sirven respuestas obsoletas.",
+            hint="Configura un CACHE_URL compartido (p. ej. redis://).",
+            id='management.W002',
+        )]
+    return []
+
+
+@checks.register(checks.Tags.security)
+def check_metrics_token(app_configs, **kwargs):
+    if Metrics.enabled() and not settings.METRICS_TOKEN and not settings.DEBUG:
+        return [checks.Warning(
+            "METRICS_ENABLED sin METRICS_TOKEN: /api/metrics/ responde 404 con DEBUG=False.",
+            hint="Define METRICS_TOKEN y configura Prometheus con 'Authorization: Bearer <token>'.",
+            id='management.W003',
+        )]
+    return []
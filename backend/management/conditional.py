@@ -0,0 +1,78 @@
+import hashlib
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from infrastructure.services.inventory_version import GLOBAL, InventoryVersion
+from infrastructure.services.response_cache import ResponseCache
+
+
+class ConditionalGetMixin:
+    """
+    ETag y Last-Modified para `list` y `retrieve` derivados de InventoryVersion.
+    Un If-None-Match vigente se responde con 304 antes de construir el
+    queryset: el sondeo sin cambios cuesta una lectura de caché. Si el cliente
+    no tiene la representación, se sirve el JSON ya renderizado de
+    ResponseCache; sólo en un fallo se consulta la base y se serializa.
+    Si InventoryVersion no está habilitado (caché por defecto local al
+    proceso) se responde siempre sin validadores ni caché.
+    """
+
+    def get_version_scope(self):
+        return GLOBAL
+
+    def get_etag_variant(self):
+        # Estado adicional (aparte del inventario) del que depende la respuesta
+        return ''
+
+    def get_validators(self, request):
+        """Devuelve (etag, última modificación, clave en la caché de respuestas)."""
+        scope = self.get_version_scope()
+        version, modified = InventoryVersion.current(scope)
+        # La misma versión produce representaciones distintas según la URL (página, filtros) y el Accept
+        variant = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}|{self.get_etag_variant()}"
+        digest = hashlib.sha256(variant.encode()).hexdigest()[:16]
+        return f'"{version}-{digest}"', modified, ResponseCache.key(scope, version, digest)
+
+    @staticmethod
+    def _not_modified(request, etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        # Comparación débil (RFC 9110 §13.1.2): se ignora el prefijo W/
+        return '*' in etags or etag in (e.removeprefix('W/') for e in etags)
+
+    def conditional_response(self, request, handler):
+        if not InventoryVersion.enabled():
+            return handler()
+        etag, modified, cache_key = self.get_validators(request)
+        if self._not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif (cached := ResponseCache.get(cache_key)) is not None:
+            response = HttpResponse(cached["content"], content_type=cached["content_type"])
+        else:
+            response = handler()
+            # Se guarda en finalize_response, cuando ya se conoce el renderer negociado
+            response.response_cache_key = cache_key
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(modified)
+            # El cliente puede guardar la respuesta pero debe revalidarla en cada uso
+            response['Cache-Control'] = 'no-cache'
+            response['Vary'] = 'Accept'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cache_key = getattr(response, 'response_cache_key', None)
+        if cache_key and isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+            response.render()
+            ResponseCache.put(cache_key, response.content, response['Content-Type'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,54 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from management.models import Producto
+from management.renderers import FastJSONRenderer
+from management.serializers import ProductoSerializer
+
+class Command(BaseCommand):
+    help = (
+        "Mide el coste por fila del listado de productos: modelos + ModelSerializer + JSONRenderer "
+        "frente a values() + ValuesSerializerMixin + FastJSONRenderer. No usa la base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5, help="Repeticiones; se informa la mejor")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        columnas = ('codigo', 'nombre', 'caracteristicas', 'precios', 'empresa_id')
+        # Filas tal como las devuelve el cursor de la base de datos
+        tuplas = [
+            (
+                f"P{i:07d}", f"Producto {i}", f"Características del producto {i}, con acentos y ñ",
+                {"USD": round(i * 1.37, 2), "COP": i * 4000, "EUR": round(i * 1.21, 2)}, f"9{i % 50:08d}",
+            )
+            for i in range(rows)
+        ]
+
+        def estandar():
+            instancias = [Producto.from_db('default', columnas, fila) for fila in tuplas]
+            return JSONRenderer().render(ProductoSerializer(instancias, many=True).data)
+
+        def rapida():
+            nombres = ProductoSerializer.values_lookups()
+            return FastJSONRenderer().render(ProductoSerializer.represent(dict(zip(nombres, fila)) for fila in tuplas))
+
+        if estandar() != rapida():
+            raise CommandError("La ruta rápida no produce la misma salida que ModelSerializer + JSONRenderer.")
+
+        resultado = {"rows": rows}
+        for nombre, funcion in (("standard", estandar), ("fast", rapida)):
+            mejor = min(self._medir(funcion) for _ in range(options['repeat']))
+            resultado[f"{nombre}_ms"] = round(mejor * 1000, 2)
+            resultado[f"{nombre}_us_per_row"] = round(mejor * 1e6 / max(rows, 1), 3)
+        resultado["speedup"] = round(resultado["standard_ms"] / max(resultado["fast_ms"], 1e-9), 2)
+        self.stdout.write(json.dumps(resultado))
+
+    @staticmethod
+    def _medir(funcion):
+        inicio = time.perf_counter()
+        funcion()
+        return time.perf_counter() - inicio
@@ -0,0 +1,24 @@
+import sys
+from django.core.management.base import BaseCommand
+from application.use_cases.producto import ExportarProductosUseCase
+from infrastructure.services.product_export import FORMATS
+
+class Command(BaseCommand):
+    help = "Exporta el catálogo completo en streaming como NDJSON o CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help="Comprime la salida con gzip")
+        parser.add_argument('--output', '-o', help="Fichero de salida (por defecto la salida estándar)")
+
+    def handle(self, *args, **options):
+        exporter = ExportarProductosUseCase.ejecutar(options['file_format'], compress=options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in exporter.stream():
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Catálogo exportado en {options['output']}"))
+        else:
+            for chunk in exporter.stream():
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
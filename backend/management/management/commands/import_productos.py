@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from application.use_cases.producto import ImportarProductosUseCase
+from infrastructure.services.product_import import FORMATS, ProductImportParser
+
+class Command(BaseCommand):
+    help = "Importa productos de forma masiva desde un fichero CSV o NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Ruta del fichero a importar")
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, help="Por defecto se deduce de la extensión")
+        parser.add_argument('--batch-size', type=int, default=None, help="Filas por lote (por defecto IMPORT_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        file_format = ProductImportParser.detect_format(options['file_format'], options['path'])
+        with open(options['path'], 'rb') as lines:
+            reporte = ImportarProductosUseCase.ejecutar(lines, file_format, batch_size=options['batch_size'])
+
+        for error in reporte["errors"]:
+            self.stderr.write(f"Línea {error['line']} ({error['codigo'] or '-'}): {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Filas: {reporte['total']}, creados: {reporte['created']}, "
+            f"actualizados: {reporte['updated']}, con error: {reporte['failed']}"
+        ))
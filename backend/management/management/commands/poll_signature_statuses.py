@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from infrastructure.services.async_blockchain_service import SignatureStatusPoller
+
+class Command(BaseCommand):
+    help = "Actualiza el estado de las certificaciones enviadas a Solana que siguen sin confirmar."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Consulta las firmas pendientes una vez y termina.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            updates = SignatureStatusPoller.build().poll()
+            self.stdout.write(self.style.SUCCESS(f"{len(updates)} certificaciones actualizadas."))
+            return
+
+        pool = SignatureStatusPoller.build_pool()
+        pool.start(daemon=False)
+        self.stdout.write("Seguimiento de firmas iniciado.")
+        try:
+            while pool.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Deteniendo seguimiento...")
+            pool.stop()
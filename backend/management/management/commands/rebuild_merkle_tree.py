@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from infrastructure.services.merkle_tree_service import MerkleTreeService
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el árbol de Merkle del inventario a partir de la tabla de productos. "
+        "Las pruebas contra raíces ya certificadas siguen siendo válidas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Borra además los nodos de versiones que ninguna certificación referencia",
+        )
+
+    def handle(self, *args, **options):
+        state = MerkleTreeService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Árbol reconstruido: {state.next_index} hojas, profundidad {state.depth}, "
+            f"versión {state.version}, raíz {state.root}"
+        ))
+        if options['prune']:
+            eliminados = MerkleTreeService.prune()
+            self.stdout.write(self.style.SUCCESS(f"Nodos obsoletos eliminados: {eliminados}"))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from infrastructure.services.price_index import PriceIndexService
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla indexada de precios (producto_precio) a partir de Producto.precios."
+
+    def handle(self, *args, **options):
+        total = PriceIndexService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Índice de precios reconstruido: {total} filas."))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from infrastructure.services.product_search import ProductSearchService
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de productos (producto_busqueda)."
+
+    def handle(self, *args, **options):
+        total = ProductSearchService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido: {total} productos."))
@@ -0,0 +1,58 @@
+import contextlib
+import json
+import sys
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from management.benchmark import BenchmarkSuite
+
+class Command(BaseCommand):
+    help = (
+        "Carga un catálogo sintético en una base de datos de pruebas desechable y mide los escenarios "
+        "principales de la API con Gemini, Solana y Resend simulados. Imprime el resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresas', type=int, default=20)
+        parser.add_argument('--productos', type=int, default=250, help="Productos por empresa")
+        parser.add_argument('--iterations', type=int, default=20, help="Medidas por escenario")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--ai-latency', type=float, default=0.0, help="Segundos por análisis de IA simulado")
+        parser.add_argument('--blockchain-latency', type=float, default=0.0, help="Segundos por certificación simulada")
+        parser.add_argument('--email-latency', type=float, default=0.0, help="Segundos por envío de correo simulado")
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=sorted(BenchmarkSuite().scenarios()), help="Repetible; por defecto todos",
+        )
+        parser.add_argument('--output', help="Fichero JSON de salida (por defecto, la salida estándar)")
+
+    def handle(self, *args, **options):
+        suite = BenchmarkSuite(
+            empresas=options['empresas'],
+            productos=options['productos'],
+            iterations=options['iterations'],
+            seed=options['seed'],
+            latency={
+                "ai_latency": options['ai_latency'],
+                "blockchain_latency": options['blockchain_latency'],
+                "email_latency": options['email_latency'],
+            },
+            scenarios=options['scenarios'],
+        )
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            # Los print de los servicios van a stderr para no mezclarse con el JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                resultado = suite.run()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        salida = json.dumps(resultado, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(salida + '\n')
+            self.stderr.write(f"Resultados guardados en {options['output']}")
+        else:
+            self.stdout.write(salida)
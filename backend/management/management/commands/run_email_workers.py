@@ -0,0 +1,32 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from infrastructure.services.email_outbox import EmailOutbox
+
+class Command(BaseCommand):
+    help = "Envía la bandeja de salida de correos con un pool de workers dedicado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.EMAIL_WORKERS)
+        parser.add_argument('--once', action='store_true', help="Envía lo pendiente y termina.")
+        parser.add_argument('--retry-dead', action='store_true', help="Vuelve a encolar los correos descartados (DEAD).")
+
+    def handle(self, *args, **options):
+        EmailOutbox.requeue_stale()
+        if options['retry_dead']:
+            self.stdout.write(f"{EmailOutbox.retry_dead()} correos descartados re-encolados.")
+
+        if options['once']:
+            processed = EmailOutbox.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"{processed} correos procesados."))
+            return
+
+        pool = EmailOutbox.build_pool(size=options['workers'])
+        pool.start(daemon=False)
+        self.stdout.write(f"Workers de correo iniciados ({options['workers']}).")
+        try:
+            while pool.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Deteniendo workers...")
+            pool.stop()
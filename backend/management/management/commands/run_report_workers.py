@@ -0,0 +1,31 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from application.use_cases.reportes import ProcesarReporteJobUseCase
+from infrastructure.services.report_queue import ReportJobQueue
+
+class Command(BaseCommand):
+    help = "Procesa la cola de reportes de inventario con un pool de workers dedicado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.REPORT_WORKERS)
+        parser.add_argument('--once', action='store_true', help="Drena la cola pendiente y termina.")
+
+    def handle(self, *args, **options):
+        handler = ProcesarReporteJobUseCase.ejecutar
+        ReportJobQueue.requeue_stale()
+
+        if options['once']:
+            processed = ReportJobQueue.run_pending(handler)
+            self.stdout.write(self.style.SUCCESS(f"{processed} reportes procesados."))
+            return
+
+        pool = ReportJobQueue.build_pool(handler, size=options['workers'])
+        pool.start(daemon=False)
+        self.stdout.write(f"Workers de reportes iniciados ({options['workers']}).")
+        try:
+            while pool.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Deteniendo workers...")
+            pool.stop()
@@ -0,0 +1,104 @@
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from infrastructure.services.instrumentation import Instrumentation
+from infrastructure.services.metrics import Metrics
+
+logger = logging.getLogger('stockpro.requests')
+
+
+class InstrumentationMiddleware:
+    """
+    Tiempo de base de datos y de los servicios externos (IA, PDF, blockchain,
+    email) de cada petición: cabecera Server-Timing y una línea de log JSON.
+    Si la misma sentencia SQL se repite INSTRUMENTATION_NPLUSONE_THRESHOLD
+    veces o más, el log sale como WARNING con las sentencias sospechosas.
+
+    Con INSTRUMENTATION_ENABLED=False se retira del stack (MiddlewareNotUsed).
+    En respuestas en streaming sólo se mide hasta que la vista devuelve la respuesta.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        Instrumentation.install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = Instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            Instrumentation.stop(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = Instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            Instrumentation.stop(token)
+        return self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        response['Server-Timing'] = metrics.server_timing()
+
+        registro = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **metrics.as_dict(),
+        }
+        sospechosas = metrics.repeated(settings.INSTRUMENTATION_NPLUSONE_THRESHOLD)
+        if sospechosas:
+            registro["n_plus_one"] = [{"sql": sql[:300], "count": count} for sql, count in sospechosas]
+        lento = registro["duration_ms"] >= settings.INSTRUMENTATION_SLOW_REQUEST_MS
+        logger.log(logging.WARNING if sospechosas or lento else logging.INFO, json.dumps(registro, ensure_ascii=False))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Tasa y latencia de peticiones para Prometheus, etiquetadas con el nombre de
+    la ruta: en las rutas del router de DRF ('producto-list',
+    'producto-generate-inventory-pdf'...) nombre y método identifican la acción.
+    Etiquetar por nombre y no por path mantiene acotada la cardinalidad.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not Metrics.enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, inicio)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, inicio)
+        return response
+
+    @staticmethod
+    def observe(request, response, inicio):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        Metrics.observe_request(view, request.method, response.status_code, time.perf_counter() - inicio)
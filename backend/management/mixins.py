@@ -0,0 +1,21 @@
+from rest_framework.response import Response
+
+
+class ValuesListMixin:
+    """
+    `list` por la ruta rápida del serializer (ValuesSerializerMixin): la página
+    se lee con values() y se devuelve como dicts, sin instanciar modelos ni
+    ejecutar los campos de DRF por fila. La salida es la misma que la del
+    `list` estándar.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        queryset = self.filter_queryset(self.get_queryset())
+        # La paginación por cursor lee de cada fila las columnas del orden, aunque no se devuelvan
+        ordering = self.paginator.get_ordering(request, queryset, self) if self.paginator else ()
+        rows = serializer_class.project(queryset, extra=[field.lstrip('-') for field in ordering])
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer_class.represent(page))
+        return Response(serializer_class.represent(rows))
@@ -0,0 +1,138 @@
+import json
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación por cursor opaco sobre una clave única: cada página es un
+    `WHERE clave > cursor ORDER BY clave LIMIT n`, con coste constante sin
+    importar la profundidad. El total sólo se calcula con `?count=true`.
+
+    Con un orden compuesto (p. ej. precio y código como desempate) el cursor
+    guarda la posición completa de la última fila y la página siguiente es un
+    `WHERE (precio, codigo) > (p, c)`: CursorPagination de DRF sólo codifica el
+    primer campo y recorre por offset las rachas de valores repetidos.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        # La vista puede fijar otro orden por petición (p. ej. por precio), con la clave como desempate
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return ordering
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+        self.composite = None
+        ordering = self.get_ordering(request, queryset, view)
+        if len(ordering) > 1:
+            return self._paginate_composite(queryset, request, ordering)
+        return super().paginate_queryset(queryset, request, view)
+
+    def _paginate_composite(self, queryset, request, ordering):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = ordering
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self._decode_position(self.cursor, ordering)
+
+        orden = [self._invert(field) for field in ordering] if reverse else list(ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(orden, position))
+        rows = list(queryset.order_by(*orden)[:self.page_size + 1])
+        has_following = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Hay página en el sentido contrario siempre que se llegó con un cursor
+        hay_siguiente, hay_anterior = (position is not None, has_following) if reverse else (has_following, position is not None)
+        self.composite = {
+            'next': self._position(self.page[-1], ordering) if self.page and hay_siguiente else None,
+            'previous': self._position(self.page[0], ordering) if self.page and hay_anterior else None,
+        }
+        self.has_next = self.composite['next'] is not None
+        self.has_previous = self.composite['previous'] is not None
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(ordering, position):
+        # (a, b) > (pa, pb)  ==  a > pa OR (a = pa AND b > pb), respetando el sentido de cada campo
+        condicion, iguales = Q(), Q()
+        for field, valor in zip(ordering, position):
+            nombre = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condicion |= iguales & Q(**{f'{nombre}__{lookup}': valor})
+            iguales &= Q(**{nombre: valor})
+        return condicion
+
+    def _decode_position(self, cursor, ordering):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    @staticmethod
+    def _position(row, ordering):
+        valores = [row[f.lstrip('-')] if isinstance(row, dict) else getattr(row, f.lstrip('-')) for f in ordering]
+        return json.dumps([str(v) for v in valores])
+
+    def get_next_link(self):
+        if self.composite is None:
+            return super().get_next_link()
+        if self.composite['next'] is None:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.composite['next']))
+
+    def get_previous_link(self):
+        if self.composite is None:
+            return super().get_previous_link()
+        if self.composite['previous'] is None:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.composite['previous']))
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'description': f'Sólo presente con ?{self.count_query_param}=true',
+        }
+        return response_schema
+
+
+class ProductoCursorPagination(KeysetCursorPagination):
+    ordering = 'codigo'
+
+
+class EmpresaCursorPagination(KeysetCursorPagination):
+    ordering = 'nit'
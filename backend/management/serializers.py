@@ -1,22 +1,91 @@
 from rest_framework import serializers
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User, Empresa, Producto
+from infrastructure.models import ReportJob, InventoryCertification, ExchangeRate
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'correo', 'username', 'is_administrator')
 
-class EmpresaSerializer(serializers.ModelSerializer):
+# Campos cuya representación es el valor tal como lo devuelve values()
+VALUES_PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.FloatField, serializers.BooleanField,
+    serializers.JSONField, serializers.PrimaryKeyRelatedField,
+)
+
+class ValuesSerializerMixin:
+    """
+    Ruta rápida de lectura para listados: una proyección values() produce
+    directamente los dicts que generaría to_representation, con las mismas
+    claves y en el mismo orden, sin instanciar modelos ni recorrer los campos
+    de DRF por fila.
+    """
+    _values_lookups = None
+
+    @classmethod
+    def values_lookups(cls):
+        if cls._values_lookups is None:
+            lookups = []
+            for name, field in cls().fields.items():
+                if field.write_only:
+                    continue
+                if not isinstance(field, VALUES_PASSTHROUGH_FIELDS) or '.' in field.source or field.source != name:
+                    raise ImproperlyConfigured(f"{cls.__name__}.{name} no admite la lectura por values().")
+                if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is not None:
+                    raise ImproperlyConfigured(f"{cls.__name__}.{name} no admite la lectura por values().")
+                lookups.append(name)
+            cls._values_lookups = tuple(lookups)
+        return cls._values_lookups
+
+    @classmethod
+    def project(cls, queryset, extra=()):
+        # `extra`: columnas que necesita la paginación (p. ej. el precio de orden) y que no se devuelven
+        return queryset.values(*cls.values_lookups(), *(f for f in extra if f not in cls.values_lookups()))
+
+    @classmethod
+    def represent(cls, rows):
+        lookups = cls.values_lookups()
+        return [{name: row[name] for name in lookups} for row in rows]
+
+class EmpresaSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Empresa
         fields = '__all__'
 
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Producto
         fields = '__all__'
 
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportJob
+        exclude = ('pdf_content',)
+
+class EnqueueReportSerializer(serializers.Serializer):
+    # BooleanField interpreta "false"/"0"/"off" de formularios y multipart; bool("false") sería True
+    send_email = serializers.BooleanField(default=False)
+
+class InventoryCertificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InventoryCertification
+        fields = '__all__'
+
+class ExchangeRateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExchangeRate
+        fields = '__all__'
+
+    def validate_moneda(self, value):
+        return value.upper()
+
+    def validate_tasa(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("La tasa de cambio debe ser mayor que cero.")
+        return value
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -0,0 +1,37 @@
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from management.models import User
+from infrastructure.services.email_outbox import EmailOutbox
+from infrastructure.services.email_service import LocalEmailProvider
+
+@pytest.fixture
+def auth_client():
+    client = APIClient()
+    user = User.objects.create_superuser(
+        correo='admin@test.com',
+        username='admin',
+        password='password123',
+        is_administrator=True
+    )
+    client.force_authenticate(user=user)
+    return client
+
+@pytest.fixture(autouse=True)
+def report_cache_dir(settings, tmp_path):
+    settings.REPORT_CACHE_DIR = str(tmp_path / 'report_cache')
+
+@pytest.fixture(autouse=True)
+def response_cache():
+    # Las versiones sobreviven al rollback de cada test; las respuestas cacheadas no deben
+    caches['responses'].clear()
+
+@pytest.fixture(autouse=True)
+def local_email(settings):
+    # Ningún test habla con Resend: los correos quedan en memoria y se envían con run_pending()
+    settings.EMAIL_PROVIDER = 'infrastructure.services.email_service.LocalEmailProvider'
+    settings.EMAIL_WORKERS_AUTOSTART = False
+    EmailOutbox.reset_provider()
+    LocalEmailProvider.sent.clear()
+    yield LocalEmailProvider.sent
+    EmailOutbox.reset_provider()
@@ -0,0 +1,130 @@
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from django.core.cache import caches
+from infrastructure.read_models.inventory_snapshot import ProductoRecord
+from infrastructure.services.ai_service import AIService, AI_CACHE_ALIAS
+from shared_domain.exceptions import InfrastructureError
+
+class StubModel:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        return SimpleNamespace(text=f"Análisis de {len(prompt)} caracteres")
+
+@pytest.fixture
+def stub_model(settings, monkeypatch):
+    settings.GOOGLE_API_KEY = 'test-key'
+    caches[AI_CACHE_ALIAS].clear()
+    model = StubModel()
+    monkeypatch.setattr(AIService, 'model', staticmethod(lambda: model))
+    yield model
+    caches[AI_CACHE_ALIAS].clear()
+
+PRODUCTOS = [ProductoRecord('P1', 'Laptop', {'USD': 1000}, '900', 'Empresa')]
+
+def test_identical_prompt_is_served_from_cache(stub_model):
+    first = AIService.generate_inventory_analysis(PRODUCTOS)
+    second = AIService.generate_inventory_analysis(PRODUCTOS)
+    assert first == second
+    assert stub_model.calls == 1
+
+def test_concurrent_requests_share_one_gemini_call(stub_model):
+    stub_model.delay = 0.3
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(AIService.generate_inventory_analysis(PRODUCTOS)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stub_model.calls == 1
+    assert len(results) == 8 and len(set(results)) == 1
+
+def test_errors_are_not_cached(stub_model):
+    stub_model.fail = True
+    with pytest.raises(InfrastructureError):
+        AIService.generate_inventory_analysis(PRODUCTOS)
+    stub_model.fail = False
+    assert AIService.generate_inventory_analysis(PRODUCTOS).startswith("Análisis")
+    assert stub_model.calls == 2
+
+def _catalogo(n, empresas=5):
+    return [ProductoRecord(f'P{i:05d}', f'Producto {i}', {'USD': i}, str(i % empresas), f'Empresa {i % empresas}') for i in range(n)]
+
+def test_chunks_group_by_empresa_and_respect_budget():
+    chunks = AIService.build_chunks(_catalogo(400), max_chars=2000)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 2000 for chunk in chunks)
+    assert sum(chunk.count('\n') + 1 for chunk in chunks) == 400
+    # Los productos de una empresa quedan contiguos
+    empresas = [line.rsplit(' de ', 1)[1].split(':')[0] for chunk in chunks for line in chunk.split('\n')]
+    assert empresas == sorted(empresas)
+
+def test_chunk_boundaries_are_stable_when_a_product_is_inserted():
+    catalogo = _catalogo(600)
+    antes = AIService.build_chunks(catalogo, max_chars=2000)
+    nuevo = ProductoRecord('P00100b', 'Producto nuevo', {'USD': 1}, '0', 'Empresa 0')
+    despues = AIService.build_chunks(catalogo + [nuevo], max_chars=2000)
+    assert len(antes) > 5
+    # Sólo cambia el bloque que recibe el producto (dos si el nuevo código es un ancla)
+    assert len(set(despues) - set(antes)) <= 2
+    assert len(set(antes) - set(despues)) == 1
+
+def test_grouped_iterator_is_chunked_lazily(stub_model, settings):
+    settings.AI_CHUNK_TOKENS = 500
+    consumed = []
+
+    def cursor():
+        for p in sorted(_catalogo(300), key=lambda p: (p.empresa_nombre, p.codigo)):
+            consumed.append(p)
+            yield p
+
+    chunks = AIService.iter_chunks(cursor(), 500 * 4)
+    next(chunks)
+    assert len(consumed) < 300
+    assert AIService.generate_inventory_analysis(cursor(), grouped=True).startswith("Análisis")
+
+def test_map_reduce_covers_whole_inventory_concurrently(stub_model, settings):
+    settings.AI_CHUNK_TOKENS = 500
+    settings.AI_MAP_WORKERS = 4
+    stub_model.delay = 0.1
+    prompts = []
+    original = stub_model.generate_content
+    stub_model.generate_content = lambda prompt: prompts.append(prompt) or original(prompt)
+
+    start = time.monotonic()
+    result = AIService.generate_inventory_analysis(_catalogo(300))
+    elapsed = time.monotonic() - start
+
+    chunks = AIService.build_chunks(_catalogo(300), 500 * 4)
+    assert result.startswith("Análisis")
+    assert all(f'(P{i:05d})' in "".join(prompts) for i in range(300))
+    assert "reporte ejecutivo" in prompts[-1]
+    assert stub_model.calls > len(chunks)
+    # Con 4 hilos el tiempo total es muy inferior al secuencial
+    assert elapsed < stub_model.calls * stub_model.delay * 0.6
+
+def test_small_inventory_uses_single_prompt(stub_model):
+    AIService.generate_inventory_analysis(_catalogo(10))
+    assert stub_model.calls == 1
+
+def test_sample_mode_keeps_first_30_products(stub_model, settings):
+    settings.AI_ANALYSIS_MODE = 'sample'
+    prompts = []
+    stub_model.generate_content = lambda prompt: prompts.append(prompt) or SimpleNamespace(text="ok")
+    AIService.generate_inventory_analysis(_catalogo(100))
+    assert prompts[0].count('\n- ') == 30
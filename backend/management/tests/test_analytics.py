@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from django.core.cache import cache
+from infrastructure.services.inventory_analytics import InventoryAnalyticsService
+from management.models import Empresa, Producto
+
+def test_vectorized_stats_match_numpy_reference():
+    rng = np.random.default_rng(7)
+    monedas = rng.choice(['USD', 'COP', 'EUR'], size=5000)
+    empresas = rng.choice(['900', '901', '902', '903'], size=5000)
+    valores = rng.gamma(2.0, 50.0, size=5000)
+    columns = {"moneda": monedas, "valor": valores, "empresa": empresas, "empresa_nombre": [f"E{e}" for e in empresas]}
+
+    resultado = InventoryAnalyticsService.compute(columns, percentiles=(50, 90, 99), bins=8)
+
+    for item in resultado["by_currency"]:
+        grupo = valores[monedas == item["currency"]]
+        assert item["count"] == len(grupo)
+        assert item["sum"] == pytest.approx(grupo.sum())
+        assert item["mean"] == pytest.approx(grupo.mean())
+        assert (item["min"], item["max"]) == (grupo.min(), grupo.max())
+        for p in (50, 90, 99):
+            assert item[f"p{p}"] == pytest.approx(np.percentile(grupo, p))
+        counts, edges = np.histogram(grupo, bins=8)
+        assert item["histogram"]["counts"] == counts.tolist()
+        assert item["histogram"]["edges"] == pytest.approx(edges.tolist())
+
+    assert len(resultado["by_company"]) == 12
+    for item in resultado["by_company"]:
+        grupo = valores[(monedas == item["currency"]) & (empresas == item["company"])]
+        assert item["company_name"] == f"E{item['company']}"
+        assert item["p90"] == pytest.approx(np.percentile(grupo, 90))
+
+@pytest.mark.django_db
+def test_analytics_endpoint_is_cached_until_inventory_changes(auth_client, django_assert_num_queries):
+    cache.clear()
+    empresa = Empresa.objects.create(nit='900', nombre='Comp', direccion='D', telefono='T')
+    for i, usd in enumerate([10, 20, 30]):
+        Producto.objects.create(codigo=f'P{i}', nombre='X', caracteristicas='-', precios={"USD": usd, "COP": usd * 4000}, empresa=empresa)
+
+    response = auth_client.get('/api/productos/analytics/')
+    assert response.status_code == 200
+    usd = next(item for item in response.data["by_currency"] if item["currency"] == "USD")
+    assert (usd["count"], usd["sum"], usd["p50"]) == (3, 60.0, 20.0)
+    assert response.data["by_company"][0]["company_name"] == 'Comp'
+
+    with django_assert_num_queries(0):
+        assert auth_client.get('/api/productos/analytics/').data == response.data
+
+    Producto.objects.create(codigo='P9', nombre='X', caracteristicas='-', precios={"USD": 100}, empresa=empresa)
+    usd = next(item for item in auth_client.get('/api/productos/analytics/').data["by_currency"] if item["currency"] == "USD")
+    assert usd["count"] == 4
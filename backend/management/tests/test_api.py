@@ -1,26 +1,22 @@
 import pytest
-from rest_framework.test import APIClient
-from management.models import User, Empresa, Producto
+from management.models import Empresa, Producto
 from unittest.mock import patch
 
-@pytest.fixture
-def auth_client():
-    client = APIClient()
-    user = User.objects.create_superuser(
-        correo='admin@test.com',
-        username='admin',
-        password='password123',
-        is_administrator=True
-    )
-    client.force_authenticate(user=user)
-    return client
-
 @pytest.mark.django_db
 def test_list_empresas(auth_client):
     Empresa.objects.create(nit='123', nombre='Test Inc', direccion='Calle 1', telefono='555')
     response = auth_client.get('/api/empresas/')
     assert response.status_code == 200
-    assert len(response.data) == 1
+    assert len(response.data['results']) == 1
+
+@pytest.mark.django_db
+def test_list_empresas_server_side_search(auth_client):
+    Empresa.objects.create(nit='123', nombre='Test Inc', direccion='Calle 1', telefono='555')
+    Empresa.objects.create(nit='900', nombre='Otra S.A.S.', direccion='Calle 2', telefono='556')
+    response = auth_client.get('/api/empresas/', {'q': 'test'})
+    assert [e['nit'] for e in response.data['results']] == ['123']
+    response = auth_client.get('/api/empresas/', {'q': '90'})
+    assert [e['nit'] for e in response.data['results']] == ['900']
 
 @pytest.mark.django_db
 def test_create_empresa(auth_client):
@@ -97,3 +93,89 @@ def test_certify_inventory(mock_ai, mock_blockchain, auth_client):
     response = auth_client.post('/api/productos/certify_inventory/')
     assert response.status_code == 200
     assert 'txHash' in response.data
+
+@pytest.mark.django_db
+def test_list_productos_cursor_pagination(auth_client):
+    empresa = Empresa.objects.create(nit='123', nombre='Test Inc', direccion='Calle 1', telefono='555')
+    for i in range(7):
+        Producto.objects.create(codigo=f'P{i}', nombre=f'Producto {i}', caracteristicas='-', precios={"USD": 1}, empresa=empresa)
+
+    codigos, url = [], '/api/productos/?page_size=3'
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert 'count' not in response.data
+        codigos += [p['codigo'] for p in response.data['results']]
+        url = response.data['next']
+    assert codigos == [f'P{i}' for i in range(7)]
+
+    response = auth_client.get('/api/productos/?page_size=3&count=true')
+    assert response.data['count'] == 7
+
+@pytest.mark.django_db
+def test_list_productos_page_does_not_count(auth_client, django_assert_num_queries):
+    with django_assert_num_queries(1) as ctx:
+        auth_client.get('/api/productos/')
+    assert 'COUNT' not in ctx.captured_queries[0]['sql'].upper()
+
+@pytest.fixture
+def catalogo():
+    empresa = Empresa.objects.create(nit='123', nombre='Test Inc', direccion='Calle 1', telefono='555')
+    precios = {'A': {"USD": 10, "COP": 40000}, 'B': {"USD": "25.5"}, 'C': {"COP": 1000}, 'D': {"usd": 5}, 'E': {"USD": 40}}
+    for codigo, p in precios.items():
+        Producto.objects.create(codigo=codigo, nombre=codigo, caracteristicas='-', precios=p, empresa=empresa)
+    return empresa
+
+def _codigos(client, url):
+    codigos = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        codigos += [p['codigo'] for p in response.data['results']]
+        url = response.data['next']
+    return codigos
+
+@pytest.mark.django_db
+def test_filter_productos_by_price_range(auth_client, catalogo):
+    assert _codigos(auth_client, '/api/productos/?currency=usd&min=6&max=30') == ['A', 'B']
+    assert _codigos(auth_client, '/api/productos/?currency=COP') == ['A', 'C']
+
+@pytest.mark.django_db
+def test_order_productos_by_price(auth_client, catalogo):
+    assert _codigos(auth_client, '/api/productos/?ordering=price_usd&page_size=2') == ['D', 'A', 'B', 'E']
+    assert _codigos(auth_client, '/api/productos/?ordering=-price_usd&page_size=3') == ['E', 'B', 'A', 'D']
+
+@pytest.mark.django_db
+def test_order_by_price_pages_through_equal_prices(auth_client, catalogo):
+    # Racha larga de precios iguales: el cursor guarda (precio, código), sin huecos ni duplicados
+    for i in range(12):
+        Producto.objects.create(codigo=f'X{i:02}', nombre='X', caracteristicas='-', precios={"USD": "10.00"}, empresa=catalogo)
+    iguales = sorted(['A'] + [f'X{i:02}' for i in range(12)])
+    assert _codigos(auth_client, '/api/productos/?ordering=price_usd&page_size=4') == ['D'] + iguales + ['B', 'E']
+    assert _codigos(auth_client, '/api/productos/?ordering=-price_usd&page_size=4') == ['E', 'B'] + iguales[::-1] + ['D']
+
+    # Hacia atrás se recorren las mismas páginas
+    response = auth_client.get('/api/productos/?ordering=price_usd&page_size=4')
+    paginas = [[p['codigo'] for p in response.json()['results']]]
+    while response.json()['next']:
+        response = auth_client.get(response.json()['next'])
+        paginas.append([p['codigo'] for p in response.json()['results']])
+    for esperada in reversed(paginas[:-1]):
+        response = auth_client.get(response.json()['previous'])
+        assert [p['codigo'] for p in response.json()['results']] == esperada
+    assert response.json()['previous'] is None
+
+@pytest.mark.django_db
+def test_price_index_follows_updates(auth_client, catalogo):
+    producto = Producto.objects.get(codigo='E')
+    producto.precios = {"EUR": 3}
+    producto.save()
+    assert _codigos(auth_client, '/api/productos/?currency=USD&min=30') == []
+    Producto.objects.get(codigo='A').delete()
+    assert _codigos(auth_client, '/api/productos/?currency=COP') == ['C']
+
+@pytest.mark.django_db
+def test_price_filters_validation(auth_client, catalogo):
+    assert auth_client.get('/api/productos/?min=5').status_code == 400
+    assert auth_client.get('/api/productos/?currency=USD&min=abc').status_code == 400
+    assert auth_client.get('/api/productos/?ordering=nombre').status_code == 400
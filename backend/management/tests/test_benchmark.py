@@ -0,0 +1,36 @@
+import pytest
+from management.benchmark import BenchmarkSuite, CatalogGenerator, percentile
+from shared_domain.models import Empresa, Producto
+from infrastructure.models import ProductoBusqueda, ProductoPrecio
+
+pytestmark = pytest.mark.django_db
+
+def test_catalog_generator_loads_like_an_import():
+    # bulk_create + productos_importados: los índices derivados quedan al día
+    assert CatalogGenerator(3, 4, seed=7).load() == {"empresas": 3, "productos": 12}
+    assert Empresa.objects.count() == 3
+    assert ProductoBusqueda.objects.count() == 12
+    assert ProductoPrecio.objects.filter(moneda='USD').count() == 12
+
+    precios = dict(Producto.objects.values_list('codigo', 'precios'))
+    assert all("USD" in p for p in precios.values())
+
+def test_catalog_generator_same_seed_same_data():
+    def datos(seed):
+        return [(p.codigo, p.nombre, p.precios) for p in CatalogGenerator(2, 5, seed=seed).iter_productos()]
+    assert datos(7) == datos(7)
+    assert datos(7) != datos(8)
+
+def test_percentile_interpolates():
+    assert percentile([10, 20, 30, 40], 50) == 25
+    assert percentile([5], 95) == 5
+
+def test_suite_reports_every_scenario():
+    suite = BenchmarkSuite(empresas=2, productos=5, iterations=2)
+    resultado = suite.run()
+    assert resultado["catalog"]["productos"] == 10
+    assert set(resultado["scenarios"]) == set(suite.scenarios())
+    for nombre, medida in resultado["scenarios"].items():
+        assert medida["errors"] == 0, nombre
+        assert medida["p50_ms"] <= medida["p95_ms"] <= medida["max_ms"]
+    assert resultado["scenarios"]["list_productos_cached"]["queries_max"] == 0
@@ -0,0 +1,298 @@
+import asyncio
+import io
+import threading
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.transaction_status import TransactionConfirmationStatus
+from application.use_cases.inventario import CertificarInventarioUseCase
+from infrastructure.models import InventoryCertification
+from infrastructure.services.async_blockchain_service import AsyncBlockchainService, SignatureStatusPoller
+from infrastructure.services import merkle
+from infrastructure.services.blockchain_service import BlockchainService
+from infrastructure.services.certification_batcher import CertificationBatcher
+from infrastructure.services.solana_gateway import SolanaGateway
+from management.models import User
+from shared_domain.exceptions import InfrastructureError
+
+class StubRPC:
+    """Cliente RPC local que imita solana.rpc.api.Client."""
+
+    def __init__(self):
+        self.sent = []
+        self.blockhash_calls = 0
+        self.lock = threading.Lock()
+
+    def get_latest_blockhash(self):
+        self.blockhash_calls += 1
+        return SimpleNamespace(value=SimpleNamespace(blockhash=Hash.default()))
+
+    def send_transaction(self, txn):
+        with self.lock:
+            self.sent.append(txn)
+            return SimpleNamespace(value=f"sig{len(self.sent)}")
+
+@pytest.fixture
+def solana_key(settings):
+    settings.SOLANA_PRIVATE_KEY = '11' * 32
+
+def test_send_memo_against_stub_rpc(solana_key):
+    rpc = StubRPC()
+    assert BlockchainService.send_memo('abc', client=rpc) == 'sig1'
+    assert len(rpc.sent) == 1
+
+def test_batcher_coalesces_concurrent_certifications(solana_key):
+    rpc = StubRPC()
+    batcher = CertificationBatcher(
+        sender=lambda memo: BlockchainService.send_memo(memo, client=rpc),
+        window_seconds=0.2,
+        max_batch_size=10,
+    )
+    hashes = [merkle.hash_leaf(str(i)) for i in range(5)]
+    futures = [batcher.submit(h) for h in hashes]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert len(rpc.sent) == 1
+    assert {r["txHash"] for r in results} == {"sig1"}
+    root = results[0]["batch"]["root"]
+    for data_hash, result in zip(hashes, results):
+        assert result["pdf_hash"] == data_hash
+        assert merkle.verify_proof(merkle.hash_leaf(data_hash), result["batch"]["index"], result["batch"]["proof"], root)
+
+def test_batcher_propagates_rpc_failure(solana_key):
+    def failing_sender(memo):
+        raise RuntimeError("RPC caído")
+
+    batcher = CertificationBatcher(sender=failing_sender, window_seconds=0.05, max_batch_size=10)
+    future = batcher.submit('ab' * 32)
+    with pytest.raises(Exception, match="RPC caído"):
+        future.result(timeout=5)
+
+def test_batcher_timeout_raises_infrastructure_error(solana_key):
+    release = threading.Event()
+
+    def slow_sender(memo):
+        release.wait(5)
+        return "sig1"
+
+    batcher = CertificationBatcher(sender=slow_sender, window_seconds=0, max_batch_size=10)
+    with pytest.raises(InfrastructureError, match="no respondió"):
+        batcher.certify('ab' * 32, timeout=0.05)
+    release.set()
+
+def test_batcher_survives_unexpected_flush_error(solana_key):
+    rpc = StubRPC()
+    batcher = CertificationBatcher(lambda memo: BlockchainService.send_memo(memo, client=rpc), 0.05, 10)
+    with patch.object(merkle, 'build_levels', side_effect=RuntimeError("fallo inesperado")):
+        futures = [batcher.submit(merkle.hash_leaf(str(i))) for i in range(2)]
+        for future in futures:
+            with pytest.raises(InfrastructureError, match="fallo inesperado"):
+                future.result(timeout=5)
+    # El hilo del batcher sigue vivo y atiende el siguiente lote
+    assert batcher.certify(merkle.hash_leaf('x'), timeout=5)["txHash"] == "sig1"
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_batched_certification_stores_batch_proof(mock_ai, solana_key, settings, monkeypatch):
+    mock_ai.return_value = "Análisis IA"
+    settings.SOLANA_BATCH_WINDOW_MS = 200
+    rpc = StubRPC()
+    batcher = CertificationBatcher(lambda memo: BlockchainService.send_memo(memo, client=rpc), 0.2, 10)
+    monkeypatch.setattr(CertificationBatcher, '_instance', batcher)
+    otro = batcher.submit(merkle.hash_leaf('otro'))
+
+    CertificarInventarioUseCase.ejecutar()
+    otro.result(timeout=5)
+
+    certificacion = InventoryCertification.objects.get()
+    assert len(rpc.sent) == 1
+    # La fila enlaza su data_hash con la raíz del lote que se escribió como memo
+    assert certificacion.batch_root
+    assert merkle.verify_proof(
+        merkle.hash_leaf(certificacion.data_hash), certificacion.batch_index, certificacion.batch_proof,
+        certificacion.batch_root,
+    )
+
+def test_certify_data_uses_batcher_when_enabled(solana_key, settings, monkeypatch):
+    settings.SOLANA_BATCH_WINDOW_MS = 50
+    rpc = StubRPC()
+    batcher = CertificationBatcher(lambda memo: BlockchainService.send_memo(memo, client=rpc), 0.05, 10)
+    monkeypatch.setattr(CertificationBatcher, '_instance', batcher)
+    result = BlockchainService.certify_data("inventario")
+    assert result["txHash"] == "sig1"
+    assert "batch" not in result
+
+def test_gateway_reuses_cached_blockhash():
+    rpc = StubRPC()
+    gateway = SolanaGateway(rpc, SolanaGateway.load_keypair('11' * 32), blockhash_ttl=60)
+    assert gateway.send_memo('a') == 'sig1'
+    assert gateway.send_memo('b') == 'sig2'
+    # Un solo round-trip de blockhash para ambas transacciones
+    assert rpc.blockhash_calls == 1
+
+def test_gateway_retries_once_on_expired_blockhash():
+    rpc = StubRPC()
+    original_send = rpc.send_transaction
+    failures = iter([Exception("Blockhash not found")])
+
+    def flaky_send(txn):
+        error = next(failures, None)
+        if error:
+            raise error
+        return original_send(txn)
+
+    rpc.send_transaction = flaky_send
+    gateway = SolanaGateway(rpc, SolanaGateway.load_keypair('11' * 32), blockhash_ttl=60)
+    assert gateway.send_memo('a') == 'sig1'
+    assert rpc.blockhash_calls == 2
+
+class StubAsyncRPC:
+    """Equivalente asíncrono de StubRPC para solana.rpc.async_api.AsyncClient."""
+
+    def __init__(self, errors=()):
+        self.signer = Keypair()
+        self.sent = []
+        self.errors = list(errors)
+
+    async def get_latest_blockhash(self):
+        raise AssertionError("El blockhash sale de la caché de SolanaGateway")
+
+    async def send_transaction(self, txn):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(txn)
+        return SimpleNamespace(value=self.signer.sign_message(str(len(self.sent)).encode()))
+
+def stub_gateway(rpc=None):
+    return SolanaGateway(rpc or StubRPC(), SolanaGateway.load_keypair('11' * 32), blockhash_ttl=60)
+
+def test_async_certify_returns_pending_without_confirmation(solana_key):
+    rpc = StubAsyncRPC()
+    result = async_to_sync(AsyncBlockchainService.certify_data)("inventario", client=rpc, gateway=stub_gateway())
+    assert result["status"] == "PENDING"
+    assert result["txHash"] == str(rpc.signer.sign_message(b'1'))
+
+def test_async_certify_reuses_cached_blockhash(solana_key):
+    sync_rpc = StubRPC()
+    gateway = stub_gateway(sync_rpc)
+    rpc = StubAsyncRPC(errors=[Exception("Blockhash not found")])
+    for data in ("a", "b"):
+        async_to_sync(AsyncBlockchainService.certify_data)(data, client=rpc, gateway=gateway)
+    assert len(rpc.sent) == 2
+    # Una consulta inicial y otra tras el blockhash caducado; la segunda certificación no consulta
+    assert sync_rpc.blockhash_calls == 2
+
+def test_async_certify_goes_through_batcher_when_enabled(solana_key, settings, monkeypatch):
+    settings.SOLANA_BATCH_WINDOW_MS = 50
+    rpc = StubRPC()
+    batcher = CertificationBatcher(lambda memo: BlockchainService.send_memo(memo, client=rpc), 0.05, 10)
+    monkeypatch.setattr(CertificationBatcher, '_instance', batcher)
+
+    async def certificar_varios():
+        return await asyncio.gather(*(AsyncBlockchainService.certify_data(str(i)) for i in range(3)))
+
+    resultados = async_to_sync(certificar_varios)()
+    assert len(rpc.sent) == 1
+    assert {r["txHash"] for r in resultados} == {"sig1"}
+    assert all(r["status"] == "PENDING" and "batch" in r for r in resultados)
+
+class StubStatusRPC:
+    """Cliente RPC síncrono que sólo responde get_signature_statuses."""
+
+    def __init__(self, statuses=None):
+        self.status_calls = []
+        self.statuses = statuses or {}
+
+    def get_signature_statuses(self, signatures):
+        self.status_calls.append(signatures)
+        return SimpleNamespace(value=[self.statuses.get(str(s)) for s in signatures])
+
+def crear_certificacion(tx_hash, status='PENDING'):
+    return InventoryCertification.objects.create(
+        tx_hash=tx_hash, data_hash='h', merkle_root='r', merkle_version=0, merkle_depth=0, status=status
+    )
+
+@pytest.mark.django_db
+def test_status_poller_uses_one_batched_call():
+    signer = Keypair()
+    signatures = [str(signer.sign_message(str(i).encode())) for i in range(3)]
+    for tx_hash in signatures:
+        crear_certificacion(tx_hash)
+    crear_certificacion('dummy_abc', status='DUMMY_SUCCESS')
+    rpc = StubStatusRPC({
+        signatures[0]: SimpleNamespace(err=None, confirmation_status=TransactionConfirmationStatus.Finalized),
+        signatures[1]: SimpleNamespace(err="InstructionError", confirmation_status=None),
+    })
+    poller = SignatureStatusPoller(rpc, interval=0, max_age=60)
+
+    updates = poller.poll()
+
+    assert len(rpc.status_calls) == 1
+    assert len(rpc.status_calls[0]) == 3
+    assert updates == {signatures[0]: "FINALIZED", signatures[1]: "FAILED"}
+    assert InventoryCertification.objects.get(tx_hash=signatures[0]).status == "FINALIZED"
+    assert [row[0] for row in poller.pending()] == [signatures[2]]
+
+@pytest.mark.django_db
+def test_status_poller_resumes_pending_rows_and_expires_old_ones():
+    # Filas PENDING que dejó un proceso anterior: un poller nuevo las retoma desde la base de datos
+    signer = Keypair()
+    reciente, antigua = (str(signer.sign_message(m)) for m in (b'reciente', b'antigua'))
+    crear_certificacion(reciente)
+    crear_certificacion(antigua)
+    InventoryCertification.objects.filter(tx_hash=antigua).update(created_at=timezone.now() - timedelta(minutes=10))
+    rpc = StubStatusRPC({reciente: SimpleNamespace(err=None, confirmation_status=TransactionConfirmationStatus.Confirmed)})
+
+    out = io.StringIO()
+    with patch.object(SignatureStatusPoller, 'build', classmethod(lambda cls: cls(rpc, interval=0, max_age=120))):
+        call_command('poll_signature_statuses', '--once', stdout=out)
+
+    assert "2 certificaciones actualizadas" in out.getvalue()
+    assert InventoryCertification.objects.get(tx_hash=reciente).status == "CONFIRMED"
+    assert InventoryCertification.objects.get(tx_hash=antigua).status == "EXPIRED"
+
+def test_async_client_is_closed_with_its_event_loop(settings):
+    clients = []
+
+    async def certificar():
+        clients.append(AsyncBlockchainService.client())
+
+    # async_to_sync bajo WSGI ejecuta cada llamada en un event loop nuevo
+    async_to_sync(certificar)()
+    async_to_sync(certificar)()
+    assert clients[0] is not clients[1]
+    assert all(client._provider.session.is_closed for client in clients)
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_certify_inventory_async_view(mock_ai, solana_key, monkeypatch):
+    mock_ai.return_value = "Análisis IA"
+    rpc = StubAsyncRPC()
+    started = []
+    monkeypatch.setattr(AsyncBlockchainService, 'client', staticmethod(lambda: rpc))
+    monkeypatch.setattr(SolanaGateway, '_instance', stub_gateway())
+    monkeypatch.setattr(SignatureStatusPoller, 'start', classmethod(lambda cls: started.append(True)))
+    user = User.objects.create_user(correo='a@test.com', username='a', password='x', is_administrator=True)
+    token = str(RefreshToken.for_user(user).access_token)
+
+    client = AsyncClient()
+    response = async_to_sync(client.post)('/api/productos/certify_inventory_async/', headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "PENDING"
+    assert started == [True]
+    # El seguimiento parte de la fila guardada, no de un estado en memoria
+    assert InventoryCertification.objects.get().status == "PENDING"
+
+@pytest.mark.django_db
+def test_certify_inventory_async_requires_authentication():
+    response = async_to_sync(AsyncClient().post)('/api/productos/certify_inventory_async/')
+    assert response.status_code == 401
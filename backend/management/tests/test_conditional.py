@@ -0,0 +1,143 @@
+import pytest
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from infrastructure.services.inventory_version import InventoryVersion
+from management.checks import check_conditional_get_cache
+from management.models import Empresa, Producto
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture(autouse=True)
+def versiones_limpias(settings):
+    # La caché de los tests es locmem: se fuerza el modo de un único proceso
+    settings.CONDITIONAL_GET = 'on'
+    cache.clear()
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+@pytest.fixture
+def catalogo():
+    a = Empresa.objects.create(nit='900', nombre='A', direccion='D', telefono='T')
+    b = Empresa.objects.create(nit='901', nombre='B', direccion='D', telefono='T')
+    Producto.objects.create(codigo='P1', nombre='Uno', caracteristicas='-', precios={"USD": 1}, empresa=a)
+    Producto.objects.create(codigo='P2', nombre='Dos', caracteristicas='-', precios={"USD": 2}, empresa=b)
+    return a, b
+
+def test_version_is_monotonic_and_survives_cache_loss():
+    first, _ = InventoryVersion.current()
+    InventoryVersion.bump()
+    second, _ = InventoryVersion.current()
+    assert second == first + 1
+    cache.clear()
+    InventoryVersion.bump()
+    assert InventoryVersion.current()[0] > second
+
+def test_unchanged_list_returns_304_without_queries(client, catalogo, django_assert_num_queries):
+    response = client.get('/api/productos/')
+    assert response.status_code == 200
+    etag = response['ETag']
+    assert response['Last-Modified']
+    with django_assert_num_queries(0):
+        response = client.get('/api/productos/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert response.content == b''
+
+def test_write_changes_etag(client, catalogo):
+    etag = client.get('/api/productos/')['ETag']
+    producto = Producto.objects.get(codigo='P1')
+    producto.nombre = 'Uno bis'
+    producto.save()
+    response = client.get('/api/productos/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+def test_etag_depends_on_query(client, catalogo):
+    assert client.get('/api/productos/')['ETag'] != client.get('/api/productos/?page_size=1')['ETag']
+
+def test_company_scope_ignores_other_companies(client, catalogo):
+    a, _ = catalogo
+    url = f'/api/productos/?empresa={a.nit}'
+    response = client.get(url)
+    assert [p['codigo'] for p in response.data['results']] == ['P1']
+    etag = response['ETag']
+    Producto.objects.filter(codigo='P2').first().save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    # Mover un producto a la empresa A cambia su versión
+    producto = Producto.objects.get(codigo='P2')
+    producto.empresa = a
+    producto.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+def test_moving_product_bumps_previous_company(catalogo):
+    a, b = catalogo
+    antes = InventoryVersion.current(InventoryVersion.empresa(b.nit))[0]
+    producto = Producto.objects.get(codigo='P2')
+    producto.empresa = a
+    producto.save()
+    assert InventoryVersion.current(InventoryVersion.empresa(b.nit))[0] > antes
+
+def test_company_retrieve_uses_company_version(auth_client, catalogo):
+    a, b = catalogo
+    etag = auth_client.get(f'/api/empresas/{a.nit}/')['ETag']
+    b.nombre = 'B2'
+    b.save()
+    assert auth_client.get(f'/api/empresas/{a.nit}/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    a.nombre = 'A2'
+    a.save()
+    assert auth_client.get(f'/api/empresas/{a.nit}/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+def test_bulk_import_bumps_version(auth_client, catalogo):
+    etag = auth_client.get('/api/productos/')['ETag']
+    auth_client.post(
+        '/api/productos/bulk_import/', b"codigo,nombre,caracteristicas,empresa,precio_usd\nP3,Tres,-,900,3\n",
+        content_type='text/csv',
+    )
+    assert auth_client.get('/api/productos/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+def test_hot_list_is_served_from_response_cache(client, catalogo, django_assert_num_queries):
+    first = client.get('/api/productos/')
+    with django_assert_num_queries(0):
+        second = client.get('/api/productos/')
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second['ETag'] == first['ETag']
+    assert second['Content-Type'] == 'application/json'
+
+def test_response_cache_is_invalidated_per_row(client, catalogo, django_assert_num_queries):
+    client.get('/api/productos/P1/')
+    client.get('/api/productos/')
+    Producto.objects.get(codigo='P2').save()
+    # El detalle de P1 sigue vigente; el listado no
+    with django_assert_num_queries(0):
+        assert client.get('/api/productos/P1/').json()['codigo'] == 'P1'
+    producto = Producto.objects.get(codigo='P1')
+    producto.nombre = 'Renombrado'
+    producto.save()
+    assert client.get('/api/productos/P1/').json()['nombre'] == 'Renombrado'
+    assert 'Renombrado' in client.get('/api/productos/').content.decode()
+
+def test_response_cache_can_be_disabled(client, catalogo, settings):
+    settings.RESPONSE_CACHE_ENABLED = False
+    client.get('/api/productos/')
+    response = client.get('/api/productos/')
+    assert response.status_code == 200
+    assert len(response.data['results']) == 2
+
+def test_local_default_cache_disables_etag_and_response_cache(client, catalogo, settings):
+    settings.CONDITIONAL_GET = 'auto'
+    response = client.get('/api/productos/')
+    assert response.status_code == 200
+    assert 'ETag' not in response
+    # Otro worker con su propio contador no puede provocar un 304 con datos obsoletos
+    assert client.get('/api/productos/', HTTP_IF_NONE_MATCH='*').status_code == 200
+    assert check_conditional_get_cache(None)[0].id == 'management.W001'
+
+def test_shared_default_cache_keeps_etag(client, catalogo, settings):
+    settings.CONDITIONAL_GET = 'auto'
+    with patch.object(InventoryVersion, 'shared_cache', return_value=True):
+        assert 'ETag' in client.get('/api/productos/')
+        assert check_conditional_get_cache(None) == []
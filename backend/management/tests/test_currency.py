@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import patch
+from infrastructure.models import ExchangeRate
+from infrastructure.services.currency_service import ExchangeRateService
+from management.models import Empresa, Producto
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture(autouse=True)
+def tasas_frescas():
+    # La tabla vive en memoria del proceso: se descarta entre tests
+    ExchangeRateService.invalidate()
+
+@pytest.fixture
+def tasas():
+    ExchangeRate.objects.create(moneda='COP', tasa='0.00025')
+    ExchangeRate.objects.create(moneda='eur', tasa='1.25')
+
+@pytest.fixture
+def catalogo(tasas):
+    empresa = Empresa.objects.create(nit='900', nombre='Comp', direccion='D', telefono='T')
+    for codigo, precios in {'A': {"USD": 10, "COP": 40000}, 'B': {"COP": "8000"}, 'C': {"EUR": 4}, 'D': {"JPY": 100}}.items():
+        Producto.objects.create(codigo=codigo, nombre=codigo, caracteristicas='-', precios=precios, empresa=empresa)
+
+def test_convert_flat_prefers_native_then_base_currency(tasas):
+    conversiones = ExchangeRateService.convert_flat(
+        ['A', 'A', 'B', 'C', 'C', 'D'], ['USD', 'COP', 'COP', 'EUR', 'USD', 'JPY'], [10, 40000, 8000, 4, 99, 100], 'eur'
+    )
+    assert conversiones == {'A': (8.0, 'USD'), 'B': (1.6, 'COP'), 'C': (4.0, 'EUR')}
+
+def test_rates_are_cached_in_process_and_reloaded_on_change(tasas, django_assert_num_queries):
+    ExchangeRateService.rates()
+    with django_assert_num_queries(0):
+        ExchangeRateService.convert_flat(['A'], ['USD'], [1], 'EUR')
+    ExchangeRate.objects.filter(moneda='EUR').update(tasa='2')
+    ExchangeRate.objects.get(moneda='EUR').save()
+    assert ExchangeRateService.convert_flat(['A'], ['USD'], [1], 'EUR') == {'A': (0.5, 'USD')}
+
+def test_rate_change_in_another_process_is_picked_up(tasas, settings):
+    assert ExchangeRateService.convert_flat(['A'], ['USD'], [1], 'EUR') == {'A': (0.8, 'USD')}
+    version = ExchangeRateService.version()
+
+    # Otro worker guarda la tasa: su invalidate() no llega a la memoria de este proceso
+    with patch.object(ExchangeRateService, 'invalidate'):
+        tasa = ExchangeRate.objects.get(moneda='EUR')
+        tasa.tasa = '2'
+        tasa.save()
+    assert ExchangeRateService.convert_flat(['A'], ['USD'], [1], 'EUR') == {'A': (0.8, 'USD')}
+
+    # Pasado el intervalo de comprobación la versión de la tabla ha cambiado
+    settings.EXCHANGE_RATES_CHECK_SECONDS = 0
+    assert ExchangeRateService.convert_flat(['A'], ['USD'], [1], 'EUR') == {'A': (0.5, 'USD')}
+    assert ExchangeRateService.version() != version
+
+def test_list_with_convert_to(auth_client, catalogo):
+    response = auth_client.get('/api/productos/?convert_to=EUR')
+    conversiones = {p['codigo']: p['converted_price'] for p in response.data['results']}
+    assert conversiones['A'] == {"currency": "EUR", "value": 8.0, "source_currency": "USD"}
+    assert conversiones['B']['value'] == 1.6
+    assert conversiones['D'] is None
+
+def test_convert_whole_catalog(auth_client, catalogo):
+    response = auth_client.get('/api/productos/convert/?convert_to=COP')
+    assert response.data['prices'] == {'A': 40000.0, 'B': 8000.0, 'C': 20000.0}
+    filtrado = auth_client.get('/api/productos/convert/?convert_to=COP&currency=USD')
+    assert filtrado.data['prices'] == {'A': 40000.0}
+
+def test_unknown_currency_is_rejected(auth_client, catalogo):
+    assert auth_client.get('/api/productos/convert/?convert_to=XYZ').status_code == 400
+    assert auth_client.get('/api/productos/generate_inventory_pdf/?currency=XYZ').status_code == 400
+
+def test_pdf_report_in_currency_is_cached_separately(auth_client, catalogo, django_assert_max_num_queries):
+    with django_assert_max_num_queries(4):
+        response = auth_client.get('/api/productos/generate_inventory_pdf/?currency=EUR')
+    assert response.status_code == 200
+    assert response.getvalue().startswith(b'%PDF')
+    original = auth_client.get('/api/productos/generate_inventory_pdf/')
+    assert original.getvalue() != response.getvalue()
+
+def test_exchange_rate_endpoint_validates_rate(auth_client):
+    assert auth_client.post('/api/tasas-cambio/', {"moneda": "gbp", "tasa": "1.3"}, format='json').status_code == 201
+    assert ExchangeRate.objects.filter(moneda='GBP').exists()
+    assert auth_client.post('/api/tasas-cambio/', {"moneda": "ars", "tasa": "0"}, format='json').status_code == 400
@@ -0,0 +1,166 @@
+import base64
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from django.utils import timezone
+from infrastructure.models import EmailAttachment, OutboxEmail
+from infrastructure.services.email_outbox import EmailOutbox
+from infrastructure.services.email_service import EmailDeliveryError, EmailService, ResendEmailProvider, StreamingJSONBody
+from infrastructure.services.report_artifact import ReportArtifact
+from application.use_cases.inventario import ProcesarInventarioUseCase
+from shared_domain.exceptions import BusinessRuleError
+
+pytestmark = pytest.mark.django_db
+
+class FlakyProvider:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.keys = []
+
+    def check_configured(self):
+        return None
+
+    def send(self, payload, idempotency_key=None):
+        self.calls += 1
+        self.keys.append(idempotency_key)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok-id"
+
+@pytest.fixture
+def flaky(monkeypatch):
+    def install(*errors):
+        provider = FlakyProvider(errors)
+        monkeypatch.setattr(EmailOutbox, '_provider', provider)
+        return provider
+    return install
+
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis', return_value="Análisis IA")
+def test_send_inventory_pdf_only_queues(mock_ai, auth_client, local_email):
+    response = auth_client.post(
+        '/api/productos/send_inventory_pdf/', {"email": "a@test.com, b@test.com,a@test.com"}, format='json'
+    )
+    assert response.status_code == 202
+    assert [e['to'] for e in response.data['emails']] == ['a@test.com', 'b@test.com']
+    assert local_email == []
+    assert OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING).count() == 2
+    # Un solo adjunto para todos los destinatarios
+    assert EmailAttachment.objects.count() == 1
+
+    assert EmailOutbox.run_pending() == 2
+    assert OutboxEmail.objects.filter(status=OutboxEmail.Status.SENT).count() == 2
+    adjuntos = [payload["attachments"][0]["content"] for payload in local_email]
+    assert adjuntos[0].read() == adjuntos[1].read()
+    assert base64.b64decode(b''.join(adjuntos[0].iter_base64())).startswith(b'%PDF')
+
+def test_invalid_recipient_is_rejected(auth_client):
+    response = auth_client.post('/api/productos/send_inventory_pdf/', {"email": "no-es-un-correo"}, format='json')
+    assert response.status_code == 400
+    assert not OutboxEmail.objects.exists()
+
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis', return_value="Análisis IA")
+def test_failed_email_step_closes_the_report_artifact(mock_ai):
+    with patch.object(ReportArtifact, 'close', autospec=True) as close:
+        with pytest.raises(BusinessRuleError):
+            ProcesarInventarioUseCase.ejecutar(email="no-es-un-correo", send_email=True)
+    close.assert_called_once()
+    assert not OutboxEmail.objects.exists()
+
+def test_transient_failure_is_retried_with_backoff(flaky):
+    provider = flaky(EmailDeliveryError("Error Resend 503"))
+    mensaje, = EmailService.send_report_email("a@test.com", b"%PDF-1.4", "Resumen")
+    assert EmailOutbox.run_pending() == 1
+    mensaje.refresh_from_db()
+    assert mensaje.status == OutboxEmail.Status.PENDING
+    assert mensaje.attempts == 1
+    assert mensaje.next_attempt_at > timezone.now() + timedelta(seconds=10)
+    # Aún no toca reintentar
+    assert EmailOutbox.run_pending() == 0
+
+    OutboxEmail.objects.filter(pk=mensaje.pk).update(next_attempt_at=timezone.now())
+    assert EmailOutbox.run_pending() == 1
+    mensaje.refresh_from_db()
+    assert mensaje.status == OutboxEmail.Status.SENT
+    assert mensaje.provider_id == "ok-id"
+    assert provider.calls == 2
+    # El reintento reutiliza la clave de idempotencia: Resend descarta el duplicado si ya lo aceptó
+    assert provider.keys == [str(mensaje.id)] * 2
+
+def test_permanent_failure_and_exhausted_retries_are_dead_lettered(flaky, settings):
+    settings.EMAIL_MAX_ATTEMPTS = 1
+    flaky(EmailDeliveryError("Error Resend 422", permanent=True), EmailDeliveryError("Error Resend 500"))
+    rechazado, agotado = EmailService.send_report_email(["a@test.com", "b@test.com"], b"%PDF", "Resumen")
+    EmailOutbox.run_pending()
+    assert OutboxEmail.objects.get(pk=rechazado.pk).status == OutboxEmail.Status.DEAD
+    assert OutboxEmail.objects.get(pk=agotado.pk).status == OutboxEmail.Status.DEAD
+
+    assert EmailOutbox.retry_dead() == 2
+    assert EmailOutbox.run_pending() == 2
+    assert OutboxEmail.objects.filter(status=OutboxEmail.Status.SENT).count() == 2
+
+def test_resend_provider_uses_pooled_session_with_timeout(settings):
+    settings.RESEND_API_KEY = 're_test'
+    provider = ResendEmailProvider()
+    respuestas = [
+        SimpleNamespace(status_code=200, json=lambda: {"id": "re-1"}, text=''),
+        SimpleNamespace(status_code=500, text='boom'),
+        SimpleNamespace(status_code=422, text='bad address'),
+    ]
+    with patch.object(provider.session, 'post', side_effect=respuestas) as post:
+        assert provider.send({"to": ["a@test.com"]}) == "re-1"
+        with pytest.raises(EmailDeliveryError) as transitorio:
+            provider.send({})
+        with pytest.raises(EmailDeliveryError) as definitivo:
+            provider.send({})
+    assert post.call_args.kwargs['timeout'] == settings.EMAIL_HTTP_TIMEOUT
+    assert post.call_args.kwargs['headers'] is None
+    assert not transitorio.value.permanent
+    assert definitivo.value.permanent
+
+def test_resend_provider_sends_idempotency_key(settings):
+    settings.RESEND_API_KEY = 're_test'
+    provider = ResendEmailProvider()
+    respuesta = SimpleNamespace(status_code=200, json=lambda: {"id": "re-1"}, text='')
+    with patch.object(provider.session, 'post', return_value=respuesta) as post:
+        provider.send({"to": ["a@test.com"]}, idempotency_key='0b8f')
+    assert post.call_args.kwargs['headers'] == {"Idempotency-Key": '0b8f'}
+
+def test_streaming_body_encodes_attachment_in_blocks():
+    pdf = b'%PDF-1.4' + bytes(range(256)) * 1000
+    payload = {"to": ["a@test.com"], "subject": "Reporte ñ", "attachments": [
+        {"content": ReportArtifact.from_bytes(pdf), "filename": "inventario_smart.pdf"}
+    ]}
+    body = StreamingJSONBody(payload)
+    bloques = list(body)
+    assert len(bloques) > 3
+    contenido = b''.join(bloques)
+    assert len(body) == len(contenido)
+    enviado = json.loads(contenido)
+    assert enviado["subject"] == "Reporte ñ"
+    assert base64.b64decode(enviado["attachments"][0]["content"]) == pdf
+    # Reintentable: se puede recorrer otra vez
+    assert b''.join(body) == contenido
+
+def test_missing_resend_key_fails_at_enqueue(auth_client, settings):
+    settings.EMAIL_PROVIDER = 'infrastructure.services.email_service.ResendEmailProvider'
+    settings.RESEND_API_KEY = None
+    EmailOutbox.reset_provider()
+    with patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis', return_value="IA"):
+        response = auth_client.post('/api/productos/send_inventory_pdf/', {"email": "a@test.com"}, format='json')
+    assert response.status_code == 503
+    assert not OutboxEmail.objects.exists()
+
+def test_attachment_is_kept_only_while_its_fan_out_is_sent(local_email):
+    EmailService.send_report_email(["a@test.com", "b@test.com", "c@test.com"], b"%PDF-1.4 uno", "Resumen")
+    pool = EmailOutbox.build_pool(size=1)
+    assert pool.run_once()
+    # Mientras quedan destinatarios del mismo envío el PDF no se vuelve a leer de la base
+    assert list(EmailOutbox._attachments) == [EmailAttachment.objects.get().pk]
+    while pool.run_once():
+        pass
+    assert len(local_email) == 3
+    # Cola vacía: el proceso no retiene el PDF
+    assert EmailOutbox._attachments == {}
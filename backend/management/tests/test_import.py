@@ -0,0 +1,125 @@
+import gzip
+import io
+import json
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from infrastructure.services import merkle
+from infrastructure.services.merkle_tree_service import MerkleTreeService
+from management.models import Empresa, Producto
+
+@pytest.fixture
+def empresa():
+    return Empresa.objects.create(nit='900', nombre='Comp', direccion='D', telefono='T')
+
+CSV = (
+    "codigo,nombre,caracteristicas,empresa,precio_usd,precio_cop\n"
+    "A1,Laptop,16GB,900,1000,4000000\n"
+    "A2,Mouse,,900,-5,\n"
+    "A3,Teclado,,999,10,\n"
+    ",SinCodigo,,900,1,\n"
+    "A4,Monitor,,900,200,800000\n"
+)
+
+@pytest.mark.django_db
+def test_bulk_import_csv_reports_row_errors(auth_client, empresa):
+    archivo = SimpleUploadedFile('productos.csv', CSV.encode(), content_type='text/csv')
+    response = auth_client.post('/api/productos/bulk_import/', {'file': archivo}, format='multipart')
+
+    assert response.status_code == 200
+    assert response.data['total'] == 5
+    assert response.data['created'] == 2
+    assert response.data['failed'] == 3
+    assert {e['line'] for e in response.data['errors']} == {3, 4, 5}
+    assert Producto.objects.get(codigo='A1').precios == {"USD": 1000, "COP": 4000000}
+
+@pytest.mark.django_db
+def test_bulk_import_ndjson_upserts_in_batches(auth_client, empresa, settings):
+    settings.IMPORT_BATCH_SIZE = 2
+    Producto.objects.create(codigo='B0', nombre='Viejo', caracteristicas='-', precios={"USD": 1}, empresa=empresa)
+    lines = [json.dumps({"codigo": f"B{i}", "nombre": f"Nuevo {i}", "precios": {"USD": i}, "empresa": "900"}) for i in range(5)]
+    lines.insert(2, "{no es json")
+
+    response = auth_client.generic(
+        'POST', '/api/productos/bulk_import/', "\n".join(lines), content_type='application/x-ndjson'
+    )
+
+    assert response.status_code == 200
+    assert (response.data['created'], response.data['updated'], response.data['failed']) == (4, 1, 1)
+    assert Producto.objects.get(codigo='B0').nombre == 'Nuevo 0'
+    # El árbol de Merkle se actualiza por lote aunque bulk_create no emita post_save
+    expected = merkle.build_levels([
+        merkle.producto_leaf_hash(p.codigo, p.nombre, p.caracteristicas, p.precios, p.empresa_id)
+        for p in Producto.objects.order_by('codigo')
+    ])[-1][0]
+    assert MerkleTreeService.current_root()['root'] == expected
+
+@pytest.mark.django_db
+def test_bulk_import_resolves_each_nit_once(auth_client, empresa, django_assert_max_num_queries):
+    lines = "\n".join(json.dumps({"codigo": f"C{i}", "nombre": "X", "precios": {"USD": 1}, "empresa": "900"}) for i in range(300))
+    # Empresa + existentes + insert + árbol de Merkle (estado, hojas, nodos por nivel); nunca una consulta por fila
+    with django_assert_max_num_queries(40):
+        response = auth_client.generic('POST', '/api/productos/bulk_import/', lines, content_type='application/x-ndjson')
+    assert response.data['created'] == 300
+
+@pytest.mark.django_db
+def test_bulk_import_rejects_unknown_format(auth_client):
+    archivo = SimpleUploadedFile('productos.xlsx', b'...')
+    response = auth_client.post('/api/productos/bulk_import/', {'file': archivo}, format='multipart')
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_import_productos_command(empresa, tmp_path):
+    path = tmp_path / 'productos.csv'
+    path.write_text(CSV)
+    out = io.StringIO()
+    call_command('import_productos', str(path), '--batch-size', '2', stdout=out, stderr=io.StringIO())
+    assert "creados: 2" in out.getvalue()
+    assert Producto.objects.count() == 2
+
+def _contenido(response):
+    assert response.streaming
+    return b"".join(response.streaming_content)
+
+@pytest.mark.django_db
+def test_export_ndjson_streams_every_product(auth_client, empresa, settings):
+    settings.EXPORT_CHUNK_SIZE = 3
+    for i in range(10):
+        Producto.objects.create(codigo=f'E{i:02d}', nombre=f'Ñandú {i}', caracteristicas='-', precios={"USD": i}, empresa=empresa)
+
+    response = auth_client.get('/api/productos/export/')
+
+    assert response['Content-Type'] == 'application/x-ndjson'
+    filas = [json.loads(line) for line in _contenido(response).decode().splitlines()]
+    assert [f['codigo'] for f in filas] == [f'E{i:02d}' for i in range(10)]
+    assert filas[0] == {
+        "codigo": "E00", "nombre": "Ñandú 0", "caracteristicas": "-", "precios": {"USD": 0},
+        "empresa": "900", "empresa_nombre": "Comp",
+    }
+
+@pytest.mark.django_db
+def test_export_csv_gzip_round_trips_through_import(auth_client, empresa):
+    Producto.objects.create(codigo='R1', nombre='Coma, "comillas"', caracteristicas='a\nb', precios={"USD": 5, "COP": 20000}, empresa=empresa)
+
+    response = auth_client.get('/api/productos/export/?export_format=csv&compress=gzip')
+    assert response['Content-Type'] == 'application/gzip'
+    assert 'productos.csv.gz' in response['Content-Disposition']
+    csv_bytes = gzip.decompress(_contenido(response))
+
+    Producto.objects.all().delete()
+    archivo = SimpleUploadedFile('productos.csv', csv_bytes, content_type='text/csv')
+    reporte = auth_client.post('/api/productos/bulk_import/', {'file': archivo}, format='multipart').data
+    assert reporte['created'] == 1 and reporte['failed'] == 0
+    producto = Producto.objects.get(codigo='R1')
+    assert (producto.nombre, producto.caracteristicas, producto.precios) == ('Coma, "comillas"', 'a\nb', {"USD": 5, "COP": 20000})
+
+@pytest.mark.django_db
+def test_export_rejects_unknown_format(auth_client):
+    assert auth_client.get('/api/productos/export/?export_format=xml').status_code == 400
+
+@pytest.mark.django_db
+def test_export_productos_command(empresa, tmp_path):
+    Producto.objects.create(codigo='X1', nombre='X', caracteristicas='-', precios={"USD": 1}, empresa=empresa)
+    path = tmp_path / 'productos.ndjson.gz'
+    call_command('export_productos', '--gzip', '--output', str(path), stderr=io.StringIO())
+    assert json.loads(gzip.decompress(path.read_bytes()))['codigo'] == 'X1'
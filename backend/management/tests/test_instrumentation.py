@@ -0,0 +1,63 @@
+import json
+import logging
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from infrastructure.services.instrumentation import Instrumentation, instrumented
+from management.middleware import InstrumentationMiddleware
+from shared_domain.models import Empresa
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture
+def instrumentation(settings):
+    settings.INSTRUMENTATION_ENABLED = True
+    return settings
+
+def test_disabled_middleware_is_removed_from_the_stack(auth_client):
+    with pytest.raises(MiddlewareNotUsed):
+        InstrumentationMiddleware(lambda request: None)
+    assert 'Server-Timing' not in auth_client.get('/api/productos/')
+
+def test_spans_outside_a_request_call_through():
+    llamadas = []
+
+    @instrumented('ai')
+    def servicio(x):
+        llamadas.append(x)
+        return x * 2
+
+    assert Instrumentation.current() is None
+    assert servicio(2) == 4
+    assert llamadas == [2]
+
+def test_server_timing_reports_db_and_service_spans(instrumentation, auth_client):
+    # Sin GOOGLE_API_KEY el análisis responde sin llamar a Gemini, pero el span se registra igual
+    instrumentation.GOOGLE_API_KEY = None
+    response = auth_client.get('/api/productos/generate_inventory_pdf/')
+    assert response.status_code == 200
+    metricas = {m.split(';')[0]: m for m in response['Server-Timing'].split(', ')}
+    assert {'db', 'ai', 'pdf', 'total'} <= set(metricas)
+    assert 'queries' in metricas['db']
+
+def test_repeated_statements_are_flagged_as_n_plus_one(instrumentation, auth_client, caplog):
+    instrumentation.INSTRUMENTATION_NPLUSONE_THRESHOLD = 3
+    metrics, token = Instrumentation.start()
+    try:
+        for nit in ('1', '2', '3'):
+            Empresa.objects.filter(nit=nit).first()
+        Empresa.objects.filter(nit__in=['1', '2']).count()
+        Empresa.objects.filter(nit__in=['1']).count()
+    finally:
+        Instrumentation.stop(token)
+    assert metrics.queries == 5
+    repetidas = metrics.repeated(2)
+    assert [count for _, count in repetidas] == [3, 2]
+
+    instrumentation.INSTRUMENTATION_NPLUSONE_THRESHOLD = 1
+    with caplog.at_level(logging.INFO, logger='stockpro.requests'):
+        auth_client.get('/api/empresas/')
+    registro = json.loads(caplog.records[-1].getMessage())
+    assert caplog.records[-1].levelno == logging.WARNING
+    assert registro["path"] == '/api/empresas/'
+    assert registro["db_queries"] >= 1
+    assert registro["n_plus_one"][0]["count"] >= 1
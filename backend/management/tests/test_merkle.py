@@ -0,0 +1,121 @@
+import io
+import pytest
+from unittest.mock import patch
+from django.core.management import call_command
+from infrastructure.models import MerkleNode, MerkleState
+from infrastructure.services import merkle
+from infrastructure.services.merkle_tree_service import MerkleTreeService
+from management.models import Empresa, Producto
+
+@pytest.fixture
+def empresa():
+    return Empresa.objects.create(nit='900', nombre='Comp', direccion='D', telefono='T')
+
+def crear(empresa, codigo, usd=1):
+    return Producto.objects.create(codigo=codigo, nombre=f'Prod {codigo}', caracteristicas='C', precios={"USD": usd}, empresa=empresa)
+
+def test_build_levels_matches_proofs():
+    leaves = [merkle.hash_leaf(str(i)) for i in range(5)]
+    levels = merkle.build_levels(leaves)
+    root = levels[-1][0]
+    for index, leaf in enumerate(leaves):
+        assert merkle.verify_proof(leaf, index, merkle.proof_from_levels(levels, index), root)
+    assert not merkle.verify_proof(merkle.hash_leaf('x'), 0, merkle.proof_from_levels(levels, 0), root)
+
+@pytest.mark.django_db
+def test_incremental_root_matches_full_rebuild(empresa):
+    for i in range(7):
+        crear(empresa, f'P{i}', usd=i)
+    p3 = Producto.objects.get(codigo='P3')
+    p3.precios = {"USD": 99}
+    p3.save()
+    Producto.objects.get(codigo='P5').delete()
+
+    incremental = MerkleTreeService.current_root()['root']
+    # Las posiciones son estables: un producto borrado deja su hoja vacía
+    expected = merkle.build_levels([
+        merkle.producto_leaf_hash(p.codigo, p.nombre, p.caracteristicas, p.precios, p.empresa_id)
+        if p else merkle.empty_hash(0)
+        for p in [Producto.objects.filter(codigo=f'P{i}').first() for i in range(7)]
+    ])[-1][0]
+    assert incremental == expected
+
+@pytest.mark.django_db
+def test_unchanged_save_does_not_create_new_version(empresa):
+    producto = crear(empresa, 'P1')
+    version = MerkleState.objects.get().version
+    producto.save()
+    assert MerkleState.objects.get().version == version
+
+@pytest.mark.django_db
+@patch('infrastructure.services.blockchain_service.BlockchainService.certify_data')
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_merkle_proof_against_certified_root(mock_ai, mock_blockchain, auth_client, empresa):
+    mock_ai.return_value = "Análisis IA"
+    mock_blockchain.return_value = {"txHash": "tx1", "pdf_hash": "h", "status": "SUCCESS"}
+    for i in range(3):
+        crear(empresa, f'P{i}')
+    certified_root = auth_client.post('/api/productos/certify_inventory/').data['merkle_root']
+
+    # Cambios posteriores no invalidan la prueba contra la raíz certificada
+    crear(empresa, 'P9')
+    Producto.objects.get(codigo='P1').delete()
+
+    response = auth_client.get('/api/productos/P1/merkle_proof/?tx_hash=tx1')
+    assert response.status_code == 200
+    assert response.data['root'] == certified_root
+    assert response.data['verified'] is True
+    assert merkle.verify_proof(response.data['leaf_hash'], response.data['index'], response.data['siblings'], certified_root)
+
+    # Un producto creado después de la certificación no está incluido
+    response = auth_client.get('/api/productos/P9/merkle_proof/?tx_hash=tx1')
+    assert response.status_code == 404
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_tree(empresa):
+    for i in range(5):
+        crear(empresa, f'P{i}')
+    incremental = MerkleTreeService.current_root()
+    state = MerkleTreeService.rebuild()
+    assert state.root == incremental['root']
+    assert state.depth == incremental['depth']
+
+@pytest.mark.django_db
+def test_rebuild_without_changes_keeps_version(empresa):
+    for i in range(5):
+        crear(empresa, f'P{i}')
+    version = MerkleState.objects.get().version
+    assert MerkleTreeService.rebuild().version == version
+
+@pytest.mark.django_db
+@patch('infrastructure.services.blockchain_service.BlockchainService.certify_data')
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_certification_still_verifies_after_rebuild_and_prune(mock_ai, mock_blockchain, auth_client, empresa):
+    mock_ai.return_value = "Análisis IA"
+    mock_blockchain.return_value = {"txHash": "tx1", "pdf_hash": "h", "status": "SUCCESS"}
+    for i in range(6):
+        crear(empresa, f'P{i}')
+    certified_root = auth_client.post('/api/productos/certify_inventory/').data['merkle_root']
+
+    crear(empresa, 'P9')
+    crear(empresa, 'P10')
+    # update() no pasa por los signals: la reconstrucción incorpora el cambio
+    Producto.objects.filter(codigo='P2').update(precios={"USD": 50})
+    Producto.objects.filter(codigo='P4').delete()
+    state = MerkleTreeService.rebuild()
+    assert state.root == merkle.build_levels([
+        merkle.producto_leaf_hash(p.codigo, p.nombre, p.caracteristicas, p.precios, p.empresa_id)
+        if p else merkle.empty_hash(0)
+        for p in [Producto.objects.filter(codigo=c).first() for c in ['P0', 'P1', 'P2', 'P3', 'P4', 'P5', 'P9', 'P10']]
+    ])[-1][0]
+
+    nodos = MerkleNode.objects.count()
+    call_command('rebuild_merkle_tree', '--prune', stdout=io.StringIO())
+    assert MerkleNode.objects.count() < nodos
+    assert MerkleTreeService.current_root()['root'] == state.root
+
+    for codigo in ('P2', 'P4'):
+        response = auth_client.get(f'/api/productos/{codigo}/merkle_proof/?tx_hash=tx1')
+        assert response.status_code == 200
+        assert response.data['verified'] is True
+        assert merkle.verify_proof(response.data['leaf_hash'], response.data['index'], response.data['siblings'], certified_root)
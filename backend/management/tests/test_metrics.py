@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+import textwrap
+from unittest.mock import patch
+import pytest
+from django.conf import settings as django_settings
+from prometheus_client import REGISTRY
+from infrastructure.models import OutboxEmail, ReportJob
+from infrastructure.services.ai_service import AIService
+from management.checks import check_metrics_token
+from shared_domain.exceptions import InfrastructureError
+
+pytestmark = pytest.mark.django_db
+
+def valor(nombre, **labels):
+    return REGISTRY.get_sample_value(nombre, labels) or 0.0
+
+def test_requests_are_counted_per_route_and_method(auth_client):
+    antes = valor('stockpro_http_requests_total', view='producto-list', method='GET', status='200')
+    auth_client.get('/api/productos/')
+    auth_client.get('/api/productos/')
+    assert valor('stockpro_http_requests_total', view='producto-list', method='GET', status='200') == antes + 2
+    assert valor('stockpro_http_request_duration_seconds_count', view='producto-list', method='GET') >= 2
+
+def test_metrics_endpoint_exposes_text_format(client, auth_client, settings):
+    settings.DEBUG = True
+    auth_client.get('/api/productos/')
+    auth_client.get('/api/productos/')
+    ReportJob.objects.create()
+    OutboxEmail.objects.create(to='a@test.com', subject='S', html='H')
+
+    response = client.get('/api/metrics/')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    cuerpo = response.content.decode()
+    assert 'stockpro_http_request_duration_seconds_bucket{' in cuerpo
+    assert 'stockpro_queue_depth{queue="report_job",status="PENDING"} 1.0' in cuerpo
+    assert 'stockpro_queue_depth{queue="email_outbox",status="PENDING"} 1.0' in cuerpo
+    # La segunda lectura del listado sale de la caché de respuestas
+    assert 'stockpro_cache_hit_ratio{cache="responses"}' in cuerpo
+
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis', return_value="Análisis IA")
+def test_pdf_rendering_is_timed(mock_ai, auth_client):
+    antes = valor('stockpro_external_calls_total', service='pdf', operation='render', outcome='ok')
+    auth_client.get('/api/productos/generate_inventory_pdf/')
+    assert valor('stockpro_external_calls_total', service='pdf', operation='render', outcome='ok') == antes + 1
+    assert valor('stockpro_external_call_duration_seconds_count', service='pdf', operation='render') >= 1
+
+def test_gemini_errors_are_counted():
+    antes = valor('stockpro_external_calls_total', service='gemini', operation='generate_content', outcome='error')
+    with patch.object(AIService, 'model', side_effect=RuntimeError("cuota agotada")):
+        with pytest.raises(InfrastructureError):
+            AIService.generate("prompt")
+    assert valor('stockpro_external_calls_total', service='gemini', operation='generate_content', outcome='error') == antes + 1
+
+def test_metrics_token_is_required_when_configured(client, settings):
+    settings.METRICS_TOKEN = 's3cret'
+    assert client.get('/api/metrics/').status_code == 401
+    assert client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code == 200
+
+def test_metrics_without_token_are_hidden_in_production(client, settings):
+    settings.DEBUG = False
+    settings.METRICS_TOKEN = ''
+    assert client.get('/api/metrics/').status_code == 404
+    assert check_metrics_token(None)[0].id == 'management.W003'
+    settings.METRICS_TOKEN = 's3cret'
+    assert check_metrics_token(None) == []
+
+def test_disabled_metrics_hide_the_endpoint(client, settings):
+    settings.METRICS_ENABLED = False
+    assert client.get('/api/metrics/').status_code == 404
+
+def test_counters_are_aggregated_across_worker_processes(tmp_path):
+    # Cada proceso escribe en su propio fichero mmap; el endpoint suma todos
+    script = textwrap.dedent("""
+        import os, django
+        django.setup()
+        from infrastructure.services.metrics import Metrics
+        pid = os.fork()
+        Metrics.observe_request('producto-list', 'GET', 200, 0.01)
+        Metrics.cache('responses', pid == 0)
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        print(Metrics.render()[0].decode())
+    """)
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path), 'DJANGO_SETTINGS_MODULE': 'core.settings'}
+    resultado = subprocess.run(
+        [sys.executable, '-c', script], env=env, cwd=django_settings.BASE_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    assert 'stockpro_http_requests_total{method="GET",status="200",view="producto-list"} 2.0' in resultado.stdout
+    assert 'stockpro_cache_hit_ratio{cache="responses"} 0.5' in resultado.stdout
+    assert len(list(tmp_path.glob('counter_*.db'))) == 2
@@ -0,0 +1,216 @@
+import io
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from reportlab.pdfgen.canvas import Canvas
+from application.use_cases.inventario import ProcesarInventarioUseCase, CertificarInventarioUseCase
+from application.use_cases.reportes import ProcesarReporteJobUseCase
+from infrastructure.models import ReportJob
+from infrastructure.services.ai_service import AIService
+from infrastructure.read_models.inventory_snapshot import InventorySnapshot, ProductoRecord
+from infrastructure.services.pdf_service import PDFService
+from infrastructure.services.report_cache import FileSystemReportStorage, ReportCache
+from infrastructure.services.report_queue import ReportJobQueue
+from management.models import Empresa, Producto
+
+@pytest.fixture(autouse=True)
+def no_autostart(settings):
+    settings.REPORT_WORKERS_AUTOSTART = False
+
+@pytest.mark.django_db
+def test_enqueue_inventory_report_returns_job(auth_client):
+    response = auth_client.post('/api/productos/enqueue_inventory_report/', {}, format='json')
+    assert response.status_code == 202
+    assert response.data['status'] == 'PENDING'
+    assert ReportJob.objects.filter(pk=response.data['id']).exists()
+
+@pytest.mark.django_db
+def test_enqueue_email_report_requires_email(auth_client):
+    response = auth_client.post('/api/productos/enqueue_inventory_report/', {"send_email": True}, format='json')
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_enqueue_form_send_email_false_is_not_sent(auth_client):
+    # En formularios y multipart los booleanos llegan como texto
+    response = auth_client.post('/api/productos/enqueue_inventory_report/', {"send_email": "false"})
+    assert response.status_code == 202
+    assert ReportJob.objects.get(pk=response.data['id']).send_email is False
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_report_job_lifecycle(mock_ai, auth_client):
+    mock_ai.return_value = "Análisis IA"
+    job_id = auth_client.post('/api/productos/enqueue_inventory_report/', {}, format='json').data['id']
+
+    response = auth_client.get(f'/api/reportes/{job_id}/download/')
+    assert response.status_code == 400
+
+    assert ReportJobQueue.run_pending(ProcesarReporteJobUseCase.ejecutar) == 1
+
+    response = auth_client.get(f'/api/reportes/{job_id}/')
+    assert response.data['status'] == 'DONE'
+    response = auth_client.get(f'/api/reportes/{job_id}/download/')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/pdf'
+    assert response['Content-Disposition'] == f'attachment; filename="inventario_{job_id}.pdf"'
+    assert response.getvalue().startswith(b'%PDF')
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_report_job_failure_is_recorded(mock_ai):
+    mock_ai.side_effect = Exception("Gemini caído")
+    job = ReportJobQueue.enqueue()
+    ReportJobQueue.run_pending(ProcesarReporteJobUseCase.ejecutar)
+    job.refresh_from_db()
+    assert job.status == ReportJob.Status.FAILED
+    assert "Gemini caído" in job.error
+
+@pytest.mark.django_db
+def test_report_job_not_found(auth_client):
+    response = auth_client.get('/api/reportes/00000000-0000-0000-0000-000000000000/')
+    assert response.status_code == 404
+
+@pytest.mark.django_db
+@patch('infrastructure.services.pdf_service.PDFService.generate_pdf', wraps=PDFService.generate_pdf)
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_repeated_pdf_download_is_served_from_cache(mock_ai, mock_pdf, auth_client):
+    mock_ai.return_value = "Análisis IA"
+    first = auth_client.get('/api/productos/generate_inventory_pdf/')
+    second = auth_client.get('/api/productos/generate_inventory_pdf/')
+    contenido = first.getvalue()
+    assert second.getvalue() == contenido
+    # FileResponse conoce el tamaño del fichero sin leerlo entero
+    assert second['Content-Length'] == str(len(contenido))
+    assert mock_ai.call_count == 1
+    assert mock_pdf.call_count == 1
+
+    # Un tx_hash distinto es otro reporte
+    auth_client.get('/api/productos/generate_inventory_pdf/?tx_hash=abc')
+    assert mock_pdf.call_count == 2
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_report_cache_invalidated_on_inventory_change(mock_ai, auth_client):
+    mock_ai.return_value = "Análisis IA"
+    auth_client.get('/api/productos/generate_inventory_pdf/')
+    empresa = Empresa.objects.create(nit='1', nombre='Comp', direccion='D', telefono='T')
+    auth_client.get('/api/productos/generate_inventory_pdf/')
+    assert mock_ai.call_count == 2
+
+    Producto.objects.create(codigo='P1', nombre='X', caracteristicas='Y', precios={"USD": 1}, empresa=empresa)
+    auth_client.get('/api/productos/generate_inventory_pdf/')
+    assert mock_ai.call_count == 3
+
+@pytest.mark.django_db
+def test_report_cache_generation_rotates_again_on_commit(django_capture_on_commit_callbacks):
+    empresa = Empresa.objects.create(nit='1', nombre='Comp', direccion='D', telefono='T')
+    with django_capture_on_commit_callbacks(execute=True):
+        Producto.objects.create(codigo='P1', nombre='X', caracteristicas='Y', precios={"USD": 1}, empresa=empresa)
+        # Un reporte concurrente antes del commit quedaría guardado bajo esta generación
+        durante = ReportCache.generation()
+    assert ReportCache.generation() != durante
+
+def test_report_storage_evicts_least_recently_used(tmp_path):
+    storage = FileSystemReportStorage(tmp_path, max_bytes=25)
+    storage.put('aa01', b'x' * 10)
+    storage.put('bb02', b'y' * 10)
+    os.utime(storage._blob_path('aa01'), (1, 1))
+    os.utime(storage._blob_path('bb02'), (2, 2))
+    assert storage.get('aa01') == b'x' * 10  # acceso reciente
+    storage.put('cc03', b'z' * 10)
+    assert storage.get('bb02') is None
+    assert storage.get('aa01') is not None
+    assert storage.get('cc03') is not None
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_generate_inventory_pdf_streaming(mock_ai, auth_client):
+    mock_ai.return_value = "Análisis IA"
+    empresa = Empresa.objects.create(nit='1', nombre='Comp', direccion='D', telefono='T')
+    for i in range(120):
+        Producto.objects.create(codigo=f'P{i:04}', nombre=f'Producto {i}', caracteristicas='Y', precios={"USD": i}, empresa=empresa)
+
+    response = auth_client.get('/api/productos/generate_inventory_pdf/?stream=true&tx_hash=abc')
+    assert response.status_code == 200
+    assert response.streaming
+    content = b''.join(response.streaming_content)
+    assert content.startswith(b'%PDF')
+    assert content.count(b'/Type /Page\n') > 2
+
+@pytest.mark.django_db
+def test_streaming_report_analyses_whole_inventory_without_loading_it(settings, auth_client, monkeypatch):
+    settings.GOOGLE_API_KEY = 'test-key'
+    settings.AI_CHUNK_TOKENS = 200
+    prompts = []
+    model = SimpleNamespace(generate_content=lambda prompt: prompts.append(prompt) or SimpleNamespace(text="Resumen"))
+    monkeypatch.setattr(AIService, 'model', staticmethod(lambda: model))
+    for e in range(3):
+        empresa = Empresa.objects.create(nit=f'S{e}', nombre=f'Empresa {e}', direccion='D', telefono='T')
+        for i in range(40):
+            Producto.objects.create(codigo=f'S{e}-{i:03}', nombre=f'Producto {i}', caracteristicas='Y', precios={"USD": i}, empresa=empresa)
+
+    with patch.object(InventorySnapshot, 'load', side_effect=AssertionError("snapshot completo en memoria")):
+        response = auth_client.get('/api/productos/generate_inventory_pdf/?stream=true')
+        assert b''.join(response.streaming_content).startswith(b'%PDF')
+
+    # Modo map-reduce: todos los productos llegan a algún prompt de la fase map
+    assert all(f'(S{e}-{i:03})' in "".join(prompts) for e in range(3) for i in range(40))
+    assert "reporte ejecutivo" in prompts[-1]
+
+def test_streaming_pdf_renders_rows_lazily():
+    consumed = []
+
+    def rows():
+        for i in range(1000):
+            consumed.append(i)
+            yield ProductoRecord(f'P{i}', f'Producto {i}', {"USD": i}, None, None)
+
+    # Filas leídas del iterador en cada salto de página
+    page_breaks = []
+    show_page = Canvas.showPage
+
+    def record_page(canvas_self):
+        page_breaks.append(len(consumed))
+        show_page(canvas_self)
+
+    output = io.BytesIO()
+    with patch.object(Canvas, 'showPage', record_page):
+        PDFService.generate_pdf_streaming(output, "Análisis", rows(), rows_per_table=50)
+    assert len(consumed) == 1000
+    assert output.getvalue().startswith(b'%PDF')
+    # Una versión que materializase las filas habría leído las 1000 antes de la primera página
+    assert page_breaks[0] <= 50
+    # Entre dos páginas nunca se lee más de una tabla de filas por adelantado
+    assert all(b - a <= 50 for a, b in zip(page_breaks, page_breaks[1:]))
+    assert len(page_breaks) > 1000 // 50
+
+@pytest.fixture
+def catalogo():
+    for e in range(3):
+        empresa = Empresa.objects.create(nit=f'E{e}', nombre=f'Empresa {e}', direccion='D', telefono='T')
+        for i in range(5):
+            Producto.objects.create(codigo=f'E{e}-P{i}', nombre=f'Producto {i}', caracteristicas='Y', precios={"USD": i}, empresa=empresa)
+
+@pytest.mark.django_db
+@patch('infrastructure.services.ai_service.genai')
+def test_report_reads_inventory_in_a_single_query(mock_genai, settings, catalogo, django_assert_num_queries):
+    settings.GOOGLE_API_KEY = 'test-key'
+    mock_genai.GenerativeModel.return_value.generate_content.return_value.text = "Análisis IA"
+    with django_assert_num_queries(1):
+        resultado = ProcesarInventarioUseCase.ejecutar()
+    assert resultado["artifact"].read().startswith(b'%PDF')
+    prompt = mock_genai.GenerativeModel.return_value.generate_content.call_args[0][0]
+    assert "de Empresa 2" in prompt
+
+@pytest.mark.django_db
+@patch('infrastructure.services.blockchain_service.BlockchainService.certify_data')
+@patch('infrastructure.services.ai_service.AIService.generate_inventory_analysis')
+def test_certification_cost_is_constant(mock_ai, mock_blockchain, catalogo, django_assert_num_queries):
+    mock_ai.return_value = "Análisis IA"
+    mock_blockchain.return_value = {"txHash": "tx", "pdf_hash": "h", "status": "SUCCESS"}
+    # Inventario (1) + raíz de Merkle (1) + registro de la certificación (1)
+    with django_assert_num_queries(3):
+        CertificarInventarioUseCase.ejecutar()
+    content = mock_blockchain.call_args[0][0]
+    assert content.startswith("Análisis IA")
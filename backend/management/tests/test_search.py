@@ -0,0 +1,141 @@
+import pytest
+from rest_framework.test import APIClient
+from infrastructure.models import ProductoBusqueda
+from infrastructure.services.product_search import InvertedIndex, ProductSearchService, normalizar
+from management.models import Empresa, Producto
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture(autouse=True)
+def indice_fresco():
+    ProductSearchService.invalidate()
+
+@pytest.fixture
+def catalogo():
+    empresa = Empresa.objects.create(nit='900', nombre='Comp', direccion='D', telefono='T')
+    datos = [
+        ('P1', 'Camiseta roja', 'Algodón peinado, talla M'),
+        ('P2', 'Pantalón azul', 'Tela resistente; combina con camiseta roja'),
+        ('P3', 'Camión de juguete', 'Plástico rojo'),
+        ('P4', 'Zapatos', 'Cuero'),
+    ]
+    for codigo, nombre, caracteristicas in datos:
+        Producto.objects.create(codigo=codigo, nombre=nombre, caracteristicas=caracteristicas, precios={"USD": 1}, empresa=empresa)
+
+def codigos(query, limit=10):
+    return [codigo for codigo, _ in ProductSearchService.search(query, limit)]
+
+def test_normalizar_quita_tildes_y_signos():
+    assert normalizar("Camión, Ñandú & Co.") == "camion nandu co"
+
+def test_index_is_maintained_on_save_and_delete(catalogo, django_capture_on_commit_callbacks):
+    assert ProductoBusqueda.objects.get(producto_id='P3').titulo == 'p3 camion de juguete'
+    producto = Producto.objects.get(codigo='P4')
+    producto.nombre = 'Botas'
+    with django_capture_on_commit_callbacks(execute=True):
+        producto.save()
+    assert codigos('botas') == ['P4']
+    with django_capture_on_commit_callbacks(execute=True):
+        producto.delete()
+    assert codigos('botas') == []
+
+def test_committed_write_patches_the_index_in_place(catalogo, django_capture_on_commit_callbacks, django_assert_num_queries):
+    assert codigos('zapatos') == ['P4']
+    indice = ProductSearchService.index()
+    with django_capture_on_commit_callbacks() as callbacks:
+        Producto.objects.create(codigo='P5', nombre='Zapatos de lona', caracteristicas='-', precios={"USD": 1}, empresa=Empresa.objects.get())
+        # Antes del commit no se publica nada: una búsqueda concurrente sigue en la versión anterior
+        assert codigos('lona') == []
+    for callback in callbacks:
+        callback()
+    # El índice del proceso se actualiza con el documento, sin volver a leer producto_busqueda
+    with django_assert_num_queries(0):
+        assert codigos('lona') == ['P5']
+    assert ProductSearchService.index() is indice
+
+def test_write_in_another_process_rebuilds_the_index(catalogo):
+    assert codigos('zapatos') == ['P4']
+    # Otro proceso publicó una versión: este índice no tiene su cambio
+    ProductoBusqueda.objects.filter(producto_id='P4').update(titulo='p4 botas')
+    ProductSearchService._next_version()
+    assert codigos('botas') == ['P4']
+
+def test_name_matches_rank_above_description_matches(catalogo):
+    assert codigos('camiseta roja') == ['P1', 'P2']
+
+def test_prefix_and_accent_insensitive(catalogo):
+    resultados = codigos('cami')
+    assert set(resultados[:2]) == {'P1', 'P3'} and resultados[2] == 'P2'
+    assert codigos('CAMIÓN') == ['P3']
+
+def test_typo_tolerance(catalogo):
+    assert codigos('camisteta')[0] == 'P1'
+    assert codigos('zapatoss') == ['P4']
+
+def test_all_terms_must_match(catalogo):
+    assert codigos('camiseta cuero') == []
+
+def test_inverted_index_respects_limit():
+    index = InvertedIndex()
+    for i in range(50):
+        index.add(f"C{i}", f"producto {i}", "")
+    assert len(index.search(['producto'], 5)) == 5
+
+def test_postgres_tsquery_uses_prefixes():
+    assert ProductSearchService.tsquery(['cami', 'roja', 'cami']) == 'cami:* & roja:*'
+
+def test_search_endpoint(catalogo):
+    api_client = APIClient()
+    response = api_client.get('/api/productos/search/?q=camiseta&limit=1')
+    assert response.status_code == 200
+    assert response.data['count'] == 1
+    assert response.data['results'][0]['codigo'] == 'P1'
+    assert response.data['results'][0]['rank'] > 0
+    assert api_client.get('/api/productos/search/?q=').status_code == 400
+
+def test_bulk_import_updates_search_index(auth_client, catalogo):
+    contenido = b"codigo,nombre,caracteristicas,empresa,precio_usd\nP9,Gorra verde,Lana,900,3\n"
+    auth_client.post('/api/productos/bulk_import/', contenido, content_type='text/csv')
+    assert codigos('gorra') == ['P9']
+
+@pytest.fixture
+def admin_client_django(client):
+    from management.models import User
+    client.force_login(User.objects.create_superuser(correo='root@test.com', username='root', password='x'))
+    return client
+
+def admin_codigos(client, query):
+    response = client.get('/domain/admin/shared_domain/producto/', {'q': query})
+    assert response.status_code == 200
+    return [p.codigo for p in response.context['cl'].result_list]
+
+def test_admin_search_keeps_relevance_order(admin_client_django, catalogo):
+    # A0 sólo coincide por la descripción: va detrás de P1 aunque su código sea menor
+    Producto.objects.create(codigo='A0', nombre='Bolso', caracteristicas='Estampado de camiseta roja', precios={"USD": 1}, empresa=Empresa.objects.get())
+    assert admin_codigos(admin_client_django, 'camiseta roja')[0] == 'P1'
+    assert admin_codigos(admin_client_django, 'camiseta roja') == codigos('camiseta roja')
+
+def test_admin_search_includes_matches_beyond_limit(admin_client_django, catalogo, settings):
+    settings.ADMIN_SEARCH_LIMIT = 1
+    resultados = admin_codigos(admin_client_django, 'cami')
+    assert resultados[0] == codigos('cami', 1)[0]
+    assert set(resultados) == {'P1', 'P3'}
+
+def test_admin_search_matches_code_substrings(admin_client_django, catalogo):
+    empresa = Empresa.objects.get()
+    for codigo in ('P00100', 'X-2044', 'AB12'):
+        Producto.objects.create(codigo=codigo, nombre='Repuesto', caracteristicas='-', precios={"USD": 1}, empresa=empresa)
+    assert admin_codigos(admin_client_django, 'B12') == ['AB12']
+    assert admin_codigos(admin_client_django, '2044') == ['X-2044']
+
+def test_search_by_company_name_and_nit(catalogo, django_capture_on_commit_callbacks):
+    assert sorted(codigos('comp')) == ['P1', 'P2', 'P3', 'P4']
+    assert sorted(codigos('900')) == ['P1', 'P2', 'P3', 'P4']
+    # Al renombrar la empresa se reindexan sus productos
+    empresa = Empresa.objects.get()
+    empresa.nombre = 'Textiles Andinos'
+    with django_capture_on_commit_callbacks(execute=True):
+        empresa.save()
+    assert sorted(codigos('andinos')) == ['P1', 'P2', 'P3', 'P4']
+    # 'comp' ya sólo se parece a 'combina' de la descripción de P2
+    assert codigos('comp') == ['P2']
@@ -1,11 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EmpresaViewSet, ProductoViewSet
+from .views import (
+    EmpresaViewSet, ProductoViewSet, ReportJobViewSet, InventoryCertificationViewSet, ExchangeRateViewSet, certify_inventory_async
+)
 
 router = DefaultRouter()
 router.register(r'empresas', EmpresaViewSet)
 router.register(r'productos', ProductoViewSet)
+router.register(r'reportes', ReportJobViewSet, basename='reportes')
+router.register(r'certificaciones', InventoryCertificationViewSet, basename='certificaciones')
+router.register(r'tasas-cambio', ExchangeRateViewSet)
 
 urlpatterns = [
+    # Debe ir antes del router para no confundirse con el detalle de un producto
+    path('productos/certify_inventory_async/', certify_inventory_async, name='certify_inventory_async'),
     path('', include(router.urls)),
 ]
@@ -1,7 +1,15 @@
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
-from django.http import HttpResponse
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 # Entities & Exceptions
@@ -9,14 +17,33 @@ from shared_domain.exceptions import BusinessRuleError
 
 # Models
 from .models import Empresa, Producto
+from infrastructure.models import InventoryCertification, ExchangeRate
+from infrastructure.services.currency_service import ExchangeRateService
+from infrastructure.services.inventory_version import GLOBAL, InventoryVersion
+from infrastructure.services.metrics import Metrics
+from infrastructure.services.price_index import PriceIndexService
+from infrastructure.services.product_import import ProductImportParser
 
 # Serializers
-from .serializers import EmpresaSerializer, ProductoSerializer, MyTokenObtainPairSerializer
+from .serializers import (
+    EmpresaSerializer, ProductoSerializer, ReportJobSerializer, InventoryCertificationSerializer, ExchangeRateSerializer,
+    EnqueueReportSerializer, MyTokenObtainPairSerializer
+)
+from .conditional import ConditionalGetMixin
+from .mixins import ValuesListMixin
+from .exception_handler import global_exception_handler
+from .pagination import EmpresaCursorPagination, ProductoCursorPagination
 
 # Application Layer (Use Cases)
-from application.use_cases.inventario import ProcesarInventarioUseCase, CertificarInventarioUseCase
-from application.use_cases.producto import GestionarProductoUseCase
+from application.use_cases.inventario import (
+    ProcesarInventarioUseCase, CertificarInventarioUseCase, CertificarInventarioAsyncUseCase, ObtenerPruebaInclusionUseCase,
+    ObtenerAnaliticaInventarioUseCase
+)
+from application.use_cases.producto import (
+    GestionarProductoUseCase, ImportarProductosUseCase, ExportarProductosUseCase, BuscarProductosUseCase
+)
 from application.use_cases.empresa import GestionarEmpresaUseCase
+from application.use_cases.reportes import EncolarReporteUseCase, ConsultarReporteUseCase
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -24,28 +51,107 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return True
         return request.user.is_authenticated and request.user.is_administrator
 
-class EmpresaViewSet(viewsets.ModelViewSet):
+class EmpresaViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Empresa.objects.all()
     serializer_class = EmpresaSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = EmpresaCursorPagination
     lookup_field = 'nit'
 
+    def get_version_scope(self):
+        nit = self.kwargs.get(self.lookup_field)
+        return InventoryVersion.empresa(nit) if nit else GLOBAL
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?q= filtra en el servidor por nombre o prefijo de NIT; sigue paginado por cursor
+        query = self.request.query_params.get('q', '').strip()
+        if self.action == 'list' and query:
+            queryset = queryset.filter(Q(nombre__icontains=query) | Q(nit__startswith=query))
+        return queryset
+
     def create(self, request, *args, **kwargs):
         # Delegar totalmente al Caso de Uso
         empresa_model = GestionarEmpresaUseCase.crear_empresa(request.data)
         serializer = self.get_serializer(empresa_model)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Producto.objects.all()
     serializer_class = ProductoSerializer
+    pagination_class = ProductoCursorPagination
     lookup_field = 'codigo'
+    cursor_ordering = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'convert'):
+            return queryset
+        params = self.request.query_params
+        if params.get('empresa'):
+            queryset = queryset.filter(empresa_id=params['empresa'])
+        # Filtros de precio resueltos con la tabla indexada producto_precio
+        queryset, self.cursor_ordering = PriceIndexService.filtrar(
+            queryset,
+            currency=params.get('currency'),
+            min_price=params.get('min'),
+            max_price=params.get('max'),
+            ordering=params.get('ordering'),
+        )
+        return queryset
     
+    def get_version_scope(self):
+        # El detalle sólo cambia con su producto y el listado de una empresa sólo con esa empresa
+        if self.action == 'retrieve':
+            return InventoryVersion.producto(self.kwargs[self.lookup_field])
+        nit = self.request.query_params.get('empresa')
+        return InventoryVersion.empresa(nit) if nit else GLOBAL
+
+    def get_etag_variant(self):
+        # Los precios convertidos dependen además de las tasas de cambio
+        return ExchangeRateService.version() if self.request.query_params.get('convert_to') else ''
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'search', 'merkle_proof']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated(), IsAdminOrReadOnly()]
 
+    def get_paginated_response(self, data):
+        convert_to = self.request.query_params.get('convert_to')
+        if convert_to:
+            # Conversión de la página completa en una sola pasada, con las tasas en memoria
+            conversiones = ExchangeRateService.convert_precios(((p['codigo'], p['precios']) for p in data), convert_to)
+            for item in data:
+                conversion = conversiones.get(item['codigo'])
+                item['converted_price'] = None if conversion is None else {
+                    "currency": convert_to.upper(), "value": conversion[0], "source_currency": conversion[1]
+                }
+        return super().get_paginated_response(data)
+
+    @action(detail=False, methods=['get'])
+    def convert(self, request):
+        # Catálogo completo (o filtrado con los mismos parámetros del listado) en la moneda indicada
+        convert_to = request.query_params.get('convert_to')
+        conversiones = ExchangeRateService.convert_queryset(self.get_queryset(), convert_to)
+        return Response({
+            "currency": convert_to.upper(),
+            "rates_version": ExchangeRateService.version(),
+            "count": len(conversiones),
+            "prices": {codigo: valor for codigo, (valor, _) in conversiones.items()},
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        # Búsqueda por texto con ranking, prefijos y tolerancia a errores de escritura
+        query = request.query_params.get('q')
+        resultados = BuscarProductosUseCase.ejecutar(query, request.query_params.get('limit'))
+        data = []
+        for producto, rank in resultados:
+            item = self.get_serializer(producto).data
+            item['rank'] = round(rank, 6)
+            data.append(item)
+        return Response({"query": query, "count": len(data), "results": data}, status=status.HTTP_200_OK)
+
     def create(self, request, *args, **kwargs):
         # Delegar totalmente al Caso de Uso
         producto_model = GestionarProductoUseCase.crear_producto(request.data)
@@ -55,24 +161,88 @@ class ProductoViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def generate_inventory_pdf(self, request):
         tx_hash = request.query_params.get('tx_hash')
+        currency = request.query_params.get('currency')
+
+        if request.query_params.get('stream', '').lower() in ('1', 'true'):
+            # Modo streaming: memoria acotada para inventarios muy grandes
+            resultado = ProcesarInventarioUseCase.ejecutar_streaming(tx_hash=tx_hash, currency=currency)
+            return StreamingHttpResponse(resultado["chunks"], content_type='application/pdf')
         
         # Orquestar vía Caso de Uso
-        resultado = ProcesarInventarioUseCase.ejecutar(tx_hash=tx_hash)
-        
-        return HttpResponse(resultado["pdf_content"], content_type='application/pdf')
+        resultado = ProcesarInventarioUseCase.ejecutar(tx_hash=tx_hash, currency=currency)
+
+        # FileResponse lee el PDF por bloques (o con sendfile) y cierra el fichero al terminar
+        return FileResponse(resultado["artifact"].open(), content_type='application/pdf', filename='inventario_smart.pdf')
 
     @action(detail=False, methods=['post'])
     def send_inventory_pdf(self, request):
+        # 'email' admite una dirección, varias separadas por comas o una lista
         email = request.data.get('email')
         tx_hash = request.data.get('tx_hash')
+        currency = request.data.get('currency') or request.query_params.get('currency')
         
         if not email:
             raise BusinessRuleError("El email es requerido.")
 
-        # Orquestar vía Caso de Uso
-        ProcesarInventarioUseCase.ejecutar(email=email, tx_hash=tx_hash, send_email=True)
+        # Orquestar vía Caso de Uso: el correo queda en la bandeja de salida y se envía en segundo plano
+        resultado = ProcesarInventarioUseCase.ejecutar(email=email, tx_hash=tx_hash, send_email=True, currency=currency)
+        resultado["artifact"].close()
+        destinatarios = [mensaje.to for mensaje in resultado["emails"]]
         
-        return Response({"message": f"Reporte enviado exitosamente a {email}"}, status=status.HTTP_200_OK)
+        return Response({
+            "message": f"Reporte en cola de envío para {', '.join(destinatarios)}",
+            "emails": [{"id": str(mensaje.id), "to": mensaje.to} for mensaje in resultado["emails"]],
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def enqueue_inventory_report(self, request):
+        email = request.data.get('email')
+        tx_hash = request.data.get('tx_hash')
+        opciones = EnqueueReportSerializer(data=request.data)
+        opciones.is_valid(raise_exception=True)
+        send_email = opciones.validated_data['send_email']
+        currency = request.data.get('currency') or request.query_params.get('currency')
+
+        # Encolar el reporte; un worker en segundo plano ejecuta el Caso de Uso
+        job = EncolarReporteUseCase.ejecutar(email=email, tx_hash=tx_hash, send_email=send_email, currency=currency)
+        data = ReportJobSerializer(job).data
+        data['status_url'] = request.build_absolute_uri(f"/api/reportes/{job.id}/")
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        # Acepta multipart (campo 'file') o el fichero como cuerpo crudo (text/csv, application/x-ndjson)
+        if request.content_type.startswith('multipart/'):
+            archivo = request.FILES.get('file')
+            if archivo is None:
+                raise BusinessRuleError("Se requiere el archivo en el campo 'file'.")
+            lines, filename = archivo, archivo.name
+        else:
+            lines, filename = request.stream, None
+            if lines is None:
+                raise BusinessRuleError("El cuerpo de la petición está vacío.")
+
+        file_format = ProductImportParser.detect_format(
+            request.query_params.get('import_format'), filename, request.content_type
+        )
+        reporte = ImportarProductosUseCase.ejecutar(lines, file_format)
+        return Response(reporte, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # Catálogo completo en streaming; ?export_format=ndjson|csv y ?compress=gzip
+        exporter = ExportarProductosUseCase.ejecutar(
+            file_format=request.query_params.get('export_format'),
+            compress=request.query_params.get('compress', '').lower() == 'gzip',
+        )
+        response = StreamingHttpResponse(exporter.stream(), content_type=exporter.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{exporter.filename}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        resultado = ObtenerAnaliticaInventarioUseCase.ejecutar()
+        return Response(resultado, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'])
     def certify_inventory(self, request):
@@ -81,6 +251,72 @@ class ProductoViewSet(viewsets.ModelViewSet):
         
         return Response(resultado, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'])
+    def merkle_proof(self, request, codigo=None):
+        # Prueba de inclusión del producto contra una raíz certificada (por defecto la última)
+        prueba = ObtenerPruebaInclusionUseCase.ejecutar(
+            codigo,
+            tx_hash=request.query_params.get('tx_hash'),
+            root=request.query_params.get('root'),
+        )
+        return Response(prueba, status=status.HTTP_200_OK)
+
+class ReportJobViewSet(viewsets.GenericViewSet):
+    serializer_class = ReportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def retrieve(self, request, pk=None):
+        job = ConsultarReporteUseCase.obtener(pk)
+        return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        artifact = ConsultarReporteUseCase.obtener_pdf(pk)
+        return FileResponse(
+            artifact.open(), content_type='application/pdf', as_attachment=True, filename=f"inventario_{pk}.pdf"
+        )
+
+class ExchangeRateViewSet(viewsets.ModelViewSet):
+    queryset = ExchangeRate.objects.all()
+    serializer_class = ExchangeRateSerializer
+    permission_classes = [IsAdminOrReadOnly]
+    lookup_field = 'moneda'
+
+class InventoryCertificationViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = InventoryCertificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = InventoryCertification.objects.all()
+        tx_hash = self.request.query_params.get('tx_hash')
+        if tx_hash:
+            queryset = queryset.filter(tx_hash=tx_hash)
+        return queryset
+
+def _autenticar_administrador(request):
+    resultado = JWTAuthentication().authenticate(request)
+    user = resultado[0] if resultado else request.user
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    if not user.is_administrator:
+        raise PermissionDenied()
+    return user
+
+@csrf_exempt
+async def certify_inventory_async(request):
+    # Vista nativa async: la transacción se envía y se responde sin esperar confirmación
+    if request.method != 'POST':
+        return JsonResponse({"error": "Método no permitido"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    try:
+        await sync_to_async(_autenticar_administrador)(request)
+        resultado = await CertificarInventarioAsyncUseCase.ejecutar()
+    except Exception as exc:
+        response = global_exception_handler(exc, {})
+        if response is None:
+            raise
+        return JsonResponse(response.data, status=response.status_code)
+    return JsonResponse(resultado, status=status.HTTP_202_ACCEPTED)
+
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
@@ -88,3 +324,16 @@ class MyTokenObtainPairView(TokenObtainPairView):
 @permission_classes([permissions.AllowAny])
 def health_check(request):
     return Response({"status": "ok"}, status=status.HTTP_200_OK)
+
+def metrics(request):
+    # Vista Django simple: Prometheus espera texto plano, sin negociación de contenido de DRF
+    if not Metrics.enabled():
+        raise Http404()
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        # Sin token sólo se expone en desarrollo: rutas, tráfico y colas no son públicos
+        raise Http404()
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    content, content_type = Metrics.render()
+    return HttpResponse(content, content_type=content_type)
@@ -15,11 +15,18 @@ class Producto(models.Model):
         verbose_name_plural = 'Productos'
 
     def clean(self):
-        if not self.precios:
+        Producto.validar_precios(self.precios)
+
+    @staticmethod
+    def validar_precios(precios):
+        # Reglas compartidas por el alta individual y la importación masiva
+        if not precios:
             raise InvalidPriceError("El producto debe tener al menos un precio")
+        if not hasattr(precios, 'items'):
+            raise InvalidPriceError("Los precios deben ser un objeto {moneda: valor}.")
         
         # Validate prices are non-negative
-        for currency, value in self.precios.items():
+        for currency, value in precios.items():
             try:
                 if float(value) < 0:
                     raise InvalidPriceError(f"El precio en {currency} no puede ser negativo.")
@@ -51,6 +51,12 @@ export const AuthProvider = ({ children }) => {
         return instance;
     }, []);
 
+    // Una sola página de un listado paginado por cursor; `next` y `previous` son URLs absolutas
+    const fetchPage = async (pathOrUrl, params = {}) => {
+        const res = await api.get(pathOrUrl, { params });
+        return res.data;
+    };
+
     const login = (data) => {
         localStorage.setItem('token', data.access);
         localStorage.setItem('refreshToken', data.refresh);
@@ -75,6 +81,7 @@ export const AuthProvider = ({ children }) => {
         auth,
         user,
         api,
+        fetchPage,
         login,
         logout
     };
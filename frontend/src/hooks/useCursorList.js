@@ -0,0 +1,51 @@
+import { useState, useEffect } from 'react';
+import { useAuth } from '../context/AuthContext';
+
+// Listado paginado por cursor: se descarga una página cada vez y "Cargar más" sigue el enlace `next`.
+// Con texto de búsqueda se consulta al servidor (searchPath o el propio listado con ?q=) en lugar de filtrar en local.
+export const useCursorList = (path, { search = '', searchPath = null } = {}) => {
+    const { fetchPage } = useAuth();
+    const [items, setItems] = useState([]);
+    const [next, setNext] = useState(null);
+    const [fetching, setFetching] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [reloadKey, setReloadKey] = useState(0);
+
+    useEffect(() => {
+        let cancelled = false;
+        const query = search.trim();
+        // Espera a que el usuario deje de escribir antes de consultar
+        const timer = setTimeout(async () => {
+            setFetching(true);
+            try {
+                const data = await fetchPage(query && searchPath ? searchPath : path, query ? { q: query } : {});
+                if (!cancelled) {
+                    setItems(data.results);
+                    setNext(data.next || null);
+                }
+            } finally {
+                if (!cancelled) setFetching(false);
+            }
+        }, query ? 300 : 0);
+        return () => {
+            cancelled = true;
+            clearTimeout(timer);
+        };
+    }, [path, searchPath, search, reloadKey]);
+
+    const loadMore = async () => {
+        if (!next || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const data = await fetchPage(next);
+            setItems(prev => [...prev, ...data.results]);
+            setNext(data.next || null);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    const reload = () => setReloadKey(key => key + 1);
+
+    return { items, hasMore: !!next, fetching, loadingMore, loadMore, reload };
+};
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Building2, PlusCircle, Trash2 } from 'lucide-react';
 import { Input } from '../components/atoms/Input';
@@ -8,41 +8,17 @@ import { SearchInput } from '../components/atoms/SearchInput';
 import { Feedback } from '../components/molecules/Feedback';
 import { Modal } from '../components/molecules/Modal';
 import { useAuth } from '../context/AuthContext';
+import { useCursorList } from '../hooks/useCursorList';
 
 export const EmpresasPage = () => {
     const { api, user } = useAuth();
-    const [empresas, setEmpresas] = useState([]);
-    const [filteredEmpresas, setFilteredEmpresas] = useState([]);
     const [search, setSearch] = useState('');
+    const { items: empresas, hasMore, fetching, loadingMore, loadMore, reload } = useCursorList('/empresas/', { search });
     const [form, setForm] = useState({ nit: '', nombre: '', direccion: '', telefono: '' });
     const [loading, setLoading] = useState(false);
-    const [fetching, setFetching] = useState(true);
     const [feedback, setFeedback] = useState(null);
     const [deleteModal, setDeleteModal] = useState({ show: false, nit: null }); // State for delete modal
 
-    useEffect(() => {
-        fetchEmpresas();
-    }, []);
-
-    useEffect(() => {
-        const filtered = empresas.filter(emp =>
-            emp.nombre.toLowerCase().includes(search.toLowerCase()) ||
-            emp.nit.includes(search)
-        );
-        setFilteredEmpresas(filtered);
-    }, [search, empresas]);
-
-    const fetchEmpresas = async () => {
-        setFetching(true);
-        try {
-            const res = await api.get('/empresas/');
-            setEmpresas(res.data);
-            setFilteredEmpresas(res.data);
-        } finally {
-            setFetching(false);
-        }
-    };
-
     const handleCreate = async (e) => {
         e.preventDefault();
         setLoading(true);
@@ -51,7 +27,7 @@ export const EmpresasPage = () => {
             await api.post('/empresas/', form);
             setFeedback({ type: 'success', message: 'Empresa registrada correctamente.' });
             setForm({ nit: '', nombre: '', direccion: '', telefono: '' });
-            fetchEmpresas();
+            reload();
         } catch (err) {
             setFeedback({ type: 'error', message: 'Error al registrar la empresa. Verifica el NIT.' });
         } finally {
@@ -66,7 +42,7 @@ export const EmpresasPage = () => {
     const handleDelete = async () => {
         try {
             await api.delete(`/empresas/${deleteModal.nit}/`);
-            fetchEmpresas();
+            reload();
             setDeleteModal({ show: false, nit: null });
         } catch (err) {
             alert('Error al eliminar');
@@ -109,7 +85,7 @@ export const EmpresasPage = () => {
                     ) : (
                         <div className="grid grid-cols-1 gap-4 overflow-y-auto pr-2 pb-20 custom-scrollbar">
                             <AnimatePresence>
-                                {filteredEmpresas.map(emp => (
+                                {empresas.map(emp => (
                                     <motion.div
                                         layout
                                         initial={{ opacity: 0, y: 20 }}
@@ -138,9 +114,14 @@ export const EmpresasPage = () => {
                                     </motion.div>
                                 ))}
                             </AnimatePresence>
-                            {filteredEmpresas.length === 0 && (
+                            {empresas.length === 0 && (
                                 <p className="text-center py-20 text-muted">No se encontraron empresas.</p>
                             )}
+                            {hasMore && (
+                                <Button onClick={loadMore} loading={loadingMore} variant="secondary" className="w-full shrink-0">
+                                    Cargar más empresas
+                                </Button>
+                            )}
                         </div>
                     )}
                 </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { ShieldCheck, Download, ExternalLink, Mail, Send } from 'lucide-react';
 import { Input } from '../components/atoms/Input';
@@ -10,13 +10,13 @@ import { Modal } from '../components/molecules/Modal';
 import { BlockchainLoader } from '../components/molecules/BlockchainLoader';
 import { IntegrityInfo } from '../components/molecules/IntegrityInfo';
 import { useAuth } from '../context/AuthContext';
+import { useCursorList } from '../hooks/useCursorList';
 
 export const InventarioPage = () => {
     const { api } = useAuth();
-    const [productos, setProductos] = useState([]);
-    const [filteredProductos, setFilteredProductos] = useState([]);
     const [search, setSearch] = useState('');
-    const [fetching, setFetching] = useState(true);
+    // Una página del catálogo cada vez; la búsqueda se hace en el servidor
+    const productos = useCursorList('/productos/', { search, searchPath: '/productos/search/' });
     const [email, setEmail] = useState('');
     const [sending, setSending] = useState(false);
     const [certResult, setCertResult] = useState(null);
@@ -26,25 +26,6 @@ export const InventarioPage = () => {
 
     const [pdfLoading, setPdfLoading] = useState(false);
 
-    useEffect(() => {
-        setFetching(true);
-        api.get('/productos/')
-            .then(res => {
-                setProductos(res.data);
-                setFilteredProductos(res.data);
-            })
-            .finally(() => setFetching(false));
-    }, []);
-
-    useEffect(() => {
-        const filtered = productos.filter(p =>
-            p.empresa.toLowerCase().includes(search.toLowerCase()) ||
-            p.nombre.toLowerCase().includes(search.toLowerCase()) ||
-            p.codigo.includes(search)
-        );
-        setFilteredProductos(filtered);
-    }, [search, productos]);
-
     const downloadPDF = async () => {
         setPdfLoading(true);
         try {
@@ -101,7 +82,7 @@ export const InventarioPage = () => {
                 email,
                 tx_hash: certResult?.txHash
             });
-            setEmailFeedback({ type: 'success', message: `Reporte enviado exitosamente a ${email}` });
+            setEmailFeedback({ type: 'success', message: `Reporte en cola de envío para ${email}` });
             setEmail('');
         } catch (err) {
             setEmailFeedback({ type: 'error', message: 'Error al enviar el correo. Revisa la configuración.' });
@@ -196,7 +177,7 @@ export const InventarioPage = () => {
                 <SearchInput
                     value={search}
                     onChange={(e) => setSearch(e.target.value)}
-                    placeholder="Filtrar por empresa o producto..."
+                    placeholder="Buscar por empresa o producto..."
                 />
             </div>
 
@@ -214,7 +195,7 @@ export const InventarioPage = () => {
                         </table>
                     </div>
                     <div className="overflow-y-auto flex-1 custom-scrollbar">
-                        {fetching ? (
+                        {productos.fetching ? (
                             <div className="flex justify-center p-20">
                                 <LoadingSpinner size={40} />
                             </div>
@@ -222,7 +203,7 @@ export const InventarioPage = () => {
                             <>
                                 <table className="w-full text-left border-collapse">
                                     <tbody>
-                                        {filteredProductos.map(p => (
+                                        {productos.items.map(p => (
                                             <tr key={p.codigo} className="border-t border-white/5 hover:bg-white/[0.02] transition-colors">
                                                 <td className="p-5 w-1/2">
                                                     <p className="font-bold text-slate-100">{p.nombre}</p>
@@ -238,7 +219,14 @@ export const InventarioPage = () => {
                                         ))}
                                     </tbody>
                                 </table>
-                                {filteredProductos.length === 0 && <p className="text-center py-20 text-muted">No se encontraron resultados.</p>}
+                                {productos.items.length === 0 && <p className="text-center py-20 text-muted">No se encontraron resultados.</p>}
+                                {productos.hasMore && (
+                                    <div className="p-5">
+                                        <Button onClick={productos.loadMore} loading={productos.loadingMore} variant="secondary" className="w-full">
+                                            Cargar más productos
+                                        </Button>
+                                    </div>
+                                )}
                             </>
                         )}
                     </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { ShoppingBag, PackagePlus, Box, Trash2 } from 'lucide-react';
 import { Input } from '../components/atoms/Input';
@@ -8,46 +8,19 @@ import { SearchInput } from '../components/atoms/SearchInput';
 import { Feedback } from '../components/molecules/Feedback';
 import { Modal } from '../components/molecules/Modal';
 import { useAuth } from '../context/AuthContext';
+import { useCursorList } from '../hooks/useCursorList';
 
 export const ProductosPage = () => {
     const { api, user } = useAuth();
-    const [productos, setProductos] = useState([]);
-    const [filteredProductos, setFilteredProductos] = useState([]);
-    const [empresas, setEmpresas] = useState([]);
     const [search, setSearch] = useState('');
+    // Catálogo página a página; la búsqueda la resuelve /productos/search/ con ranking
+    const productos = useCursorList('/productos/', { search, searchPath: '/productos/search/' });
+    const empresas = useCursorList('/empresas/');
     const [form, setForm] = useState({ codigo: '', nombre: '', caracteristicas: '', empresa: '', usd: '', cop: '' });
     const [loading, setLoading] = useState(false);
-    const [fetching, setFetching] = useState(true);
     const [feedback, setFeedback] = useState(null);
     const [deleteModal, setDeleteModal] = useState({ show: false, codigo: null });
 
-    useEffect(() => {
-        fetchInitialData();
-    }, []);
-
-    useEffect(() => {
-        const filtered = productos.filter(p =>
-            p.nombre.toLowerCase().includes(search.toLowerCase()) ||
-            p.codigo.includes(search)
-        );
-        setFilteredProductos(filtered);
-    }, [search, productos]);
-
-    const fetchInitialData = async () => {
-        setFetching(true);
-        try {
-            const [prodRes, empRes] = await Promise.all([
-                api.get('/productos/'),
-                api.get('/empresas/')
-            ]);
-            setProductos(prodRes.data);
-            setFilteredProductos(prodRes.data);
-            setEmpresas(empRes.data);
-        } finally {
-            setFetching(false);
-        }
-    };
-
     const handleCreate = async (e) => {
         e.preventDefault();
         setLoading(true);
@@ -63,7 +36,7 @@ export const ProductosPage = () => {
             await api.post('/productos/', payload);
             setFeedback({ type: 'success', message: 'Producto agregado exitosamente.' });
             setForm({ codigo: '', nombre: '', caracteristicas: '', empresa: '', usd: '', cop: '' });
-            fetchInitialData();
+            productos.reload();
         } catch (err) {
             setFeedback({ type: 'error', message: 'Error al registrar el producto. Verifica los datos.' });
         } finally {
@@ -82,7 +55,7 @@ export const ProductosPage = () => {
             await api.delete(`/productos/${deleteModal.codigo}/`);
             setFeedback({ type: 'success', message: 'Producto eliminado exitosamente.' });
             setDeleteModal({ show: false, codigo: null });
-            fetchInitialData();
+            productos.reload();
         } catch (err) {
             setFeedback({ type: 'error', message: 'Error al eliminar el producto.' });
         } finally {
@@ -130,12 +103,22 @@ export const ProductosPage = () => {
                                     required
                                 >
                                     <option value="" className="bg-slate-900 text-slate-400">Selecciona una Empresa</option>
-                                    {empresas.map(emp => (
+                                    {empresas.items.map(emp => (
                                         <option key={emp.nit} value={emp.nit} className="bg-slate-900 text-slate-100">
                                             {emp.nombre}
                                         </option>
                                     ))}
                                 </select>
+                                {empresas.hasMore && (
+                                    <button
+                                        type="button"
+                                        onClick={empresas.loadMore}
+                                        disabled={empresas.loadingMore}
+                                        className="mt-2 text-xs text-violet-400 hover:text-violet-300 transition-colors"
+                                    >
+                                        {empresas.loadingMore ? 'Cargando empresas...' : 'Cargar más empresas'}
+                                    </button>
+                                )}
                             </div>
 
                             <Button type="submit" loading={loading} className="w-full bg-violet-600 hover:bg-violet-500 shadow-violet-600/20">
@@ -153,12 +136,12 @@ export const ProductosPage = () => {
                         <SearchInput value={search} onChange={(e) => setSearch(e.target.value)} placeholder="Buscar producto..." />
                     </div>
 
-                    {fetching ? (
+                    {productos.fetching ? (
                         <div className="flex justify-center p-20"><LoadingSpinner size={40} /></div>
                     ) : (
                         <div className="grid grid-cols-1 gap-6 overflow-y-auto pr-2 pb-20 custom-scrollbar">
                             <AnimatePresence>
-                                {filteredProductos.map(p => (
+                                {productos.items.map(p => (
                                     <motion.div
                                         layout
                                         initial={{ opacity: 0, scale: 0.95 }}
@@ -204,9 +187,14 @@ export const ProductosPage = () => {
                                     </motion.div>
                                 ))}
                             </AnimatePresence>
-                            {filteredProductos.length === 0 && (
+                            {productos.items.length === 0 && (
                                 <p className="text-center py-20 text-muted">No se encontraron productos.</p>
                             )}
+                            {productos.hasMore && (
+                                <Button onClick={productos.loadMore} loading={productos.loadingMore} variant="secondary" className="w-full shrink-0">
+                                    Cargar más productos
+                                </Button>
+                            )}
                         </div>
                     )}
                 </div>